@@ -0,0 +1,93 @@
+"""
+Compare per-frame detect() calls with a single detect_batch() call.
+
+Runs N synthetic frames through each detector both ways and reports
+milliseconds per frame. Use it to pick a burst size for the current
+hardware: batching amortizes interpreter/statistics overhead, but each
+change of batch size costs one tensor reallocation on the TFLite path.
+
+Usage (from the raspberry-pi directory):
+
+    python benchmarks/bench_batch.py
+    python benchmarks/bench_batch.py --detectors heuristic --batch-sizes 1 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config import get_config  # noqa: E402
+from detection.heuristic_model import HeuristicWasteClassifier  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark detect() vs detect_batch()")
+    parser.add_argument(
+        "--detectors",
+        nargs="+",
+        default=["heuristic", "tflite"],
+        choices=["heuristic", "tflite", "yolo"],
+        help="Detectors to benchmark",
+    )
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8], help="Frames per batch")
+    parser.add_argument("--repeats", type=int, default=10, help="Timed repetitions per batch size")
+    return parser.parse_args()
+
+
+def build_detector(name: str):
+    config = get_config()
+    if name == "heuristic":
+        return HeuristicWasteClassifier(conf_threshold=config.CONFIDENCE_THRESHOLD)
+    if name == "yolo":
+        from detection.yolo_model import WasteDetector
+
+        return WasteDetector(model_path=config.MODEL_PATH, conf_threshold=config.CONFIDENCE_THRESHOLD)
+
+    from detection.tflite_model import TFLiteWasteClassifier
+
+    return TFLiteWasteClassifier(
+        model_path=config.TFLITE_MODEL_PATH,
+        labels_path=config.TFLITE_LABELS_PATH,
+        input_size=config.TFLITE_INPUT_SIZE,
+        conf_threshold=config.CONFIDENCE_THRESHOLD,
+        num_threads=config.TFLITE_NUM_THREADS,
+        delegate=config.TFLITE_DELEGATE,
+    )
+
+
+def time_per_frame(fn, frames, repeats: int) -> float:
+    fn(frames)  # warm-up (also settles the TFLite batch size)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(frames)
+    return (time.perf_counter() - start) / (repeats * len(frames)) * 1000.0
+
+
+def main() -> None:
+    args = parse_args()
+    width, height = get_config().CAMERA_RESOLUTION
+    rng = np.random.default_rng(0)
+    pool = [
+        rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+        for _ in range(max(args.batch_sizes))
+    ]
+
+    print(f"{'detector':<12}{'batch':>7}{'detect ms/frame':>18}{'batch ms/frame':>17}{'speedup':>9}")
+    for name in args.detectors:
+        detector = build_detector(name)
+        for size in args.batch_sizes:
+            frames = pool[:size]
+            sequential = time_per_frame(lambda fs: [detector.detect(f) for f in fs], frames, args.repeats)
+            batched = time_per_frame(detector.detect_batch, frames, args.repeats)
+            print(f"{name:<12}{size:>7}{sequential:>18.2f}{batched:>17.2f}{sequential / batched:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare per-event JSON payloads with batched CBOR payloads.
+
+Builds representative bin-status, system and detection messages and
+reports bytes per event and packets per event for the legacy JSON path
+and for CBOR batches of several sizes. MQTT fixed header and topic bytes
+are included, since on a cellular uplink they are paid per packet.
+
+Usage (from the raspberry-pi directory):
+
+    python benchmarks/bench_mqtt_encoding.py
+    python benchmarks/bench_mqtt_encoding.py --batch-sizes 1 10 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mqtt.codec import decode_batch, encode_batch, epoch_ms  # noqa: E402
+
+TOPICS = {
+    "smartbin/bin_status": lambda rng: {
+        "levels": {name: round(rng.uniform(0, 100), 1) for name in ("dry", "wet", "electronic")},
+        "sweep_ms": round(rng.uniform(80, 140), 1),
+        "invalid": [],
+        "full": [],
+        "reason": "change",
+    },
+    "smartbin/system": lambda rng: {"status": "alert", "message": "wet bin is full"},
+    "smartbin/detection": lambda rng: {
+        "count": 1,
+        "destination": "dry",
+        "objects": [{"class": "dry", "confidence": round(rng.random(), 3)}],
+        "top_k": [["dry", 0.91], ["wet", 0.06], ["electronic", 0.03]],
+    },
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark JSON vs batched CBOR telemetry")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 5, 20], help="Events per batch")
+    parser.add_argument("--events", type=int, default=200, help="Events per topic")
+    return parser.parse_args()
+
+
+def wire_bytes(topic: str, payload: bytes) -> int:
+    # PUBLISH fixed header (~2 bytes) + topic length prefix + topic
+    return 2 + 2 + len(topic) + len(payload)
+
+
+def main() -> None:
+    args = parse_args()
+    rng = random.Random(0)
+
+    print(f"{'topic':<22}{'mode':>10}{'bytes/event':>13}{'packets/event':>15}{'saving':>9}")
+    for topic, make in TOPICS.items():
+        events = [make(rng) for _ in range(args.events)]
+
+        json_total = 0
+        for event in events:
+            payload = json.dumps(dict(event, timestamp=datetime.now().isoformat())).encode()
+            json_total += wire_bytes(topic, payload)
+        json_per_event = json_total / len(events)
+        print(f"{topic:<22}{'json':>10}{json_per_event:>13.1f}{1.0:>15.2f}{'':>9}")
+
+        for size in args.batch_sizes:
+            total = packets = 0
+            now = epoch_ms()
+            for start in range(0, len(events), size):
+                records = [(now + i * 250, event) for i, event in enumerate(events[start:start + size])]
+                payload = encode_batch(topic, records)
+                assert len(decode_batch(payload)) == len(records)
+                total += wire_bytes(f"{topic}/batch", payload)
+                packets += 1
+            per_event = total / len(events)
+            print(
+                f"{'':<22}{f'cbor x{size}':>10}{per_event:>13.1f}{packets / len(events):>15.2f}"
+                f"{json_per_event / per_event:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Maximum pipeline throughput without a camera.
+
+Feeds frames from a frame source (synthetic, image folder or video file)
+through InferencePipeline and a detector and reports frames per second and
+per-frame detect() latency. With --pacing fast the source never waits, so
+the number is the pipeline's ceiling on this hardware; --pacing realtime
+replays a recording at its native rate and shows how many frames a live
+camera would have dropped.
+
+Usage (from the raspberry-pi directory):
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --source "images:../dataset/*/images" --detector tflite
+    python benchmarks/bench_pipeline.py --source video:field.mp4 --pacing realtime --threaded
+    python benchmarks/bench_pipeline.py --cache 32    # result cache, cleared per scene
+
+With --cache the detector sits behind the result cache and a motion
+trigger clears it whenever something enters the scene, as in the
+automatic capture loop.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config import get_config  # noqa: E402
+from detection.frame_source import PACING_MODES, create_frame_source  # noqa: E402
+from detection.inference import InferencePipeline  # noqa: E402
+from detection.motion import MotionTrigger  # noqa: E402
+from detection.result_cache import CachedDetector, ResultCache  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark capture + detection throughput")
+    parser.add_argument("--source", default="synthetic:300", help="Frame source spec (see detection/frame_source.py)")
+    parser.add_argument("--pacing", default="fast", choices=PACING_MODES, help="Source pacing")
+    parser.add_argument("--fps", type=float, default=None, help="Rate for fixed pacing")
+    parser.add_argument("--frames", type=int, default=300, help="Stop after this many frames")
+    parser.add_argument("--threaded", action="store_true", help="Use the background frame grabber")
+    parser.add_argument(
+        "--detector",
+        default="heuristic",
+        choices=["heuristic", "tflite", "yolo", "none"],
+        help="Detector run on every frame ('none' measures capture only)",
+    )
+    parser.add_argument("--cache", type=int, default=0, help="Result cache size (0 = no cache)")
+    return parser.parse_args()
+
+
+def build_detector(name: str):
+    config = get_config()
+    if name == "none":
+        return None
+    if name == "heuristic":
+        from detection.heuristic_model import HeuristicWasteClassifier
+
+        return HeuristicWasteClassifier(conf_threshold=config.CONFIDENCE_THRESHOLD)
+    if name == "yolo":
+        from detection.yolo_model import WasteDetector
+
+        return WasteDetector(model_path=config.MODEL_PATH, conf_threshold=config.CONFIDENCE_THRESHOLD)
+
+    from detection.tflite_model import TFLiteWasteClassifier
+
+    return TFLiteWasteClassifier(
+        model_path=config.TFLITE_MODEL_PATH,
+        labels_path=config.TFLITE_LABELS_PATH,
+        input_size=config.TFLITE_INPUT_SIZE,
+        conf_threshold=config.CONFIDENCE_THRESHOLD,
+        num_threads=config.TFLITE_NUM_THREADS,
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    config = get_config()
+
+    detector = build_detector(args.detector)
+    cache = motion = None
+    if args.cache > 0 and detector is not None:
+        cache = ResultCache(
+            max_entries=args.cache,
+            max_distance=config.RESULT_CACHE_MAX_DISTANCE,
+            ttl=config.RESULT_CACHE_TTL,
+        )
+        detector = CachedDetector(detector, cache)
+        motion = MotionTrigger(enter_fraction=config.MOTION_ENTER_FRACTION, on_enter=cache.clear)
+    source = create_frame_source(args.source, resolution=config.CAMERA_RESOLUTION, pacing=args.pacing, fps=args.fps)
+    pipeline = InferencePipeline(resolution=config.CAMERA_RESOLUTION, threaded=args.threaded, source=source)
+
+    latencies = []
+    frames = 0
+    last_sequence = 0
+    start = time.perf_counter()
+    try:
+        while frames < args.frames:
+            captured = pipeline.read_latest(after_sequence=last_sequence)
+            if captured is None:
+                break
+            last_sequence = captured.sequence
+            frames += 1
+
+            if motion is not None:
+                motion.update(captured.frame)
+            if detector is not None:
+                t0 = time.perf_counter()
+                detector.detect(captured.frame)
+                latencies.append((time.perf_counter() - t0) * 1000)
+    finally:
+        elapsed = time.perf_counter() - start
+        pipeline.release()
+
+    produced = source.frames_read
+    print(f"source={args.source} pacing={args.pacing} threaded={args.threaded} detector={args.detector}")
+    print(f"frames processed : {frames} in {elapsed:.2f} s ({frames / elapsed if elapsed else 0:.1f} fps)")
+    print(f"frames produced  : {produced} (dropped {produced - frames + source.pacer.skipped})")
+    if latencies:
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"detect latency   : median {statistics.median(latencies):.2f} ms, p95 {p95:.2f} ms")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"result cache     : hit rate {stats['hit_rate'] * 100:.1f}% "
+              f"({stats['hits']} hits, {stats['misses']} misses)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark for TFLiteWasteClassifier input preprocessing.
+
+Compares the legacy allocating path (_preprocess + set_tensor) with the
+zero-copy path (_fill_input) that writes straight into the interpreter's
+input buffer. Reports time per call and bytes allocated per call
+(peak, as seen by tracemalloc, which tracks NumPy and OpenCV array buffers).
+
+Usage (from the raspberry-pi directory):
+
+    python benchmarks/bench_preprocess.py
+    python benchmarks/bench_preprocess.py --iterations 2000 --frame-size 640x480
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config import get_config  # noqa: E402
+from detection.tflite_model import TFLiteWasteClassifier  # noqa: E402
+
+
+def parse_size(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def parse_args() -> argparse.Namespace:
+    config = get_config()
+    parser = argparse.ArgumentParser(description="Benchmark TFLite input preprocessing")
+    parser.add_argument("--model", default=config.TFLITE_MODEL_PATH, help="Path to .tflite model")
+    parser.add_argument("--labels", default=config.TFLITE_LABELS_PATH, help="Path to labels.txt")
+    parser.add_argument("--iterations", type=int, default=500, help="Timed calls per variant")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed warm-up calls")
+    parser.add_argument(
+        "--frame-size",
+        type=parse_size,
+        default=config.CAMERA_RESOLUTION,
+        help="Synthetic camera frame size WxH",
+    )
+    return parser.parse_args()
+
+
+def measure(fn: Callable[[], None], iterations: int, warmup: int) -> Tuple[float, int, int]:
+    """Return (microseconds per call, peak bytes allocated in a call, bytes left allocated)."""
+    for _ in range(warmup):
+        fn()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+
+    # Peak traced memory during a call is the transient allocation cost:
+    # every temporary image/array the call creates shows up here.
+    tracemalloc.start()
+    peak = 0
+    for _ in range(10):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        fn()
+        current, call_peak = tracemalloc.get_traced_memory()
+        peak = max(peak, call_peak - baseline)
+    retained = current - baseline
+    tracemalloc.stop()
+
+    return elapsed / iterations * 1e6, peak, retained
+
+
+def main() -> None:
+    args = parse_args()
+    width, height = args.frame_size
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+    clf = TFLiteWasteClassifier(model_path=args.model, labels_path=args.labels)
+    if not clf.zero_copy:
+        print("Zero-copy path unavailable for this model; nothing to compare.")
+        return
+
+    def legacy() -> None:
+        clf.interpreter.set_tensor(clf.input_index, clf._preprocess(frame))
+
+    def zero_copy() -> None:
+        clf._fill_input(frame)
+
+    # Both paths must produce the same input tensor.
+    legacy()
+    expected = clf.interpreter.get_tensor(clf.input_index)
+    zero_copy()
+    actual = clf.interpreter.get_tensor(clf.input_index)
+    max_diff = float(np.max(np.abs(expected.astype(np.float64) - actual.astype(np.float64))))
+
+    print(f"Frame {width}x{height} -> input {clf.input_size[0]}x{clf.input_size[1]} ({clf.input_dtype.__name__})")
+    print(f"Max abs difference between paths: {max_diff:.3g}")
+    print(f"{'variant':<12}{'us/call':>12}{'alloc bytes/call':>18}{'retained':>10}")
+    for name, fn in (("legacy", legacy), ("zero-copy", zero_copy)):
+        us, peak, retained = measure(fn, args.iterations, args.warmup)
+        print(f"{name:<12}{us:>12.1f}{peak:>18d}{retained:>10d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Sweep TFLite interpreter thread counts and backends on the bundled model.
+
+For every (backend, num_threads) combination a fresh TFLiteWasteClassifier
+is built and predict() is timed on a synthetic camera frame. Reports the
+backend that was actually selected (delegate fallbacks show up here),
+mean / p50 / p95 latency and throughput.
+
+Usage (from the raspberry-pi directory):
+
+    python benchmarks/bench_tflite_threads.py
+    python benchmarks/bench_tflite_threads.py --threads 1 2 4 --backends xnnpack cpu
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config import get_config  # noqa: E402
+from detection.tflite_model import TFLiteWasteClassifier  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    config = get_config()
+    parser = argparse.ArgumentParser(description="Sweep TFLite thread counts / backends")
+    parser.add_argument("--model", default=config.TFLITE_MODEL_PATH, help="Path to .tflite model")
+    parser.add_argument("--labels", default=config.TFLITE_LABELS_PATH, help="Path to labels.txt")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 3, 4], help="Thread counts")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=["xnnpack", "cpu"],
+        help="Backends: xnnpack, cpu or a path to an external delegate library",
+    )
+    parser.add_argument("--iterations", type=int, default=50, help="Timed predictions per config")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed warm-up predictions")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    config = get_config()
+    width, height = config.CAMERA_RESOLUTION
+    frame = np.random.default_rng(0).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+    print(f"Model: {args.model}")
+    print(f"{'requested':<12} {'applied':<14}{'threads':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'fps':>8}")
+
+    for backend in args.backends:
+        for threads in args.threads:
+            clf = TFLiteWasteClassifier(
+                model_path=args.model,
+                labels_path=args.labels,
+                input_size=config.TFLITE_INPUT_SIZE,
+                num_threads=threads,
+                delegate=backend,
+            )
+            for _ in range(args.warmup):
+                clf.predict(frame)
+
+            timings = np.empty(args.iterations, dtype=np.float64)
+            for i in range(args.iterations):
+                start = time.perf_counter()
+                clf.predict(frame)
+                timings[i] = time.perf_counter() - start
+
+            timings_ms = timings * 1000.0
+            mean_ms = float(timings_ms.mean())
+            print(
+                f"{backend:<12} {clf.backend:<14}{threads:>8}"
+                f"{mean_ms:>10.2f}"
+                f"{float(np.percentile(timings_ms, 50)):>10.2f}"
+                f"{float(np.percentile(timings_ms, 95)):>10.2f}"
+                f"{1000.0 / mean_ms:>8.1f}"
+            )
+            del clf
+
+
+if __name__ == "__main__":
+    main()
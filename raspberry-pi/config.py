@@ -9,8 +9,15 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 
+BASE_DIR = Path(__file__).resolve().parent
+
 # Load environment variables from raspberry-pi/.env if present.
-load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
+load_dotenv(dotenv_path=BASE_DIR / ".env")
+
+
+def data_path(value: str) -> str:
+    """Resolve a relative data path against raspberry-pi/ ('' stays '')"""
+    return str(BASE_DIR / value) if value else ''
 
 
 class Config:
@@ -20,6 +27,32 @@ class Config:
     MQTT_BROKER = os.getenv('MQTT_BROKER', 'broker.hivemq.com')
     MQTT_PORT = int(os.getenv('MQTT_PORT', 1883))
     MQTT_CLIENT_ID = os.getenv('MQTT_CLIENT_ID', 'smartbin_pi_001')
+    # Try a broker on the Pi itself before MQTT_BROKER
+    MQTT_LOCAL_FIRST = os.getenv('MQTT_LOCAL_FIRST', 'false').lower() == 'true'
+    # Further brokers tried in order if the preferred ones fail ("host:port,host")
+    MQTT_FALLBACK_BROKERS = os.getenv('MQTT_FALLBACK_BROKERS', '')
+    MQTT_RECONNECT_MIN_DELAY = float(os.getenv('MQTT_RECONNECT_MIN_DELAY', 1.0))  # seconds
+    MQTT_RECONNECT_MAX_DELAY = float(os.getenv('MQTT_RECONNECT_MAX_DELAY', 60.0))  # seconds
+    # Startup waits at most this long for the broker, then continues offline
+    MQTT_CONNECT_TIMEOUT = float(os.getenv('MQTT_CONNECT_TIMEOUT', 2.0))  # seconds
+    # Remote commands on smartbin/commands (acks on smartbin/commands/ack)
+    COMMANDS_ENABLED = os.getenv('COMMANDS_ENABLED', 'true').lower() == 'true'
+    COMMAND_QUEUE_SIZE = int(os.getenv('COMMAND_QUEUE_SIZE', 16))
+    # Store-and-forward queue for broker outages (MQTT_QUEUE_SIZE=0 disables)
+    MQTT_QUEUE_DIR = data_path(os.getenv('MQTT_QUEUE_DIR', 'data/mqtt_queue'))
+    MQTT_QUEUE_SIZE = int(os.getenv('MQTT_QUEUE_SIZE', 1000))
+    # Per-topic drop policy when full: drop_oldest | drop_newest | latest
+    MQTT_QUEUE_POLICIES = os.getenv(
+        'MQTT_QUEUE_POLICIES',
+        'smartbin/bin_status:latest,smartbin/system:drop_oldest,smartbin/detection:drop_oldest',
+    )
+    MQTT_REPLAY_RATE = float(os.getenv('MQTT_REPLAY_RATE', 20))  # messages per second
+    # Batched CBOR telemetry on "<topic>/batch" (empty = one JSON message per event)
+    MQTT_BATCH_TOPICS = [
+        topic.strip() for topic in os.getenv('MQTT_BATCH_TOPICS', '').split(',') if topic.strip()
+    ]
+    MQTT_BATCH_WINDOW = float(os.getenv('MQTT_BATCH_WINDOW', 2.0))  # seconds
+    MQTT_BATCH_MAX = int(os.getenv('MQTT_BATCH_MAX', 20))  # messages per batch
     
     # Detector selection
     # - yolo: Ultralytics YOLOv8 (heavier)
@@ -33,27 +66,110 @@ class Config:
     TFLITE_MODEL_PATH = os.getenv('TFLITE_MODEL_PATH', '../models/model.tflite')
     TFLITE_LABELS_PATH = os.getenv('TFLITE_LABELS_PATH', '../models/labels.txt')
     TFLITE_INPUT_SIZE = (224, 224)
+    # Interpreter threads (Pi 4 has 4 cores) and backend:
+    # xnnpack | cpu | <path to external delegate .so>
+    TFLITE_NUM_THREADS = int(os.getenv('TFLITE_NUM_THREADS', 4))
+    TFLITE_DELEGATE = os.getenv('TFLITE_DELEGATE', 'xnnpack')
 
     # Confidence threshold used for routing to reject
     CONFIDENCE_THRESHOLD = float(os.getenv('CONF_THRESHOLD', 0.65))
     
+    # Burst mode: classify up to BURST_FRAMES frames spread over BURST_WINDOW
+    # seconds and fuse them (mean | vote). Stops as soon as the fused
+    # confidence clears CONFIDENCE_THRESHOLD. BURST_FRAMES=1 disables it.
+    BURST_FRAMES = int(os.getenv('BURST_FRAMES', 3))
+    BURST_WINDOW = float(os.getenv('BURST_WINDOW', 0.6))  # seconds
+    BURST_FUSION = os.getenv('BURST_FUSION', 'mean').lower()
+    
     # Camera settings (tuned for Raspberry Pi 4 - lightweight)
     CAMERA_ID = int(os.getenv('CAMERA_ID', 0))
     # Lower resolution for smoother performance on Pi
     CAMERA_RESOLUTION = (320, 240)
     # Match inference resolution to TFLite input size
     INFERENCE_RESOLUTION = (224, 224)
+    # Grab frames on a background thread so capture never blocks the caller
+    CAMERA_THREADED = os.getenv('CAMERA_THREADED', 'true').lower() == 'true'
+    # Frame source: "camera", "video:<file>", "images:<dir or glob>" (e.g.
+    # "images:../dataset/*/images") or "synthetic[:count]"
+    FRAME_SOURCE = os.getenv('FRAME_SOURCE', 'camera')
+    # Pacing: realtime (native rate, late frames dropped) | fast | fixed (FRAME_FPS)
+    FRAME_PACING = os.getenv('FRAME_PACING', 'realtime').lower()
+    FRAME_FPS = float(os.getenv('FRAME_FPS', 0))  # 0 = source's native rate
+    FRAME_LOOP = os.getenv('FRAME_LOOP', 'false').lower() == 'true'
     
     # Detection settings
     DETECTION_FPS = int(os.getenv('DETECTION_FPS', 5))
+    
+    # Trigger mode:
+    # - manual: live preview, SPACE to capture
+    # - auto: headless, motion gating fires detection once an item settles
+    #   (frames are checked at DETECTION_FPS)
+    TRIGGER_MODE = os.getenv('TRIGGER_MODE', 'manual').lower()
+    # Also arm the motion trigger from the IR sensor edge
+    USE_IR_TRIGGER = os.getenv('USE_IR_TRIGGER', 'false').lower() == 'true'
+    MOTION_ENTER_FRACTION = float(os.getenv('MOTION_ENTER_FRACTION', 0.02))
+    MOTION_SETTLE_FRAMES = int(os.getenv('MOTION_SETTLE_FRAMES', 3))
     ENABLE_PREPROCESSING = os.getenv('ENABLE_PREPROCESSING', 'false').lower() == 'true'
     
+    # Perceptual-hash result cache for near-identical frames (size 0 disables);
+    # entries live for one scene: cleared when an item enters or is deposited
+    RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 32))
+    RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 5.0))  # seconds
+    RESULT_CACHE_MAX_DISTANCE = int(os.getenv('RESULT_CACHE_MAX_DISTANCE', 4))  # of 64 bits
+    
     # Bin settings
     BIN_DEPTH = float(os.getenv('BIN_DEPTH', 30.0))  # cm
     BIN_FULL_THRESHOLD = float(os.getenv('BIN_FULL_THRESHOLD', 80.0))  # percentage
+    # Full alert clears once the level drops this far below the threshold
+    BIN_FULL_HYSTERESIS = float(os.getenv('BIN_FULL_HYSTERESIS', 5.0))  # percentage
+    
+    # Ultrasonic ranging: edge (interrupt timestamps, no busy-wait) | poll
+    ULTRASONIC_MODE = os.getenv('ULTRASONIC_MODE', 'edge').lower()
+    ULTRASONIC_SAMPLE_TIMEOUT = float(os.getenv('ULTRASONIC_SAMPLE_TIMEOUT', 0.03))  # seconds
+    # Samples per bin per sweep (e.g. "3", or per bin "dry:3,wet:2,electronic:1")
+    ULTRASONIC_SAMPLES = os.getenv('ULTRASONIC_SAMPLES', '1')
+    # Sensors that hear each other's pings and must be staggered: "all"
+    # staggers every sensor (safe for same-frequency HC-SR04s in one
+    # enclosure), "none" fires them all at once (only if they are
+    # acoustically isolated), or explicit groups such as "dry+wet"
+    ULTRASONIC_INTERFERENCE_GROUPS = os.getenv('ULTRASONIC_INTERFERENCE_GROUPS') or 'all'
+    ULTRASONIC_SAMPLE_GAP = float(os.getenv('ULTRASONIC_SAMPLE_GAP', 0.05))  # seconds
+    ULTRASONIC_MAX_SWEEP_TIME = float(os.getenv('ULTRASONIC_MAX_SWEEP_TIME', 1.0))  # seconds
+    # Streaming fill filter: median window, EMA weight and outlier gate
+    ULTRASONIC_FILTER_WINDOW = int(os.getenv('ULTRASONIC_FILTER_WINDOW', 5))
+    ULTRASONIC_FILTER_ALPHA = float(os.getenv('ULTRASONIC_FILTER_ALPHA', 0.4))
+    ULTRASONIC_OUTLIER_CM = float(os.getenv('ULTRASONIC_OUTLIER_CM', 10.0))
+    
+    # Hardware backend: 'rpi' (RPi.GPIO), 'sim' (simulated pins/sensors) or
+    # 'auto' (RPi.GPIO when importable, otherwise the simulator). The simulator
+    # is opt-in; status messages carry "simulated": true while it is in use
+    HARDWARE_BACKEND = os.getenv('HARDWARE_BACKEND', 'rpi').lower()
+    # Simulator: initial fill per bin ("dry:20,wet:50"), background fill rate,
+    # fill added per door cycle, echo noise/dropout, MQ135 output voltage
+    SIM_BIN_FILL = os.getenv('SIM_BIN_FILL', '')
+    SIM_FILL_RATE = float(os.getenv('SIM_FILL_RATE', 0.0))  # percentage per hour
+    SIM_ITEM_FILL = float(os.getenv('SIM_ITEM_FILL', 2.0))  # percentage
+    SIM_ECHO_NOISE_CM = float(os.getenv('SIM_ECHO_NOISE_CM', 0.3))
+    SIM_ECHO_DROPOUT = float(os.getenv('SIM_ECHO_DROPOUT', 0.02))  # probability
+    SIM_MQ135_VOLTAGE = float(os.getenv('SIM_MQ135_VOLTAGE', 0.4))  # volts
     
     # Servo settings
     SERVO_SPEED = float(os.getenv('SERVO_SPEED', 1.0))
+    # Doors that share a mechanical constraint and must not move together,
+    # e.g. "dry+wet,electronic+unknown". All other doors move in parallel.
+    SERVO_EXCLUSIVE_GROUPS = [
+        [name.strip() for name in group.split('+') if name.strip()]
+        for group in os.getenv('SERVO_EXCLUSIVE_GROUPS', '').split(',')
+        if group.strip()
+    ]
+    # Cap on simultaneously moving servos (servo supply current budget)
+    SERVO_MAX_CONCURRENT = int(os.getenv('SERVO_MAX_CONCURRENT', 4))
+    # Seconds a door stays open for the item to drop
+    SERVO_DWELL = float(os.getenv('SERVO_DWELL', 2.0))
+    # Pending routing commands before detection blocks (backpressure)
+    ACTUATION_QUEUE_SIZE = int(os.getenv('ACTUATION_QUEUE_SIZE', 8))
+    # Manual mode: pause after a capture before the preview resumes
+    CAPTURE_COOLDOWN = float(os.getenv('CAPTURE_COOLDOWN', 2.0))  # seconds
     
     # System settings
     DEBUG_MODE = os.getenv('DEBUG_MODE', 'false').lower() == 'true'
@@ -61,8 +177,37 @@ class Config:
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'WARNING')
     
     # Monitoring intervals
-    BIN_STATUS_INTERVAL = int(os.getenv('BIN_STATUS_INTERVAL', 30))  # seconds
+    BIN_STATUS_INTERVAL = int(os.getenv('BIN_STATUS_INTERVAL', 30))  # seconds (base sampling)
+    # Adaptive sampling: read a bin soon after a deposit, back off while idle,
+    # and keep near-full bins on a short interval
+    BIN_SAMPLE_MAX_INTERVAL = float(os.getenv('BIN_SAMPLE_MAX_INTERVAL', 600))  # seconds
+    BIN_SAMPLE_BACKOFF = float(os.getenv('BIN_SAMPLE_BACKOFF', 2.0))
+    BIN_SAMPLE_SETTLE = float(os.getenv('BIN_SAMPLE_SETTLE', 3.0))  # seconds after the door closes
+    BIN_SAMPLE_NEAR_FULL_MARGIN = float(os.getenv('BIN_SAMPLE_NEAR_FULL_MARGIN', 10.0))  # percentage
+    BIN_SAMPLE_NEAR_FULL_INTERVAL = float(os.getenv('BIN_SAMPLE_NEAR_FULL_INTERVAL', 10.0))  # seconds
+    # Fill-rate forecast (Holt level/trend smoothing weights)
+    FORECAST_ALPHA = float(os.getenv('FORECAST_ALPHA', 0.5))
+    FORECAST_BETA = float(os.getenv('FORECAST_BETA', 0.2))
+    # Bin status is only published on a change larger than the deadband,
+    # a full-threshold crossing, or at the heartbeat interval
+    BIN_STATUS_DEADBAND = float(os.getenv('BIN_STATUS_DEADBAND', 5.0))  # percentage
+    BIN_STATUS_HEARTBEAT = float(os.getenv('BIN_STATUS_HEARTBEAT', 300))  # seconds
     SYSTEM_STATUS_INTERVAL = int(os.getenv('SYSTEM_STATUS_INTERVAL', 60))  # seconds
+    
+    # Latency metrics: Prometheus text endpoint (port 0 disables) and an
+    # optional p50/p95/p99 summary on smartbin/system every SYSTEM_STATUS_INTERVAL
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+    METRICS_PORT = int(os.getenv('METRICS_PORT', 9108))
+    METRICS_SUMMARY = os.getenv('METRICS_SUMMARY', 'false').lower() == 'true'
+    # Per-item trace spans, one JSON line per item ('' disables the dump);
+    # render with: python -m telemetry.waterfall data/traces.jsonl
+    TRACE_DUMP = data_path(os.getenv('TRACE_DUMP', 'data/traces.jsonl'))
+    TRACE_DUMP_MAX_BYTES = int(os.getenv('TRACE_DUMP_MAX_BYTES', 5_000_000))
+    # Session recording for offline replay ('' disables): classified frames,
+    # raw bin samples, triggers and decisions; replay with python -m session.replay
+    SESSION_RECORD_DIR = data_path(os.getenv('SESSION_RECORD_DIR', ''))
+    SESSION_FRAME_FORMAT = os.getenv('SESSION_FRAME_FORMAT', 'jpeg')  # jpeg or raw
+    SESSION_JPEG_QUALITY = int(os.getenv('SESSION_JPEG_QUALITY', 90))
 
 
 # Development/Testing config
@@ -80,6 +225,66 @@ class ProdConfig(Config):
     LOG_LEVEL = 'WARNING'
 
 
+def parse_sample_budget(value: str):
+    """Parse "3" or "dry:3,wet:2" into an int or a per-bin dict"""
+    value = value.strip()
+    if ':' not in value:
+        return int(value)
+    budget = {}
+    for item in value.split(','):
+        name, _, count = item.partition(':')
+        if name.strip():
+            budget[name.strip()] = int(count)
+    return budget
+
+
+def parse_interference_groups(value: str, bins) -> list:
+    """Parse "all", "none" or "dry+wet,electronic+unknown" into lists of bin names"""
+    if not isinstance(value, str):
+        # Already parsed (config snapshots of older session recordings)
+        return [list(group) for group in value]
+    value = value.strip().lower()
+    if value == 'all':
+        return [list(bins)]
+    if value == 'none':
+        return []
+    return [
+        [name.strip() for name in group.split('+') if name.strip()]
+        for group in value.split(',')
+        if group.strip()
+    ]
+
+
+def parse_topic_policies(value: str) -> dict:
+    """Parse "topic:policy,topic:policy" into a dict"""
+    policies = {}
+    for item in value.split(','):
+        topic, _, policy = item.strip().rpartition(':')
+        if topic:
+            policies[topic] = policy.strip()
+    return policies
+
+
+def parse_bin_values(value: str) -> dict:
+    """Parse "dry:20,wet:50" into {'dry': 20.0, 'wet': 50.0}"""
+    values = {}
+    for item in value.split(','):
+        name, _, number = item.partition(':')
+        if name.strip() and number.strip():
+            values[name.strip()] = float(number)
+    return values
+
+
+def parse_brokers(value: str, default_port: int = 1883) -> list:
+    """Parse "host:port,host" into [(host, port), ...]"""
+    brokers = []
+    for item in value.split(','):
+        host, _, port = item.strip().partition(':')
+        if host:
+            brokers.append((host, int(port) if port else default_port))
+    return brokers
+
+
 def get_config():
     """Get configuration based on environment"""
     env = os.getenv('ENVIRONMENT', 'production')
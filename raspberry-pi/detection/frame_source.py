@@ -0,0 +1,412 @@
+"""
+Frame Sources
+Camera, video file, image folder and synthetic frame providers with
+configurable pacing, so the pipeline can run without a camera
+"""
+
+import glob
+import logging
+from abc import ABC, abstractmethod
+import math
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PACING_MODES = ('realtime', 'fast', 'fixed')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FramePacer:
+    """
+    Controls the rate at which a source hands out frames.
+    
+    - realtime: frames become available at the source's native rate, like
+      a live camera; frames the consumer was too slow to take are skipped
+    - fast: no pacing, every frame as fast as the consumer reads them
+    - fixed: every frame, at most ``fps`` per second (no skipping)
+    """
+    
+    def __init__(self, mode: str = 'realtime', fps: Optional[float] = None):
+        """
+        Args:
+            mode: 'realtime', 'fast' or 'fixed'
+            fps: Rate for 'fixed' (overrides the native rate for 'realtime')
+        """
+        if mode not in PACING_MODES:
+            raise ValueError(f"Unknown pacing mode '{mode}', expected one of {PACING_MODES}")
+        if mode == 'fixed' and not fps:
+            raise ValueError("Fixed pacing needs an fps")
+        self.mode = mode
+        self.fps = fps
+        self._start = None
+        self._index = 0
+        self._next = 0.0
+        self.skipped = 0
+    
+    def reset(self):
+        """Restart the timeline (e.g. when a source loops)"""
+        self._start = None
+        self._index = 0
+    
+    def wait(self, native_fps: float) -> int:
+        """
+        Block until the next frame is due
+        
+        Args:
+            native_fps: Rate the source was recorded/generated at
+        
+        Returns:
+            Number of frames to skip before the one to return
+        """
+        now = time.monotonic()
+        
+        if self.mode == 'fast':
+            return 0
+        
+        if self.mode == 'fixed':
+            delay = self._next - now
+            if delay > 0:
+                time.sleep(delay)
+                now = self._next
+            self._next = now + 1.0 / self.fps
+            return 0
+        
+        fps = self.fps or native_fps
+        if self._start is None:
+            self._start = now
+            self._index = 1
+            return 0
+        
+        # Frame index the "camera" has reached by now
+        due = int((now - self._start) * fps)
+        if due < self._index:
+            time.sleep((self._start + self._index / fps) - now)
+            due = self._index
+        skip = due - self._index
+        self._index = due + 1
+        self.skipped += skip
+        return skip
+
+
+class FrameSource(ABC):
+    """
+    Base class for frame providers.
+    
+    Implements the subset of the cv2.VideoCapture API the pipeline uses
+    (isOpened, read, set, release), so sources are interchangeable with a
+    capture device. ``exhausted`` turns True once a finite source has
+    delivered its last frame. Subclasses provide ``_next_frame``.
+    """
+    
+    name = 'source'
+    
+    def __init__(self, pacer: Optional[FramePacer] = None, loop: bool = False):
+        self.pacer = pacer or FramePacer('fast')
+        self.loop = loop
+        self.exhausted = False
+        self.frames_read = 0
+    
+    @property
+    def native_fps(self) -> float:
+        return 30.0
+    
+    def isOpened(self) -> bool:
+        return not self.exhausted
+    
+    def set(self, prop_id, value) -> bool:
+        return False
+    
+    @abstractmethod
+    def _next_frame(self) -> Optional[np.ndarray]:
+        """Produce the next frame, or None at the end of the source"""
+    
+    def _skip(self, count: int):
+        """Discard frames the pacer decided the consumer missed"""
+        for _ in range(count):
+            if self._next_frame() is None:
+                break
+    
+    def _rewind(self) -> bool:
+        """Restart a finite source; False if it cannot"""
+        return False
+    
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.exhausted:
+            return False, None
+        
+        skip = self.pacer.wait(self.native_fps)
+        if skip:
+            self._skip(skip)
+        
+        frame = self._next_frame()
+        if frame is None and self.loop and self._rewind():
+            self.pacer.reset()
+            frame = self._next_frame()
+        if frame is None:
+            self.exhausted = True
+            logger.info(f"Frame source {self.name} exhausted after {self.frames_read} frames")
+            return False, None
+        
+        self.frames_read += 1
+        return True, frame
+    
+    def release(self):
+        self.exhausted = True
+
+
+class CameraSource(FrameSource):
+    """Live capture device (cv2.VideoCapture)"""
+    
+    name = 'camera'
+    
+    def __init__(self, camera_id: int = 0, resolution: Tuple[int, int] = (640, 480),
+                 pacer: Optional[FramePacer] = None):
+        """
+        Args:
+            camera_id: Camera device ID
+            resolution: Requested resolution (width, height)
+            pacer: Only 'fixed' has an effect; a camera is already real-time
+        """
+        super().__init__(pacer)
+        self.cap = cv2.VideoCapture(camera_id)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+    
+    def isOpened(self) -> bool:
+        return self.cap is not None and self.cap.isOpened()
+    
+    def set(self, prop_id, value) -> bool:
+        return self.cap.set(prop_id, value)
+    
+    def _next_frame(self) -> Optional[np.ndarray]:
+        ret, frame = self.cap.read()
+        return frame if ret else None
+    
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        # A failed camera read is transient, never the end of the source
+        if self.pacer.mode == 'fixed':
+            self.pacer.wait(self.native_fps)
+        frame = self._next_frame()
+        if frame is None:
+            return False, None
+        self.frames_read += 1
+        return True, frame
+    
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class VideoFileSource(FrameSource):
+    """Frames from a recorded video file"""
+    
+    name = 'video'
+    
+    def __init__(self, path: str, pacer: Optional[FramePacer] = None, loop: bool = False):
+        """
+        Args:
+            path: Video file readable by OpenCV
+            pacer: Frame pacing ('realtime' plays at the file's frame rate)
+            loop: Restart at the end instead of finishing
+        """
+        super().__init__(pacer, loop)
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Cannot open video file {path}")
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self._fps = fps if fps and not math.isnan(fps) and fps > 0 else 30.0
+        logger.info(f"Video source {path} ({self._fps:.1f} fps, pacing {self.pacer.mode})")
+    
+    @property
+    def native_fps(self) -> float:
+        return self._fps
+    
+    def _next_frame(self) -> Optional[np.ndarray]:
+        ret, frame = self.cap.read()
+        return frame if ret else None
+    
+    def _skip(self, count: int):
+        # grab() skips decoding into a numpy array
+        for _ in range(count):
+            if not self.cap.grab():
+                break
+    
+    def _rewind(self) -> bool:
+        return self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    
+    def release(self):
+        super().release()
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class ImageFolderSource(FrameSource):
+    """Frames from image files, e.g. the dataset/*/images layout"""
+    
+    name = 'images'
+    
+    def __init__(self, pattern: str, pacer: Optional[FramePacer] = None, loop: bool = False,
+                 resolution: Optional[Tuple[int, int]] = None, fps: float = 5.0):
+        """
+        Args:
+            pattern: Directory, glob of directories or glob of files
+                     (e.g. "dataset/*/images")
+            pacer: Frame pacing
+            loop: Restart at the end instead of finishing
+            resolution: Resize frames to (width, height) like a camera would deliver
+            fps: Native rate for 'realtime' pacing
+        """
+        super().__init__(pacer, loop)
+        self.pattern = pattern
+        self.resolution = tuple(resolution) if resolution else None
+        self._fps = fps
+        self.paths = self.find_images(pattern)
+        if not self.paths:
+            raise RuntimeError(f"No images found for {pattern}")
+        self._position = 0
+        logger.info(f"Image source {pattern}: {len(self.paths)} images (pacing {self.pacer.mode})")
+    
+    @staticmethod
+    def find_images(pattern: str) -> List[str]:
+        """Expand a directory/glob into a sorted list of image files"""
+        paths = []
+        for match in sorted(glob.glob(pattern)) or [pattern]:
+            if os.path.isdir(match):
+                paths.extend(
+                    os.path.join(match, name)
+                    for name in sorted(os.listdir(match))
+                    if name.lower().endswith(IMAGE_EXTENSIONS)
+                )
+            elif match.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(match):
+                paths.append(match)
+        return paths
+    
+    @property
+    def native_fps(self) -> float:
+        return self._fps
+    
+    def _next_frame(self) -> Optional[np.ndarray]:
+        while self._position < len(self.paths):
+            path = self.paths[self._position]
+            self._position += 1
+            frame = cv2.imread(path)
+            if frame is None:
+                logger.warning(f"Unreadable image {path}")
+                continue
+            if self.resolution and (frame.shape[1], frame.shape[0]) != self.resolution:
+                frame = cv2.resize(frame, self.resolution, interpolation=cv2.INTER_AREA)
+            return frame
+        return None
+    
+    def _skip(self, count: int):
+        self._position = min(len(self.paths), self._position + count)
+    
+    def _rewind(self) -> bool:
+        self._position = 0
+        return True
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generated frames: a noisy background with a coloured object drifting
+    through it. A fixed cycle of frames is rendered up front so generation
+    cost does not show up in throughput measurements.
+    """
+    
+    name = 'synthetic'
+    
+    def __init__(self, resolution: Tuple[int, int] = (320, 240), pacer: Optional[FramePacer] = None,
+                 count: Optional[int] = None, fps: float = 30.0, cycle: int = 64, seed: int = 0):
+        """
+        Args:
+            resolution: Frame size (width, height)
+            pacer: Frame pacing
+            count: Frames to produce before finishing (None = endless)
+            fps: Native rate for 'realtime' pacing
+            cycle: Distinct frames rendered and repeated
+            seed: Random seed, for reproducible runs
+        """
+        super().__init__(pacer)
+        self.count = count
+        self._fps = fps
+        self._position = 0
+        self._frames = self._render(resolution, max(1, cycle), seed)
+    
+    @staticmethod
+    def _render(resolution: Sequence[int], cycle: int, seed: int) -> List[np.ndarray]:
+        width, height = resolution
+        rng = np.random.default_rng(seed)
+        background = rng.integers(90, 140, size=(height, width, 3), dtype=np.uint8)
+        color = tuple(int(c) for c in rng.integers(0, 255, size=3))
+        radius = max(4, min(width, height) // 6)
+        
+        frames = []
+        for i in range(cycle):
+            frame = background.copy()
+            # Object moves in, rests in the middle for a while, moves out
+            phase = i / cycle
+            if phase < 0.3:
+                x = int(width * (1.1 - 0.6 * phase / 0.3))
+            elif phase <= 0.7:
+                x = width // 2
+            else:
+                x = int(width * (0.5 - 0.6 * (phase - 0.7) / 0.3))
+            cv2.circle(frame, (x, height // 2), radius, color, -1)
+            noise = rng.integers(0, 6, size=frame.shape, dtype=np.uint8)
+            frames.append(cv2.add(frame, noise))
+        return frames
+    
+    @property
+    def native_fps(self) -> float:
+        return self._fps
+    
+    def _next_frame(self) -> Optional[np.ndarray]:
+        if self.count is not None and self._position >= self.count:
+            return None
+        frame = self._frames[self._position % len(self._frames)]
+        self._position += 1
+        return frame
+    
+    def _skip(self, count: int):
+        self._position += count
+
+
+def create_frame_source(spec: str, resolution: Tuple[int, int] = (320, 240),
+                        pacing: str = 'realtime', fps: Optional[float] = None,
+                        loop: bool = False) -> FrameSource:
+    """
+    Build a frame source from a spec string
+    
+    Args:
+        spec: "camera[:id]", "video:<path>", "images:<dir or glob>" or
+              "synthetic[:count]"
+        resolution: Camera/output frame size (width, height)
+        pacing: 'realtime', 'fast' or 'fixed'
+        fps: Frame rate for 'fixed' pacing, or native rate override
+        loop: Restart finite sources at their end
+    
+    Returns:
+        FrameSource
+    """
+    kind, _, arg = spec.partition(':')
+    kind = kind.strip().lower()
+    arg = arg.strip()
+    pacer = FramePacer(pacing, fps)
+    
+    if kind == 'camera':
+        return CameraSource(int(arg or 0), resolution, pacer)
+    if kind == 'video':
+        return VideoFileSource(arg, pacer, loop)
+    if kind == 'images':
+        return ImageFolderSource(arg, pacer, loop, resolution)
+    if kind == 'synthetic':
+        return SyntheticSource(resolution, pacer, count=int(arg) if arg else None)
+    raise ValueError(f"Unknown frame source '{spec}'")
@@ -14,7 +14,7 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Sequence
 
 import cv2
 import numpy as np
@@ -35,29 +35,48 @@ class HeuristicWasteClassifier:
     - Intended to ALWAYS run on Raspberry Pi without heavy dependencies.
     """
 
+    # Frames are downscaled to this size (width, height) before analysis
+    ANALYSIS_SIZE = (160, 120)
+
     def __init__(self, conf_threshold: float = 0.4):
         self.conf_threshold = conf_threshold
         logger.info("Initialized HeuristicWasteClassifier (no ML, lightweight)")
 
-    def _analyze_frame(self, frame_bgr) -> HeuristicPrediction:
-        # Resize to small size for speed
-        resized = cv2.resize(frame_bgr, (160, 120))
-
-        # Convert to HSV and grayscale
-        hsv = cv2.cvtColor(resized, cv2.COLOR_BGR2HSV)
-        gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-
-        h, s, v = cv2.split(hsv)
-
-        # Basic statistics
-        mean_s = float(np.mean(s))         # colorfulness
-        mean_v = float(np.mean(v))         # brightness
-        std_v = float(np.std(v))           # contrast
-
-        # Edge density (electronics often have more sharp edges / structure)
-        edges = cv2.Canny(gray, 80, 160)
-        edge_density = float(np.mean(edges > 0))
+    def _compute_stats(self, frames_bgr: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Per-frame statistics, vectorized over a stacked batch.
 
+        Returns an (N, 4) array: mean_s, mean_v, std_v, edge_density.
+        """
+        n = len(frames_bgr)
+
+        # Resize every frame into one stacked (N, H, W, 3) array
+        stack = np.empty((n, self.ANALYSIS_SIZE[1], self.ANALYSIS_SIZE[0], 3), dtype=np.uint8)
+        for i, frame in enumerate(frames_bgr):
+            cv2.resize(frame, self.ANALYSIS_SIZE, dst=stack[i])
+
+        # Color conversions run once over the whole stack viewed as a tall image
+        tall = stack.reshape(-1, self.ANALYSIS_SIZE[0], 3)
+        hsv = cv2.cvtColor(tall, cv2.COLOR_BGR2HSV).reshape(n, -1, 3)
+        gray = cv2.cvtColor(tall, cv2.COLOR_BGR2GRAY).reshape(stack.shape[:3])
+
+        s = hsv[:, :, 1]
+        v = hsv[:, :, 2]
+
+        # Edge density (electronics often have more sharp edges / structure).
+        # Canny runs per frame so no edges are found across frame seams.
+        edges = np.empty_like(gray)
+        for i in range(n):
+            cv2.Canny(gray[i], 80, 160, edges=edges[i])
+
+        stats = np.empty((n, 4), dtype=np.float64)
+        stats[:, 0] = s.mean(axis=1)                              # colorfulness
+        stats[:, 1] = v.mean(axis=1)                              # brightness
+        stats[:, 2] = v.std(axis=1)                               # contrast
+        stats[:, 3] = (edges > 0).reshape(n, -1).mean(axis=1)     # edge density
+        return stats
+
+    def _classify(self, mean_s: float, mean_v: float, std_v: float, edge_density: float) -> HeuristicPrediction:
         logger.debug(
             "Heuristic stats - mean_s=%.2f mean_v=%.2f std_v=%.2f edge_density=%.3f",
             mean_s,
@@ -78,6 +97,15 @@ class HeuristicWasteClassifier:
         # 3) Default: dry
         return HeuristicPrediction(label="dry", confidence=0.6)
 
+    def _analyze_batch(self, frames_bgr: Sequence[np.ndarray]) -> List[HeuristicPrediction]:
+        if len(frames_bgr) == 0:
+            return []
+        stats = self._compute_stats(frames_bgr)
+        return [self._classify(*(float(x) for x in row)) for row in stats]
+
+    def _analyze_frame(self, frame_bgr) -> HeuristicPrediction:
+        return self._analyze_batch([frame_bgr])[0]
+
     # ------- Public API compatible with existing detectors ------- #
 
     def detect(self, frame_bgr) -> List[Dict]:
@@ -94,6 +122,16 @@ class HeuristicWasteClassifier:
         logger.info("Heuristic detection: %s", detection)
         return [detection]
 
+    def detect_batch(self, frames_bgr: Sequence[np.ndarray]) -> List[List[Dict]]:
+        """
+        Batched detect(): one list of detections per input frame.
+        Statistics are computed in one pass over the stacked frames.
+        """
+        return [
+            [{"class": pred.label, "confidence": round(pred.confidence, 2), "bbox": None}]
+            for pred in self._analyze_batch(list(frames_bgr))
+        ]
+
     def get_detection_summary(self, detections: List[Dict]) -> Dict:
         """
         Summary payload for MQTT: {count, objects, destination}.
@@ -5,68 +5,205 @@ Handles frame capture, preprocessing, and detection
 
 import cv2
 import numpy as np
+from dataclasses import dataclass
+from threading import Condition, Event, Lock, Thread
 from typing import Optional, Tuple
 import logging
+import time
+
+from detection.frame_source import CameraSource, FrameSource
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class CapturedFrame:
+    """A camera frame together with its capture metadata"""
+    frame: np.ndarray
+    timestamp: float  # time.monotonic() at capture
+    sequence: int     # Monotonically increasing frame counter
+
+    @property
+    def age(self) -> float:
+        """Seconds elapsed since the frame was captured"""
+        return time.monotonic() - self.timestamp
+
+
 class InferencePipeline:
     """Manages camera capture and inference pipeline"""
     
-    def __init__(self, camera_id: int = 0, resolution: Tuple[int, int] = (640, 480)):
+    def __init__(self, camera_id: int = 0, resolution: Tuple[int, int] = (640, 480),
+                 threaded: bool = False, source: Optional[FrameSource] = None):
         """
         Initialize camera and inference settings
         
         Args:
             camera_id: Camera device ID
             resolution: Target resolution (width, height)
+            threaded: Grab frames on a background thread and keep only the
+                      newest one, so callers never wait on the camera
+            source: Frame source to read instead of the camera (video file,
+                    image folder, synthetic; see detection.frame_source)
         """
         self.camera_id = camera_id
         self.resolution = resolution
+        self.threaded = threaded
+        self.source = source
         self.cap = None
+        
+        # Single-slot buffer shared with the grabber thread
+        self._latest: Optional[CapturedFrame] = None
+        self._sequence = 0
+        self._frame_ready = Condition()
+        self._stop_event = Event()
+        self._grab_thread = None
+        # Direct reads may come from the preview and a classification at once
+        self._read_lock = Lock()
+        
         self._init_camera()
+        
+        if self.threaded:
+            self._start_grabber()
     
     def _init_camera(self):
         """Initialize camera capture"""
         try:
-            self.cap = cv2.VideoCapture(self.camera_id)
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+            self.cap = self.source or CameraSource(self.camera_id, self.resolution)
+            
+            if self.threaded:
+                # The grabber drains the driver queue itself; a deep queue
+                # only adds latency.
+                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             
             if not self.cap.isOpened():
-                raise RuntimeError("Failed to open camera")
+                raise RuntimeError(f"Failed to open {self.cap.name}")
             
-            logger.info(f"Camera initialized: {self.resolution[0]}x{self.resolution[1]}")
+            if self.source is None:
+                logger.info(f"Camera initialized: {self.resolution[0]}x{self.resolution[1]}")
+            else:
+                logger.info(f"Frame source initialized: {self.source.name}")
         except Exception as e:
             logger.error(f"Camera initialization failed: {e}")
             raise
     
-    def capture_frame(self) -> Optional[np.ndarray]:
+    def _start_grabber(self):
+        """Start the background frame grabber thread"""
+        self._stop_event.clear()
+        self._grab_thread = Thread(target=self._grab_loop, name="frame-grabber", daemon=True)
+        self._grab_thread.start()
+        logger.info("Threaded frame grabber started")
+    
+    def _grab_loop(self):
+        """Continuously read frames, keeping only the newest one"""
+        failures = 0
+        
+        while not self._stop_event.is_set():
+            if self.cap is None or not self.cap.isOpened():
+                logger.error("Camera not available, stopping frame grabber")
+                break
+            
+            ret, frame = self.cap.read()
+            
+            if not ret and self.cap.exhausted:
+                logger.info("Frame source finished, stopping frame grabber")
+                break
+            
+            if not ret:
+                failures += 1
+                if failures == 1 or failures % 100 == 0:
+                    logger.warning(f"Failed to capture frame ({failures} consecutive)")
+                time.sleep(0.01)
+                continue
+            
+            failures = 0
+            timestamp = time.monotonic()
+            
+            with self._frame_ready:
+                self._sequence += 1
+                self._latest = CapturedFrame(frame, timestamp, self._sequence)
+                self._frame_ready.notify_all()
+        
+        # Wake up any reader still waiting on a frame
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+    
+    def _read_direct(self) -> Optional[CapturedFrame]:
+        """Blocking read on the caller's thread"""
+        with self._read_lock:
+            if self.cap is None or not self.cap.isOpened():
+                logger.error("Camera not available")
+                return None
+            
+            ret, frame = self.cap.read()
+            
+            if not ret:
+                logger.warning("Failed to capture frame")
+                return None
+            
+            self._sequence += 1
+            return CapturedFrame(frame, time.monotonic(), self._sequence)
+    
+    def read_latest(self, after_sequence: int = 0,
+                    timeout: float = 1.0) -> Optional[CapturedFrame]:
         """
-        Capture a single frame from camera
+        Get the newest frame with its capture timestamp and sequence number
         
+        In threaded mode this returns immediately when a frame newer than
+        ``after_sequence`` is already buffered, otherwise it waits up to
+        ``timeout`` seconds for the grabber to deliver one. Without the
+        grabber it falls back to a blocking camera read.
+        
+        Args:
+            after_sequence: Only return frames with a higher sequence number
+            timeout: Maximum wait time in seconds
+            
         Returns:
-            Frame as numpy array or None if capture failed
+            CapturedFrame or None if no frame became available
         """
-        if self.cap is None or not self.cap.isOpened():
-            logger.error("Camera not available")
-            return None
+        if not self.threaded:
+            return self._read_direct()
         
-        ret, frame = self.cap.read()
+        with self._frame_ready:
+            ready = self._frame_ready.wait_for(
+                lambda: (self._latest is not None and self._latest.sequence > after_sequence)
+                or self._stop_event.is_set()
+                or not self._grab_thread.is_alive(),
+                timeout=timeout,
+            )
+            latest = self._latest
         
-        if not ret:
-            logger.warning("Failed to capture frame")
+        if not ready or latest is None or latest.sequence <= after_sequence:
+            logger.warning("No new frame available from grabber")
             return None
         
-        return frame
+        return latest
+    
+    def capture_frame(self) -> Optional[np.ndarray]:
+        """
+        Capture a single frame from camera
+        
+        Returns:
+            Frame as numpy array or None if capture failed
+        """
+        captured = self.read_latest()
+        return captured.frame if captured is not None else None
     
     def release(self):
         """Release camera resources"""
+        self._stop_event.set()
+        
+        if self._grab_thread is not None:
+            self._grab_thread.join(timeout=2.0)
+            self._grab_thread = None
+        
         if self.cap is not None:
             self.cap.release()
+            self.cap = None
             logger.info("Camera released")
     
     def __del__(self):
         """Cleanup on deletion"""
-        self.release()
+        try:
+            self.release()
+        except Exception:
+            pass
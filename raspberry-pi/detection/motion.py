@@ -0,0 +1,162 @@
+"""
+Motion / presence gating for automatic capture.
+
+Cheap frame differencing on a downscaled grayscale image against a running
+background model decides when an item has entered the chute and, more
+importantly, when it has come to rest. Only then is the (expensive)
+classifier run, so the system idles at near-zero CPU between items.
+
+States:
+- idle:     scene matches the background; background keeps adapting slowly
+- active:   something entered (visual change or IR edge); waiting to settle
+- cooldown: classifier fired; waiting for the scene to return to background
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MotionTrigger:
+    """
+    Decides when to run detection based on scene changes.
+    Feed it frames with update(); it returns True once per settled item.
+    """
+
+    IDLE = "idle"
+    ACTIVE = "active"
+    COOLDOWN = "cooldown"
+
+    def __init__(
+        self,
+        size: Tuple[int, int] = (80, 60),
+        pixel_threshold: int = 25,
+        enter_fraction: float = 0.02,
+        settle_fraction: float = 0.005,
+        settle_frames: int = 3,
+        background_alpha: float = 0.05,
+        cooldown_timeout: float = 10.0,
+        on_enter: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            size: Analysis resolution (width, height)
+            pixel_threshold: Gray-level difference that counts as a changed pixel
+            enter_fraction: Changed-pixel fraction vs background that means "item present"
+            settle_fraction: Frame-to-frame changed fraction below which the scene is still
+            settle_frames: Consecutive still frames required before firing
+            background_alpha: Running-average learning rate while idle
+            cooldown_timeout: Seconds after which a lingering item is absorbed into the background
+            on_enter: Called when something enters the scene (idle -> active)
+        """
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.enter_fraction = enter_fraction
+        self.settle_fraction = settle_fraction
+        self.settle_frames = max(1, settle_frames)
+        self.background_alpha = background_alpha
+        self.cooldown_timeout = cooldown_timeout
+        self.on_enter = on_enter
+
+        self.state = self.IDLE
+        self._background: Optional[np.ndarray] = None  # float32 running average
+        self._previous: Optional[np.ndarray] = None
+        self._still_count = 0
+        self._ir_armed = False
+        self._cooldown_since = 0.0
+
+        # Scratch buffers reused on every update
+        self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self._gray = np.empty((size[1], size[0]), dtype=np.uint8)
+        self._diff = np.empty_like(self._gray)
+
+        self.last_background_change = 0.0
+        self.last_frame_change = 0.0
+
+    def notify_ir(self, *_):
+        """IR sensor edge: treat as an item entering even before it is visible."""
+        self._ir_armed = True
+
+    def reset_background(self):
+        """Forget the background; it is re-learned from the next frame."""
+        self._background = None
+        self._previous = None
+        self.state = self.IDLE
+
+    def _changed_fraction(self, a: np.ndarray, b: np.ndarray) -> float:
+        cv2.absdiff(a, b, dst=self._diff)
+        cv2.threshold(self._diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self._diff)
+        return cv2.countNonZero(self._diff) / self._diff.size
+
+    def update(self, frame_bgr: np.ndarray) -> bool:
+        """
+        Process one frame.
+
+        Returns:
+            True exactly once per item, when it has settled in view
+        """
+        cv2.resize(frame_bgr, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        gray = cv2.GaussianBlur(self._gray, (5, 5), 0)
+
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            self._previous = gray
+            return False
+
+        background = cv2.convertScaleAbs(self._background)
+        self.last_background_change = self._changed_fraction(gray, background)
+        self.last_frame_change = self._changed_fraction(gray, self._previous)
+        self._previous = gray
+
+        present = self.last_background_change >= self.enter_fraction
+
+        if self.state == self.IDLE:
+            if present or self._ir_armed:
+                logger.info(
+                    "Item entering (change=%.3f, ir=%s)", self.last_background_change, self._ir_armed
+                )
+                self.state = self.ACTIVE
+                self._still_count = 0
+                if self.on_enter is not None:
+                    self.on_enter()
+            else:
+                cv2.accumulateWeighted(gray, self._background, self.background_alpha)
+            return False
+
+        if self.state == self.ACTIVE:
+            if self.last_frame_change <= self.settle_fraction:
+                self._still_count += 1
+            else:
+                self._still_count = 0
+
+            if self._still_count < self.settle_frames:
+                return False
+
+            if present or self._ir_armed:
+                logger.info("Scene settled - triggering detection")
+                self._ir_armed = False
+                self.state = self.COOLDOWN
+                self._cooldown_since = time.monotonic()
+                return True
+
+            # Settled back to the background: it was just passing motion
+            logger.debug("Motion settled without an item, back to idle")
+            self.state = self.IDLE
+            return False
+
+        # COOLDOWN: wait for the item to leave the view
+        if not present:
+            self.state = self.IDLE
+        elif time.monotonic() - self._cooldown_since > self.cooldown_timeout:
+            logger.info("Item still in view after cooldown - absorbing into background")
+            self._background = gray.astype(np.float32)
+            self.state = self.IDLE
+        return False
@@ -0,0 +1,155 @@
+"""
+Perceptual-hash result cache.
+
+When an item sits in front of the camera, repeated triggers classify what
+is practically the same image. CachedDetector wraps any detector and keys
+its results by a 64-bit difference hash (dHash) of a tiny grayscale
+thumbnail; frames within a small Hamming distance of a recent entry reuse
+its detections instead of re-running the model.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def dhash(frame_bgr: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Difference hash: compares horizontally adjacent pixels of a
+    (hash_size+1) x hash_size grayscale thumbnail.
+    """
+    small = cv2.resize(frame_bgr, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ResultCache:
+    """
+    Bounded LRU of hash -> detections with a TTL and Hamming tolerance.
+    """
+
+    def __init__(self, max_entries: int = 32, max_distance: int = 4, ttl: float = 5.0):
+        """
+        Args:
+            max_entries: Maximum cached frames (oldest evicted first)
+            max_distance: Maximum Hamming distance (of 64 bits) counted as a hit
+            ttl: Seconds a cached result stays valid
+        """
+        self.max_entries = max(1, max_entries)
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def _purge_expired(self, now: float) -> None:
+        stale = [key for key, (stamp, _) in self._entries.items() if now - stamp > self.ttl]
+        for key in stale:
+            del self._entries[key]
+        self.expired += len(stale)
+
+    def get(self, key: int) -> Optional[List[Dict]]:
+        with self._lock:
+            self._purge_expired(time.monotonic())
+
+            match = key if key in self._entries else None
+            if match is None:
+                # Linear scan is fine: the cache holds a few dozen entries
+                best = self.max_distance + 1
+                for candidate in self._entries:
+                    distance = hamming(key, candidate)
+                    if distance < best:
+                        match, best = candidate, distance
+
+            if match is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(match)
+            self.hits += 1
+            return [dict(d) for d in self._entries[match][1]]
+
+    def put(self, key: int, detections: List[Dict]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), [dict(d) for d in detections])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Counters for tuning max_distance / ttl / max_entries."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+class CachedDetector:
+    """
+    Drop-in wrapper that puts a ResultCache in front of detector.detect().
+    Everything else (get_detection_summary, conf_threshold, ...) is
+    delegated to the wrapped detector.
+    """
+
+    def __init__(self, detector, cache: ResultCache):
+        self.detector = detector
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.detector, name)
+
+    def detect(self, frame_bgr: np.ndarray) -> List[Dict]:
+        key = dhash(frame_bgr)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.debug("Result cache hit (%016x)", key)
+            return cached
+
+        detections = self.detector.detect(frame_bgr)
+        self.cache.put(key, detections)
+        return detections
+
+    def detect_batch(self, frames_bgr: Sequence[np.ndarray]) -> List[List[Dict]]:
+        frames = list(frames_bgr)
+        keys = [dhash(frame) for frame in frames]
+        results: List[Optional[List[Dict]]] = [self.cache.get(key) for key in keys]
+
+        # Only the misses go through the model, still as one batch
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            fresh = self.detector.detect_batch([frames[i] for i in missing])
+            for i, detections in zip(missing, fresh):
+                self.cache.put(keys[i], detections)
+                results[i] = detections
+
+        return results  # type: ignore[return-value]
@@ -9,18 +9,27 @@ Outputs a single label with confidence.
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
 
 import cv2
 import numpy as np
 
 try:
     # Recommended on Raspberry Pi
-    from tflite_runtime.interpreter import Interpreter
+    from tflite_runtime.interpreter import Interpreter, load_delegate
 except Exception:  # pragma: no cover
     # Fallback for environments that use full TF
-    from tensorflow.lite.python.interpreter import Interpreter  # type: ignore
+    from tensorflow.lite.python.interpreter import Interpreter, load_delegate  # type: ignore
+
+try:
+    from tflite_runtime.interpreter import OpResolverType
+except Exception:  # pragma: no cover
+    try:
+        from tensorflow.lite.python.interpreter import OpResolverType  # type: ignore
+    except Exception:
+        # Very old runtimes: cannot opt out of the default XNNPACK delegate
+        OpResolverType = None
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +38,10 @@ logger = logging.getLogger(__name__)
 class Prediction:
     label: str
     confidence: float
+    # Full calibrated probability vector, aligned with the classifier labels
+    probabilities: Dict[str, float] = field(default_factory=dict)
+    # Best k (label, probability) pairs, highest first
+    top_k: List[Tuple[str, float]] = field(default_factory=list)
 
 
 class TFLiteWasteClassifier:
@@ -42,28 +55,24 @@ class TFLiteWasteClassifier:
         labels_path: str,
         input_size: Tuple[int, int] = (224, 224),
         conf_threshold: float = 0.65,
+        zero_copy: bool = True,
+        num_threads: int = 4,
+        delegate: str = "xnnpack",
+        top_k: int = 3,
     ):
         self.model_path = model_path
         self.labels_path = labels_path
         self.input_size = input_size
         self.conf_threshold = conf_threshold
+        self.num_threads = max(1, int(num_threads))
+        self.delegate = (delegate or "cpu").strip()
+        self.top_k = max(1, int(top_k))
 
         self.labels = self._load_labels(labels_path)
 
         logger.info("Loading TFLite model from %s", model_path)
-        try:
-            self.interpreter = Interpreter(model_path=model_path)
-        except ValueError as exc:
-            # Common on Raspberry Pi when model was exported with newer TF/TFLite
-            # than installed tflite-runtime supports.
-            raise ValueError(
-                f"Failed to load TFLite model '{model_path}'. "
-                "This usually means model/runtime version mismatch. "
-                "For Raspberry Pi tflite-runtime 2.14.0, re-export the model with "
-                "TensorFlow 2.14 using models/train_export_tflite_tf214.py, or set "
-                "DETECTOR_TYPE=heuristic in raspberry-pi/.env."
-            ) from exc
-        self.interpreter.allocate_tensors()
+        self.interpreter, self.backend = self._create_interpreter()
+        logger.info("TFLite backend: %s, threads=%d", self.backend, self.num_threads)
 
         self.input_details = self.interpreter.get_input_details()
         self.output_details = self.interpreter.get_output_details()
@@ -73,8 +82,101 @@ class TFLiteWasteClassifier:
         self.output_index = self.output_details[0]["index"]
 
         self.input_dtype = self.input_details[0]["dtype"]
+
+        # Batched inference needs a dynamic batch dimension (-1 in the signature).
+        signature = self.input_details[0].get("shape_signature", self.input_details[0]["shape"])
+        self.supports_batch = len(signature) == 4 and int(signature[0]) == -1
+        self._batch_size = int(self.input_details[0]["shape"][0])
+
+        # Zero-copy fast path: resize/convert into preallocated scratch buffers
+        # and normalize straight into the interpreter's own input tensor.
+        self.zero_copy = zero_copy and self._init_zero_copy_buffers()
+
         logger.info("TFLite model loaded. input dtype=%s labels=%d", self.input_dtype, len(self.labels))
 
+    def _backend_candidates(self) -> List[Tuple[str, Dict]]:
+        """
+        Interpreter configurations to try, most preferred first.
+
+        delegate:
+        - 'xnnpack': built-in XNNPACK CPU delegate (multi-threaded, float models)
+        - 'cpu' / 'none': reference TFLite kernels only
+        - anything else: path to an external delegate library (e.g. libedgetpu.so.1)
+        """
+        cpu_kwargs: Dict = {}
+        if OpResolverType is not None:
+            cpu_kwargs["experimental_op_resolver_type"] = OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+
+        name = self.delegate.lower()
+        candidates: List[Tuple[str, Dict]] = []
+
+        if name == "xnnpack":
+            # The default op resolver applies XNNPACK automatically.
+            candidates.append(("xnnpack", {}))
+        elif name not in ("", "cpu", "none"):
+            try:
+                external = load_delegate(self.delegate)
+                candidates.append((f"delegate:{self.delegate}", {"experimental_delegates": [external]}))
+            except Exception as exc:
+                logger.warning("Failed to load TFLite delegate '%s': %s - falling back to CPU", self.delegate, exc)
+
+        candidates.append(("cpu", cpu_kwargs))
+        return candidates
+
+    def _create_interpreter(self):
+        candidates = self._backend_candidates()
+
+        for i, (backend, kwargs) in enumerate(candidates):
+            is_last = i == len(candidates) - 1
+            try:
+                interpreter = Interpreter(
+                    model_path=self.model_path,
+                    num_threads=self.num_threads,
+                    **kwargs,
+                )
+                # Delegate failures often only surface when tensors are allocated.
+                interpreter.allocate_tensors()
+                return interpreter, self._applied_backend(interpreter, backend)
+            except ValueError as exc:
+                if not is_last:
+                    logger.warning("TFLite backend '%s' failed: %s - trying next", backend, exc)
+                    continue
+                # Common on Raspberry Pi when model was exported with newer TF/TFLite
+                # than installed tflite-runtime supports.
+                raise ValueError(
+                    f"Failed to load TFLite model '{self.model_path}'. "
+                    "This usually means model/runtime version mismatch. "
+                    "For Raspberry Pi tflite-runtime 2.14.0, re-export the model with "
+                    "TensorFlow 2.14 using models/train_export_tflite_tf214.py, or set "
+                    "DETECTOR_TYPE=heuristic in raspberry-pi/.env."
+                ) from exc
+            except RuntimeError as exc:
+                if is_last:
+                    raise
+                logger.warning("TFLite backend '%s' failed: %s - trying next", backend, exc)
+
+    @staticmethod
+    def _applied_backend(interpreter, requested: str) -> str:
+        """
+        Name the backend the interpreter actually runs on.
+
+        Delegated partitions show up as DELEGATE nodes in the op list. A
+        delegate that claimed no ops (e.g. XNNPACK on a quantized model, or a
+        runtime built without it) means the reference CPU kernels run. When
+        the runtime cannot list its ops, XNNPACK is reported as 'default'
+        since only the default op resolver is known to be in use.
+        """
+        if requested == "cpu":
+            return requested
+        try:
+            ops = interpreter._get_ops_details()
+        except Exception:
+            return "default" if requested == "xnnpack" else f"{requested} (unverified)"
+        if any("DELEGATE" in str(op.get("op_name", "")).upper() for op in ops):
+            return requested
+        logger.warning("TFLite delegate '%s' did not claim any ops - running on CPU kernels", requested)
+        return "cpu"
+
     def _load_labels(self, path: str) -> List[str]:
         with open(path, "r", encoding="utf-8") as f:
             lines = [ln.strip() for ln in f.readlines()]
@@ -90,6 +192,49 @@ class TFLiteWasteClassifier:
                 labels.append(ln)
         return labels
 
+    def _init_zero_copy_buffers(self) -> bool:
+        shape = tuple(int(d) for d in self.input_details[0]["shape"])
+        if len(shape) != 4 or shape[0] != 1 or shape[3] != 3:
+            logger.info("Zero-copy input disabled: unsupported input shape %s", shape)
+            return False
+        if self.input_dtype not in (np.uint8, np.float32):
+            logger.info("Zero-copy input disabled: unsupported input dtype %s", self.input_dtype)
+            return False
+
+        height, width = shape[1], shape[2]
+        if (width, height) != tuple(self.input_size):
+            logger.warning(
+                "Configured input size %s does not match model input %dx%d; using model size",
+                self.input_size,
+                width,
+                height,
+            )
+            self.input_size = (width, height)
+
+        self._resized_buf = np.empty((height, width, 3), dtype=np.uint8)
+        self._rgb_buf = np.empty((height, width, 3), dtype=np.uint8)
+        self._norm_scale = np.float32(255.0)
+        return True
+
+    def _fill_input(self, frame_bgr: np.ndarray, slot: int = 0) -> None:
+        """
+        Write resize + BGR->RGB + normalize directly into the input tensor
+        (batch position ``slot``). No per-frame allocation on the hot path.
+        """
+        resized = cv2.resize(
+            frame_bgr, self.input_size, dst=self._resized_buf, interpolation=cv2.INTER_LINEAR
+        )
+        rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+
+        # tensor() returns a view of the interpreter-owned buffer. It must be
+        # dropped before invoke(), so it is fetched per call and never stored.
+        input_view = self.interpreter.tensor(self.input_index)()[slot]
+        np.copyto(input_view, rgb)
+        if self.input_dtype != np.uint8:
+            # Normalize in place; a mixed-dtype ufunc would allocate a cast buffer.
+            np.divide(input_view, self._norm_scale, out=input_view)
+        del input_view
+
     def _preprocess(self, frame_bgr: np.ndarray) -> np.ndarray:
         # Resize to expected input
         resized = cv2.resize(frame_bgr, self.input_size, interpolation=cv2.INTER_LINEAR)
@@ -104,34 +249,95 @@ class TFLiteWasteClassifier:
         # Add batch dimension
         return np.expand_dims(tensor, axis=0)
 
-    def _postprocess(self, output: np.ndarray) -> Prediction:
+    def _scores_to_probabilities(self, output: np.ndarray) -> np.ndarray:
         # Output shape commonly: (1, num_classes)
-        scores = np.squeeze(output)
+        scores = np.squeeze(output, axis=0) if output.ndim > 1 else output
+        scores = scores.reshape(-1)
 
-        # Dequantize if needed
+        # Dequantize int8/uint8 outputs: real = scale * (q - zero_point)
         q = self.output_details[0].get("quantization", (0.0, 0))
         scale, zero_point = q if isinstance(q, (tuple, list)) else (0.0, 0)
-        if scale and output.dtype in (np.uint8, np.int8):
-            scores = scale * (scores.astype(np.float32) - float(zero_point))
+        if output.dtype in (np.uint8, np.int8):
+            if scale:
+                scores = scale * (scores.astype(np.float32) - float(zero_point))
+            else:
+                # Unquantized integer output: assume a full-range probability encoding
+                scores = scores.astype(np.float32) / float(np.iinfo(output.dtype).max)
+        else:
+            scores = scores.astype(np.float32)
 
-        idx = int(np.argmax(scores))
-        conf = float(scores[idx])
-        label = self.labels[idx] if idx < len(self.labels) else str(idx)
+        # Teachable Machine models usually end in softmax already. Anything that
+        # is not a probability distribution is treated as logits.
+        is_distribution = (
+            float(scores.min()) >= -1e-3
+            and float(scores.max()) <= 1.0 + 1e-3
+            and abs(float(scores.sum()) - 1.0) <= 0.05
+        )
+        if not is_distribution:
+            exp = np.exp(scores - scores.max())
+            scores = exp / exp.sum()
 
-        # If the model outputs logits (not probabilities), conf may be outside [0,1].
-        # For Teachable Machine it is usually probabilities already.
-        if conf > 1.0:
-            conf = float(1.0 / (1.0 + np.exp(-conf)))
+        return scores
 
-        return Prediction(label=label, confidence=round(conf, 2))
+    def _postprocess(self, output: np.ndarray) -> Prediction:
+        probs = self._scores_to_probabilities(output)
+        names = [self.labels[i] if i < len(self.labels) else str(i) for i in range(probs.size)]
+
+        order = np.argsort(probs)[::-1]
+        idx = int(order[0])
+
+        return Prediction(
+            label=names[idx],
+            confidence=round(float(probs[idx]), 2),
+            probabilities={names[i]: round(float(probs[i]), 4) for i in range(probs.size)},
+            top_k=[(names[i], round(float(probs[i]), 4)) for i in order[: self.top_k]],
+        )
+
+    def _ensure_batch_size(self, batch_size: int) -> None:
+        if batch_size == self._batch_size:
+            return
+        height, width = self.input_size[1], self.input_size[0]
+        self.interpreter.resize_tensor_input(self.input_index, [batch_size, height, width, 3])
+        self.interpreter.allocate_tensors()
+        self._batch_size = batch_size
+        logger.debug("Resized TFLite input batch to %d", batch_size)
 
     def predict(self, frame_bgr: np.ndarray) -> Prediction:
-        input_tensor = self._preprocess(frame_bgr)
-        self.interpreter.set_tensor(self.input_index, input_tensor)
+        if self.supports_batch:
+            self._ensure_batch_size(1)
+        if self.zero_copy:
+            self._fill_input(frame_bgr)
+        else:
+            input_tensor = self._preprocess(frame_bgr)
+            self.interpreter.set_tensor(self.input_index, input_tensor)
         self.interpreter.invoke()
         output = self.interpreter.get_tensor(self.output_index)
         return self._postprocess(output)
 
+    def predict_batch(self, frames_bgr: Sequence[np.ndarray]) -> List[Prediction]:
+        """
+        Classify several frames with a single invoke().
+
+        The input tensor is resized to N frames when the model has a dynamic
+        batch dimension; otherwise frames are classified one at a time.
+        """
+        frames = list(frames_bgr)
+        if not frames:
+            return []
+        if len(frames) == 1 or not self.supports_batch:
+            return [self.predict(frame) for frame in frames]
+
+        self._ensure_batch_size(len(frames))
+        if self.zero_copy:
+            for slot, frame in enumerate(frames):
+                self._fill_input(frame, slot)
+        else:
+            batch = np.concatenate([self._preprocess(frame) for frame in frames], axis=0)
+            self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_index)
+        return [self._postprocess(output[i : i + 1]) for i in range(len(frames))]
+
     # ----- Compatibility with existing pipeline -----
 
     def detect(self, frame_bgr: np.ndarray) -> List[Dict]:
@@ -139,7 +345,30 @@ class TFLiteWasteClassifier:
         For compatibility with the YOLO path, we return a list with one "detection".
         """
         pred = self.predict(frame_bgr)
-        return [{"class": pred.label, "confidence": pred.confidence, "bbox": None}]
+        return [self._to_detection(pred)]
+
+    def detect_batch(self, frames_bgr: Sequence[np.ndarray]) -> List[List[Dict]]:
+        """
+        Batched detect(): one list of detections per input frame.
+        """
+        return [[self._to_detection(pred)] for pred in self.predict_batch(frames_bgr)]
+
+    def close(self) -> None:
+        """
+        Release the interpreter (and its delegate) so a replacement
+        detector does not keep two models in memory.
+        """
+        self.interpreter = None
+
+    @staticmethod
+    def _to_detection(pred: Prediction) -> Dict:
+        return {
+            "class": pred.label,
+            "confidence": pred.confidence,
+            "bbox": None,
+            "probs": pred.probabilities,
+            "top_k": [list(item) for item in pred.top_k],
+        }
 
     def get_detection_summary(self, detections: List[Dict]) -> Dict:
         """
@@ -155,9 +384,13 @@ class TFLiteWasteClassifier:
 
         destination = label if confidence >= self.conf_threshold else "reject"
 
+        obj = {"class": label, "confidence": round(confidence, 2)}
+        if best.get("top_k"):
+            obj["top_k"] = best["top_k"]
+
         return {
             "count": 1,
-            "objects": [{"class": label, "confidence": round(confidence, 2)}],
+            "objects": [obj],
             "destination": destination,
             "confidence": round(confidence, 2),
         }
@@ -0,0 +1,111 @@
+"""
+Multi-frame temporal voting.
+
+Fuses the per-frame results of a short burst of captures into one decision,
+so a single blurred or badly lit frame does not send an item to the reject
+door. Works with any detector that returns the usual list of
+{"class", "confidence"} dicts; the top detection of each frame is used,
+and its full "probs" vector when the detector provides one.
+
+Fusion methods:
+- mean: average the per-class scores over all frames, pick the best class
+- vote: majority vote on the per-frame labels (ties broken by total score)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+FUSION_METHODS = ("mean", "vote")
+
+
+@dataclass
+class FusedResult:
+    label: str
+    confidence: float
+    scores: Dict[str, float]                 # fused per-class scores
+    frames: List[Dict] = field(default_factory=list)  # per-frame {class, confidence}
+    full_probs: bool = False                 # scores are averaged probability vectors
+
+    def detection(self, top_k: int = 3) -> Dict:
+        """The fused result in the detectors' per-frame format (probs/top_k when known)."""
+        detection = {"class": self.label, "confidence": self.confidence, "bbox": None}
+        if self.full_probs:
+            ranked = sorted(self.scores.items(), key=lambda item: item[1], reverse=True)
+            detection["probs"] = {name: round(p, 4) for name, p in self.scores.items()}
+            detection["top_k"] = [[name, round(p, 4)] for name, p in ranked[:top_k]]
+        return detection
+
+
+class TemporalVoter:
+    """
+    Accumulates per-frame detections and exposes the running fused result.
+    """
+
+    def __init__(self, method: str = "mean"):
+        if method not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method '{method}', expected one of {FUSION_METHODS}")
+        self.method = method
+        self._frames: List[Dict] = []
+        self._score_sums: Dict[str, float] = {}
+        self._votes: Dict[str, int] = {}
+        self._full_probs = False
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def add(self, detections: List[Dict]) -> None:
+        """Add the detections of one frame (an empty list counts as a frame with no vote)."""
+        if not detections:
+            self._frames.append({"class": "none", "confidence": 0.0})
+            return
+
+        best = max(detections, key=lambda d: float(d.get("confidence", 0.0)))
+        label = best.get("class", "unknown")
+        confidence = float(best.get("confidence", 0.0))
+
+        self._frames.append({"class": label, "confidence": round(confidence, 2)})
+        self._votes[label] = self._votes.get(label, 0) + 1
+
+        probs = best.get("probs")
+        if probs:
+            # Full probability vector available (TFLite): average it directly
+            self._full_probs = True
+            for name, p in probs.items():
+                self._score_sums[name] = self._score_sums.get(name, 0.0) + float(p)
+        else:
+            # Only the top-1 score is known: treat it as the probability of
+            # that class and zero for the others.
+            self._score_sums[label] = self._score_sums.get(label, 0.0) + confidence
+
+    def result(self) -> Optional[FusedResult]:
+        """Current fused decision, or None if no frame produced a detection."""
+        if not self._score_sums:
+            return None
+
+        n = len(self._frames)
+        scores = {label: total / n for label, total in self._score_sums.items()}
+
+        if self.method == "vote":
+            label = max(self._votes, key=lambda lbl: (self._votes[lbl], scores[lbl]))
+        else:
+            label = max(scores, key=scores.get)
+
+        return FusedResult(
+            label=label,
+            confidence=round(scores[label], 2),
+            scores=scores,
+            frames=list(self._frames),
+            full_probs=self._full_probs,
+        )
+
+    def payload(self) -> Dict:
+        """Compact dict with the fused and per-frame scores for the MQTT detection payload."""
+        n = len(self._frames)
+        return {
+            "method": self.method,
+            "frames": n,
+            "scores": {label: round(total / n, 3) for label, total in self._score_sums.items()},
+            "per_frame": list(self._frames),
+        }
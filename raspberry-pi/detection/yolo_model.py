@@ -6,7 +6,7 @@ Loads and manages YOLOv8 model for waste classification
 from ultralytics import YOLO
 import cv2
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Sequence, Tuple
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -59,21 +59,52 @@ class WasteDetector:
         detections = []
         
         for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                class_id = int(box.cls[0])
-                confidence = float(box.conf[0])
-                
-                detection = {
-                    'class': self.class_names[class_id] if class_id < len(self.class_names) else 'unknown',
-                    'confidence': round(confidence, 2),
-                    'bbox': box.xyxy[0].tolist()  # [x1, y1, x2, y2]
-                }
-                detections.append(detection)
+            detections.extend(self._parse_result(result))
         
         logger.info(f"Detected {len(detections)} objects")
         return detections
     
+    def detect_batch(self, frames: Sequence[np.ndarray]) -> List[List[Dict]]:
+        """
+        Run detection on several frames in a single model call
+        
+        Args:
+            frames: Input images as numpy arrays (BGR)
+            
+        Returns:
+            One list of detection dictionaries per input frame
+        """
+        if self.model is None:
+            raise RuntimeError("Model not loaded")
+        
+        frames = list(frames)
+        if not frames:
+            return []
+        
+        # Ultralytics batches a list of images and returns one result per image
+        results = self.model(frames, conf=self.conf_threshold, verbose=False)
+        
+        batch = [self._parse_result(result) for result in results]
+        logger.info(f"Detected {sum(len(d) for d in batch)} objects in {len(frames)} frames")
+        return batch
+    
+    def _parse_result(self, result) -> List[Dict]:
+        """Convert one Ultralytics result into detection dictionaries"""
+        detections = []
+        
+        for box in result.boxes:
+            class_id = int(box.cls[0])
+            confidence = float(box.conf[0])
+            
+            detection = {
+                'class': self.class_names[class_id] if class_id < len(self.class_names) else 'unknown',
+                'confidence': round(confidence, 2),
+                'bbox': box.xyxy[0].tolist()  # [x1, y1, x2, y2]
+            }
+            detections.append(detection)
+        
+        return detections
+    
     def get_detection_summary(self, detections: List[Dict]) -> Dict:
         """
         Create detection summary for MQTT publishing
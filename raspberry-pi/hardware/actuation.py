@@ -0,0 +1,256 @@
+"""
+Actuation Worker
+Runs bin door routing on its own thread so servo motion and the drop
+dwell never block the detection loop
+"""
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RouteCommand:
+    """A routing request for one item, or a single manual door move"""
+    destination: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+    trace: Optional[Any] = None  # telemetry.tracing.Trace, ended after the door closes
+    action: str = 'route'  # 'route' (open, dwell, close) | 'open' | 'close'
+    done: Event = field(default_factory=Event)
+    error: Optional[str] = None
+    cancelled: bool = False
+
+
+class ActuationWorker:
+    """
+    Sequences open -> dwell -> close per door from a command queue.
+    
+    Detection enqueues a RouteCommand and returns immediately; the next item
+    can be classified while the previous door is still moving. Manual door
+    moves go through the same queue, so only this thread drives the servos.
+    """
+    
+    def __init__(self, servo, dwell: float = 2.0, max_pending: int = 8, metrics=None,
+                 on_complete: Optional[Callable[[str], None]] = None):
+        """
+        Initialize actuation worker
+        
+        Args:
+            servo: BinServoController driving the doors
+            dwell: Seconds a door stays open for the item to drop
+            max_pending: Queue bound; submit() blocks when it is full
+            metrics: Optional MetricsRegistry for open/dwell/close timings
+            on_complete: Called with the destination once its door has
+                         closed again (the item is in the bin)
+        """
+        self.servo = servo
+        self.dwell = dwell
+        self.metrics = metrics
+        self.on_complete = on_complete
+        self._queue: "Queue[Optional[RouteCommand]]" = Queue(maxsize=max(1, max_pending))
+        self._stop_event = Event()
+        self._thread = None
+        
+        # Throughput bookkeeping
+        self.completed = 0
+        self.failed = 0
+        self._completions = deque(maxlen=50)
+        self._last_latency = 0.0
+    
+    def start(self):
+        """Start the worker thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, name="actuation", daemon=True)
+        self._thread.start()
+        logger.info("Actuation worker started")
+    
+    def submit(self, destination: str, timeout: Optional[float] = None, trace=None) -> bool:
+        """
+        Queue a routing command
+        
+        Blocks while the queue is full (backpressure: items are physical
+        and must not be dropped silently).
+        
+        Args:
+            destination: Bin type to route to
+            timeout: Maximum seconds to wait for queue space
+            trace: Optional item trace; door spans are added and the trace
+                   is ended once the door has closed
+            
+        Returns:
+            True if queued, False on timeout
+        """
+        try:
+            self._queue.put(RouteCommand(destination, trace=trace), timeout=timeout)
+            return True
+        except Full:
+            logger.error(f"Actuation queue full, could not route to {destination}")
+            return False
+    
+    def move_door(self, destination: str, action: str, timeout: Optional[float] = None):
+        """
+        Open or close one door in turn with queued items and wait for it
+        
+        Args:
+            destination: Bin type whose door moves
+            action: 'open' or 'close'
+            timeout: Maximum seconds to wait for queued items and the move
+            
+        Raises:
+            ValueError: On an unknown action
+            RuntimeError: If the move failed or did not run within timeout
+                          (it is then skipped if not started yet)
+        """
+        if action not in ('open', 'close'):
+            raise ValueError(f"unknown door action: {action}")
+        command = RouteCommand(destination, action=action)
+        start = time.monotonic()
+        try:
+            self._queue.put(command, timeout=timeout)
+        except Full:
+            raise RuntimeError("actuation queue full")
+        remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - start))
+        if not command.done.wait(remaining):
+            command.cancelled = True
+            raise RuntimeError(f"door busy, {action} {destination} timed out")
+        if command.error is not None:
+            raise RuntimeError(command.error)
+    
+    def _run(self):
+        """Worker loop"""
+        while not self._stop_event.is_set():
+            try:
+                command = self._queue.get(timeout=0.5)
+            except Empty:
+                continue
+            
+            if command is None:
+                self._queue.task_done()
+                break
+            
+            try:
+                if command.action != 'route':
+                    self._move_door(command)
+                elif command.trace is not None:
+                    with command.trace.activate():
+                        self._actuate(command)
+                else:
+                    self._actuate(command)
+            finally:
+                self._queue.task_done()
+    
+    def _move_door(self, command: RouteCommand):
+        """Run a manual open/close and hand the outcome back to the caller"""
+        try:
+            if command.cancelled:
+                return
+            if command.action == 'open':
+                self.servo.route_to_bin(command.destination)
+            else:
+                self.servo.close_bin(command.destination)
+        except Exception as e:
+            command.error = str(e)
+            logger.error(f"Door {command.action} failed for {command.destination}: {e}")
+        finally:
+            command.done.set()
+    
+    def _actuate(self, command: RouteCommand):
+        """Open the target door, wait for the drop, close it"""
+        destination = command.destination
+        opened = False
+        try:
+            open_start = time.monotonic()
+            self.servo.route_to_bin(destination)
+            opened = True
+            dwell_start = time.monotonic()
+            time.sleep(self.dwell)  # Allow time for waste to drop
+            close_start = time.monotonic()
+            self.servo.close_bin(destination)
+            
+            now = time.monotonic()
+            if self.metrics is not None:
+                # Queue wait shows actuation backpressure on detection
+                self.metrics.observe('stage_seconds', open_start - command.enqueued_at, stage='actuation_wait')
+                self.metrics.observe('stage_seconds', dwell_start - open_start, stage='servo_open')
+                self.metrics.observe('stage_seconds', close_start - dwell_start, stage='dwell')
+                self.metrics.observe('stage_seconds', now - close_start, stage='servo_close')
+            if command.trace is not None:
+                command.trace.add_span('actuation_wait', command.enqueued_at, open_start)
+                command.trace.add_span('servo_open', open_start, dwell_start)
+                command.trace.add_span('dwell', dwell_start, close_start)
+                command.trace.add_span('servo_close', close_start, now)
+                command.trace.end(destination=destination)
+            
+            self.completed += 1
+            self._completions.append(now)
+            self._last_latency = now - command.enqueued_at
+            logger.info(
+                f"Routed to {destination} in {self._last_latency:.2f}s "
+                f"({self.items_per_minute():.1f} items/min)"
+            )
+        except Exception as e:
+            # A door that jammed or never opened is not a deposit
+            self.failed += 1
+            logger.error(f"Actuation error for {destination}: {e}")
+            if not opened:
+                # Don't leave a half-open door behind a failed route
+                try:
+                    self.servo.close_bin(destination)
+                except Exception:
+                    pass
+            if command.trace is not None:
+                command.trace.end(destination=destination, error=str(e))
+            return
+        
+        if self.on_complete is not None:
+            try:
+                self.on_complete(destination)
+            except Exception as e:
+                logger.error(f"Deposit callback failed for {destination}: {e}")
+    
+    def items_per_minute(self) -> float:
+        """Throughput over the most recent completed items"""
+        if len(self._completions) < 2:
+            return 0.0
+        span = self._completions[-1] - self._completions[0]
+        if span <= 0:
+            return 0.0
+        return (len(self._completions) - 1) * 60.0 / span
+    
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued command has finished"""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(
+                lambda: self._queue.unfinished_tasks == 0, timeout
+            )
+    
+    def stats(self) -> Dict:
+        """Queue depth and throughput counters"""
+        return {
+            'pending': self._queue.qsize(),
+            'completed': self.completed,
+            'failed': self.failed,
+            'items_per_minute': round(self.items_per_minute(), 2),
+            'last_latency_s': round(self._last_latency, 3),
+        }
+    
+    def stop(self, timeout: float = 5.0):
+        """Finish queued commands (up to timeout) and stop the worker"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except Full:
+            self._stop_event.set()
+        self._thread.join(timeout=timeout)
+        self._stop_event.set()
+        self._thread = None
+        logger.info("Actuation worker stopped")
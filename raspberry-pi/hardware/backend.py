@@ -0,0 +1,66 @@
+"""
+Hardware Backend
+Selects the GPIO implementation used by all hardware modules
+"""
+
+import logging
+
+from config import get_config, parse_bin_values
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('rpi', 'sim', 'auto')
+
+
+def _create_simulator(config):
+    """Build a SimGPIO from the SIM_* settings"""
+    from hardware.simulator import SimGPIO
+    
+    fills = parse_bin_values(config.SIM_BIN_FILL)
+    bin_defaults = {
+        name: {
+            'fill': fills.get(name, 0.0),
+            'fill_rate': config.SIM_FILL_RATE,
+            'noise_cm': config.SIM_ECHO_NOISE_CM,
+            'dropout': config.SIM_ECHO_DROPOUT,
+        }
+        for name in ('dry', 'wet', 'electronic')
+    }
+    return SimGPIO(item_fill=config.SIM_ITEM_FILL, bin_defaults=bin_defaults)
+
+
+def load_backend(name: str):
+    """
+    Resolve a backend name to a GPIO module/object
+    
+    Args:
+        name: 'rpi', 'sim' or 'auto'
+    
+    Returns:
+        (backend name, GPIO implementation)
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HARDWARE_BACKEND '{name}', expected one of {BACKENDS}")
+    
+    if name in ('rpi', 'auto'):
+        try:
+            import RPi.GPIO as gpio
+            return 'rpi', gpio
+        except ImportError as e:
+            # Only a missing package falls back; RuntimeError (e.g. no access
+            # to /dev/mem) is a real fault on a Pi and must not hide behind
+            # simulated bins
+            if name == 'rpi':
+                raise
+            logger.warning(f"RPi.GPIO unavailable ({e}) - using simulated hardware")
+    
+    logger.warning("Simulated hardware backend: bin levels and sensors are not real")
+    return 'sim', _create_simulator(get_config())
+
+
+BACKEND, GPIO = load_backend(get_config().HARDWARE_BACKEND)
+
+
+def is_simulated() -> bool:
+    """True when running on the simulated hardware backend"""
+    return BACKEND == 'sim'
@@ -0,0 +1,144 @@
+"""
+Streaming Distance Filter
+Robust per-sensor estimator for ultrasonic fill-level readings
+"""
+
+import logging
+import statistics
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingDistanceFilter:
+    """
+    Ring buffer + median-of-N + exponential smoothing + outlier gating.
+    
+    - Single spurious echoes are rejected by comparing each sample against
+      the median of recent accepted samples.
+    - A genuine step change (e.g. a large item dropped in) is accepted once
+      it has been seen on several consecutive samples.
+    - Missing reads never turn into a fake 0 %: after a few consecutive
+      failures the estimate becomes explicitly invalid.
+    """
+    
+    def __init__(self, window: int = 5, alpha: float = 0.4, max_jump: float = 10.0,
+                 confirm_jumps: int = 3, invalid_after: int = 3):
+        """
+        Initialize filter
+        
+        Args:
+            window: Ring buffer size for the median
+            alpha: EMA weight of the newest median (1.0 = no smoothing)
+            max_jump: Deviation from the median (cm) treated as an outlier
+            confirm_jumps: Consecutive consistent outliers accepted as a real change
+            invalid_after: Consecutive failed reads before the estimate is invalid
+        """
+        self.window = max(1, window)
+        self.alpha = alpha
+        self.max_jump = max_jump
+        self.confirm_jumps = max(1, confirm_jumps)
+        self.invalid_after = max(1, invalid_after)
+        
+        self._buffer = deque(maxlen=self.window)
+        self._pending = []
+        self._estimate: Optional[float] = None
+        self._failures = 0
+        
+        # Diagnostics
+        self.accepted = 0
+        self.rejected = 0
+        self.failed_reads = 0
+    
+    @property
+    def valid(self) -> bool:
+        """True while the estimate can be trusted"""
+        return self._estimate is not None and self._failures < self.invalid_after
+    
+    @property
+    def value(self) -> Optional[float]:
+        """Filtered distance in cm, or None when invalid"""
+        return self._estimate if self.valid else None
+    
+    def reset(self):
+        """Drop all history"""
+        self._buffer.clear()
+        self._pending = []
+        self._estimate = None
+        self._failures = 0
+    
+    def _accept(self, sample: float):
+        self._buffer.append(sample)
+        median = statistics.median(self._buffer)
+        if self._estimate is None:
+            self._estimate = median
+        else:
+            self._estimate = self.alpha * median + (1 - self.alpha) * self._estimate
+        self.accepted += 1
+    
+    def update(self, sample: Optional[float]) -> Optional[float]:
+        """
+        Feed one raw sample
+        
+        Args:
+            sample: Distance in cm, or None for a failed read
+            
+        Returns:
+            Filtered distance in cm, or None when invalid
+        """
+        if sample is None or sample < 0:
+            self._failures += 1
+            self.failed_reads += 1
+            return self.value
+        
+        self._failures = 0
+        
+        if not self._buffer:
+            self._accept(sample)
+            return self.value
+        
+        reference = statistics.median(self._buffer)
+        if abs(sample - reference) <= self.max_jump:
+            self._pending = []
+            self._accept(sample)
+            return self.value
+        
+        # Outlier: only accept once it is confirmed as a consistent step change
+        self._pending.append(sample)
+        if (len(self._pending) >= self.confirm_jumps
+                and max(self._pending) - min(self._pending) <= self.max_jump):
+            logger.debug(f"Accepting level step {reference:.1f} -> {self._pending[-1]:.1f} cm")
+            confirmed = self._pending
+            self._buffer.clear()
+            self._pending = []
+            self._estimate = None
+            for value in confirmed:
+                self._accept(value)
+        else:
+            if len(self._pending) >= self.confirm_jumps:
+                self._pending = self._pending[1:]
+            self.rejected += 1
+        
+        return self.value
+    
+    def spread(self) -> Optional[float]:
+        """
+        Standard deviation of the recent accepted samples
+        
+        Returns:
+            Spread in cm across the ring buffer, or None with fewer than
+            two samples (the buffer restarts on a confirmed level step)
+        """
+        if len(self._buffer) < 2:
+            return None
+        return statistics.pstdev(self._buffer)
+    
+    def stats(self) -> dict:
+        """Counters for tuning"""
+        return {
+            'valid': self.valid,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'failed_reads': self.failed_reads,
+        }
@@ -0,0 +1,153 @@
+"""
+Fill Forecast
+Online per-bin fill-rate and time-to-full estimation (Holt's linear trend)
+"""
+
+import logging
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HoltTrend:
+    """
+    Holt double exponential smoothing for irregularly spaced samples.
+    
+    Keeps only a level, a trend (percentage points per second) and the
+    last timestamp, so each update is O(1) with constant memory.
+    """
+    
+    def __init__(self, alpha: float = 0.5, beta: float = 0.2):
+        """
+        Initialize model
+        
+        Args:
+            alpha: Level smoothing weight (0-1)
+            beta: Trend smoothing weight (0-1)
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.reset()
+    
+    def reset(self):
+        """Forget all history"""
+        self.level: Optional[float] = None
+        self.trend = 0.0
+        self.timestamp: Optional[float] = None
+        self.samples = 0
+    
+    def update(self, value: float, timestamp: float):
+        """
+        Feed one observation
+        
+        Args:
+            value: Observed fill percentage
+            timestamp: Observation time in seconds
+        """
+        if self.level is None:
+            self.level = value
+            self.timestamp = timestamp
+            self.samples = 1
+            return
+        
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return
+        
+        predicted = self.level + self.trend * dt
+        level = self.alpha * value + (1 - self.alpha) * predicted
+        slope = (level - self.level) / dt
+        if self.samples == 1:
+            self.trend = slope
+        else:
+            self.trend = self.beta * slope + (1 - self.beta) * self.trend
+        
+        self.level = level
+        self.timestamp = timestamp
+        self.samples += 1
+
+
+class FillForecaster:
+    """
+    Fill rate and time-to-full per bin.
+    
+    A sudden drop in level means the bin was emptied; that bin's model is
+    restarted so the old trend does not leak into the new fill cycle.
+    """
+    
+    def __init__(self, bins, alpha: float = 0.5, beta: float = 0.2,
+                 full_threshold: float = 80.0, empty_drop: float = 20.0,
+                 min_samples: int = 3):
+        """
+        Initialize forecaster
+        
+        Args:
+            bins: Bin names to track
+            alpha: Level smoothing weight
+            beta: Trend smoothing weight
+            full_threshold: Fill percentage that counts as full
+            empty_drop: Level drop (percentage points) treated as emptying
+            min_samples: Observations needed before a forecast is reported
+        """
+        self.full_threshold = full_threshold
+        self.empty_drop = empty_drop
+        self.min_samples = max(2, min_samples)
+        self.models = {name: HoltTrend(alpha, beta) for name in bins}
+    
+    def update(self, levels: Dict[str, Optional[float]], now: Optional[float] = None):
+        """
+        Feed freshly sampled levels
+        
+        Args:
+            levels: Bin names to fill percentages (None readings are skipped)
+            now: Timestamp in seconds (defaults to time.monotonic())
+        """
+        now = time.monotonic() if now is None else now
+        for name, level in levels.items():
+            model = self.models.get(name)
+            if model is None or level is None:
+                continue
+            if model.level is not None and model.level - level >= self.empty_drop:
+                logger.info(f"{name} bin emptied, restarting fill forecast")
+                model.reset()
+            model.update(level, now)
+    
+    def fill_rates(self) -> Dict[str, Optional[float]]:
+        """
+        Fill rate per bin in percentage points per hour
+        
+        Returns:
+            Dict of bin name -> rate, or None until enough samples are seen
+        """
+        return {
+            name: round(model.trend * 3600, 2) if model.samples >= self.min_samples else None
+            for name, model in self.models.items()
+        }
+    
+    def time_to_full(self, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        Estimated seconds until each bin reaches the full threshold
+        
+        Args:
+            now: Timestamp in seconds (defaults to time.monotonic())
+            
+        Returns:
+            Dict of bin name -> seconds (0 if already full), or None when the
+            bin is not filling or there is not enough history
+        """
+        now = time.monotonic() if now is None else now
+        estimates = {}
+        for name, model in self.models.items():
+            if model.samples < self.min_samples:
+                estimates[name] = None
+                continue
+            # Extrapolate the level to now so stale bins are not over-estimated
+            level = model.level + max(0.0, model.trend) * max(0.0, now - model.timestamp)
+            if level >= self.full_threshold:
+                estimates[name] = 0.0
+            elif model.trend <= 0:
+                estimates[name] = None
+            else:
+                estimates[name] = round((self.full_threshold - level) / model.trend, 0)
+        return estimates
@@ -3,7 +3,7 @@ GPIO Configuration
 Central GPIO pin configuration and initialization
 """
 
-import RPi.GPIO as GPIO
+from hardware.backend import GPIO, is_simulated
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,13 +32,23 @@ class GPIOConfig:
     LED_STATUS = 26
     LED_ERROR = 19
     
+    # MQ135 air quality sensor on an ADS1115 ADC (I2C)
+    MQ135_CHANNEL = 0
+    ADS1115_I2C_ADDRESS = 0x48
+    
     @staticmethod
     def initialize():
         """Initialize GPIO settings"""
         try:
             GPIO.setmode(GPIO.BCM)
             GPIO.setwarnings(False)
-            logger.info("GPIO initialized in BCM mode")
+            if is_simulated():
+                # Virtual bins answer the ultrasonic pings and fill up
+                # as their doors cycle
+                GPIO.attach_bins(GPIOConfig.get_bin_sensors(), GPIOConfig.get_door_pins())
+                logger.info("GPIO initialized in BCM mode (simulated hardware)")
+            else:
+                logger.info("GPIO initialized in BCM mode")
         except Exception as e:
             logger.error(f"GPIO initialization failed: {e}")
             raise
@@ -66,6 +76,21 @@ class GPIOConfig:
             'electronic': (*GPIOConfig.ULTRASONIC_ELECTRONIC, 30.0),
         }
     
+    @staticmethod
+    def get_door_pins():
+        """
+        Get servo pin for each bin door
+        
+        Returns:
+            Dictionary of bin name to servo pin
+        """
+        return {
+            'dry': GPIOConfig.SERVO_DRY_PIN,
+            'wet': GPIOConfig.SERVO_WET_PIN,
+            'electronic': GPIOConfig.SERVO_ELECTRONIC_PIN,
+            'unknown': GPIOConfig.SERVO_UNKNOWN_PIN,
+        }
+    
     @staticmethod
     def setup_leds():
         """Setup LED indicators"""
@@ -3,7 +3,7 @@ IR Sensor Handler
 Detects object presence for triggering detection
 """
 
-import RPi.GPIO as GPIO
+from hardware.backend import GPIO
 import time
 import logging
 from typing import Callable, Optional
@@ -17,6 +17,8 @@ except ImportError:
     ADS_AVAILABLE = False
     logging.warning("ADS1115 library not available. Install: pip3 install adafruit-circuitpython-ads1x15")
 
+from config import get_config
+from hardware.backend import GPIO, is_simulated
 from hardware.gpio_setup import GPIOConfig
 
 logger = logging.getLogger(__name__)
@@ -54,6 +56,11 @@ class MQ135Sensor:
         self.MODERATE_THRESHOLD = 1000   # PPM
         self.POOR_THRESHOLD = 2000       # PPM
         
+        if is_simulated():
+            self.sensor_input = GPIO.analog_in(channel, voltage=get_config().SIM_MQ135_VOLTAGE)
+            logger.info(f"✓ MQ135 simulated on ADS1115 channel {channel}")
+            return
+        
         if not ADS_AVAILABLE:
             logger.error("ADS1115 library not installed!")
             return
@@ -0,0 +1,157 @@
+"""
+Adaptive Bin Sampling
+Schedules ultrasonic reads around deposit activity instead of a fixed timer
+"""
+
+import logging
+import time
+from threading import Event, Lock
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveSampler:
+    """
+    Per-bin sampling schedule.
+    
+    - A deposit routed to a bin schedules a read of that bin shortly after
+      the door has closed.
+    - While a bin's level does not change, its interval grows
+      exponentially up to ``max_interval``.
+    - Bins near the full threshold are never sampled less often than
+      ``near_full_interval``.
+    """
+    
+    def __init__(self, bins, base_interval: float = 30.0, max_interval: float = 600.0,
+                 backoff: float = 2.0, settle_delay: float = 3.0,
+                 full_threshold: float = 80.0, near_full_margin: float = 10.0,
+                 near_full_interval: float = 10.0, change_threshold: float = 1.0):
+        """
+        Initialize sampler
+        
+        Args:
+            bins: Bin names to schedule
+            base_interval: Interval after a change or deposit (seconds)
+            max_interval: Upper bound on the idle interval (seconds)
+            backoff: Interval multiplier after each unchanged read
+            settle_delay: Delay between the door closing and the read (seconds)
+            full_threshold: Fill percentage treated as full
+            near_full_margin: Percentage points below full that count as near full
+            near_full_interval: Maximum interval for near-full bins (seconds)
+            change_threshold: Level change (percentage points) that resets backoff
+        """
+        self.base_interval = base_interval
+        self.max_interval = max(base_interval, max_interval)
+        self.backoff = max(1.0, backoff)
+        self.settle_delay = settle_delay
+        self.full_threshold = full_threshold
+        self.near_full_margin = near_full_margin
+        self.near_full_interval = near_full_interval
+        self.change_threshold = change_threshold
+        
+        now = time.monotonic()
+        self._interval = {name: base_interval for name in bins}
+        self._due = {name: now for name in bins}
+        self._last_level: Dict[str, Optional[float]] = {name: None for name in bins}
+        self._lock = Lock()
+        self._wake = Event()
+        
+        # Diagnostics
+        self.reads = 0
+        self.deposit_reads = 0
+    
+    def notify_deposit(self, bin_name: str):
+        """
+        Schedule a read of a bin whose door just closed on an item
+        
+        Args:
+            bin_name: Destination bin (unknown names are ignored)
+        """
+        with self._lock:
+            if bin_name not in self._due:
+                return
+            self._interval[bin_name] = self.base_interval
+            self._due[bin_name] = min(self._due[bin_name],
+                                      time.monotonic() + self.settle_delay)
+            self.deposit_reads += 1
+        self._wake.set()
+        logger.debug(f"Deposit in {bin_name}: read in {self.settle_delay:.1f}s")
+    
+    def request_sweep(self):
+        """Make every bin due now (e.g. an operator asked for fresh levels)"""
+        with self._lock:
+            now = time.monotonic()
+            for name in self._due:
+                self._due[name] = now
+        self._wake.set()
+    
+    def due_bins(self, now: Optional[float] = None) -> List[str]:
+        """Bins whose next read is due"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return [name for name, due in self._due.items() if due <= now]
+    
+    def record(self, levels: Dict[str, Optional[float]], now: Optional[float] = None):
+        """
+        Reschedule bins after a read
+        
+        Args:
+            levels: Fill percentages of the bins just sampled
+            now: Monotonic timestamp (defaults to time.monotonic())
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for name, level in levels.items():
+                if name not in self._due:
+                    continue
+                self.reads += 1
+                previous = self._last_level[name]
+                
+                changed = (level is None or previous is None
+                           or abs(level - previous) >= self.change_threshold)
+                if changed:
+                    interval = self.base_interval
+                else:
+                    interval = min(self._interval[name] * self.backoff, self.max_interval)
+                
+                if level is not None and level >= self.full_threshold - self.near_full_margin:
+                    interval = min(interval, self.near_full_interval)
+                
+                self._interval[name] = interval
+                self._due[name] = now + interval
+                if level is not None:
+                    self._last_level[name] = level
+    
+    def wait(self, max_wait: Optional[float] = None) -> bool:
+        """
+        Sleep until the next read is due or a deposit arrives
+        
+        Args:
+            max_wait: Upper bound on the sleep (seconds); None or 0 = no bound
+        
+        Returns:
+            True if woken early by a deposit
+        """
+        with self._lock:
+            next_due = min(self._due.values(), default=None)
+        # No bins scheduled: sleep until woken rather than spin
+        timeout = None if next_due is None else max(0.0, next_due - time.monotonic())
+        if max_wait:
+            timeout = max_wait if timeout is None else min(timeout, max_wait)
+        woken = self._wake.wait(timeout)
+        self._wake.clear()
+        return woken
+    
+    def stop(self):
+        """Release a thread blocked in wait()"""
+        self._wake.set()
+    
+    def stats(self) -> dict:
+        """Current intervals and read counters"""
+        with self._lock:
+            return {
+                'reads': self.reads,
+                'deposit_reads': self.deposit_reads,
+                'intervals': {name: round(v, 1) for name, v in self._interval.items()},
+            }
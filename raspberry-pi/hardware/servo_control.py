@@ -3,13 +3,83 @@ Servo Motor Control
 Controls sorting mechanism servo motor
 """
 
-import RPi.GPIO as GPIO
+from hardware.backend import GPIO
 import time
 import logging
 from threading import Lock
+from typing import Iterable, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Smooth-motion profile shared by single and concurrent moves
+STEP_DEGREES = 2
+STEP_DELAY = 0.01    # seconds per step at speed 1.0
+SETTLE_DELAY = 0.12  # hold at the final position before cutting PWM
+
+
+def rotate_servos(moves: Sequence[Tuple["ServoController", int]], speed: float = 1.0):
+    """
+    Rotate several servos at once with a single timing loop
+    
+    Duty-cycle updates for all servos are interleaved on every step, so the
+    move takes as long as the longest single rotation instead of the sum.
+    
+    Args:
+        moves: (servo, target angle) pairs; each servo at most once
+        speed: Rotation speed multiplier
+        
+    Raises:
+        RuntimeError: If any servo failed (the others still complete)
+    """
+    if speed <= 0:
+        speed = 1.0
+    
+    targets = [(servo, servo._clamp(angle)) for servo, angle in moves]
+    
+    # Lock in a fixed order so concurrent callers cannot deadlock
+    locked = sorted({id(servo): servo for servo, _ in targets}.values(), key=lambda sv: sv.pin)
+    for servo in locked:
+        servo._lock.acquire()
+    
+    failed = []
+    try:
+        # Avoid unnecessary pulses and delays.
+        plans = [
+            (servo, angle, servo._path_to(angle))
+            for servo, angle in targets
+            if angle != servo.current_angle
+        ]
+        if not plans:
+            return
+        
+        ticks = max(len(path) for _, _, path in plans)
+        for i in range(ticks):
+            for servo, _, path in plans:
+                if i < len(path) and servo not in failed:
+                    try:
+                        servo.pwm.ChangeDutyCycle(servo._angle_to_duty_cycle(path[i]))
+                    except Exception as e:
+                        logger.warning(f"Servo on pin {servo.pin} failed mid-move: {e}")
+                        failed.append(servo)
+            time.sleep(STEP_DELAY / speed)
+        
+        # Final positions
+        active = [(servo, angle) for servo, angle, _ in plans if servo not in failed]
+        for servo, angle in active:
+            servo.pwm.ChangeDutyCycle(servo._angle_to_duty_cycle(angle))
+        time.sleep(SETTLE_DELAY)
+        
+        for servo, angle in active:
+            servo.current_angle = angle
+            # Stop PWM signal to prevent continuous buzzing/jitter
+            servo.pwm.ChangeDutyCycle(0)
+    finally:
+        for servo in reversed(locked):
+            servo._lock.release()
+    
+    if failed:
+        raise RuntimeError(f"Servo move failed on pins {[servo.pin for servo in failed]}")
+
 
 class ServoController:
     """Controls a single servo motor (for a single door/bin)"""
@@ -65,34 +135,26 @@ class ServoController:
             angle: Target angle (0-180)
             speed: Rotation speed multiplier
         """
-        if not 0 <= angle <= 180:
-            logger.warning(f"Invalid angle {angle}, clamping to 0-180")
-            angle = max(0, min(180, angle))
-        if speed <= 0:
-            speed = 1.0
-
+        angle = self._clamp(angle)
+        
         # Avoid unnecessary pulses and delays.
         if angle == self.current_angle:
             return
         
         logger.info(f"Rotating servo on pin {self.pin} from {self.current_angle}° to {angle}°")
-        with self._lock:
-            # Smooth rotation
-            step = 2 if angle > self.current_angle else -2
-            for pos in range(self.current_angle, angle, step):
-                duty = self._angle_to_duty_cycle(pos)
-                self.pwm.ChangeDutyCycle(duty)
-                time.sleep(0.01 / speed)
-
-            # Final position
-            duty = self._angle_to_duty_cycle(angle)
-            self.pwm.ChangeDutyCycle(duty)
-            time.sleep(0.12)
-
-            self.current_angle = angle
-
-            # Stop PWM signal to prevent continuous buzzing/jitter
-            self.pwm.ChangeDutyCycle(0)
+        rotate_servos([(self, angle)], speed=speed)
+    
+    def _clamp(self, angle: int) -> int:
+        """Clamp a target angle to the valid 0-180 range"""
+        if not 0 <= angle <= 180:
+            logger.warning(f"Invalid angle {angle}, clamping to 0-180")
+            angle = max(0, min(180, angle))
+        return angle
+    
+    def _path_to(self, angle: int) -> List[int]:
+        """Intermediate positions for a smooth rotation to angle"""
+        step = STEP_DEGREES if angle > self.current_angle else -STEP_DEGREES
+        return list(range(self.current_angle, angle, step))
     
     def cleanup(self):
         """Cleanup GPIO resources"""
@@ -130,7 +192,17 @@ class BinServoController:
         unknown_pin: int,
         frequency: int = 50,
         speed: float = 1.0,
+        exclusive_groups: Optional[Iterable[Iterable[str]]] = None,
+        max_concurrent: int = 4,
     ):
+        """
+        Args:
+            exclusive_groups: Groups of doors ('dry', 'wet', 'electronic',
+                'unknown') that share a mechanical constraint and must never
+                move at the same time. All other doors move in parallel.
+            max_concurrent: Upper bound on simultaneously moving servos
+                (limits peak current draw on the servo supply)
+        """
         self.dry = ServoController(pin=dry_pin, frequency=frequency)
         self.wet = ServoController(pin=wet_pin, frequency=frequency)
         self.electronic = ServoController(pin=electronic_pin, frequency=frequency)
@@ -142,51 +214,141 @@ class BinServoController:
         self.speed = speed if speed > 0 else 1.0
         self.active_servo = None
         
+        self.doors = {
+            'dry': self.dry,
+            'wet': self.wet,
+            'electronic': self.electronic,
+            'unknown': self.unknown,
+        }
+        self.exclusive_groups = [set(group) for group in (exclusive_groups or [])]
+        self.max_concurrent = max(1, max_concurrent)
+        
         # Ensure all doors start closed
         self._close_all()
     
-    def _close_all(self):
-        for servo in (self.dry, self.wet, self.electronic, self.unknown):
+    def _door_for(self, bin_type: str) -> str:
+        """Map a bin type to the name of the door that receives it"""
+        if bin_type in ('dry', 'wet', 'electronic'):
+            return bin_type
+        # reject, processing, unknown, multi-object
+        return 'unknown'
+    
+    def _conflicts(self, a: str, b: str) -> bool:
+        return any(a in group and b in group for group in self.exclusive_groups)
+    
+    def _plan_waves(self, moves: List[Tuple[str, int]]) -> List[List[Tuple[str, int]]]:
+        """
+        Split door moves into waves that can run concurrently
+        
+        Moves keep their order: a move joins the earliest wave that has room
+        and no constrained neighbour, otherwise it starts a new wave.
+        """
+        waves: List[List[Tuple[str, int]]] = []
+        for name, angle in moves:
+            for wave in waves:
+                if len(wave) < self.max_concurrent and not any(
+                    self._conflicts(name, other) for other, _ in wave
+                ):
+                    wave.append((name, angle))
+                    break
+            else:
+                waves.append([(name, angle)])
+        return waves
+    
+    def _move(self, moves: List[Tuple[str, int]], keep_going: bool = False):
+        """
+        Move doors, in parallel where the mechanical constraints allow
+        
+        Args:
+            moves: (door name, target angle) pairs
+            keep_going: Run every wave even if an earlier one failed (closing
+                        must reach every door); by default a failed wave stops
+                        the move so a coupled door never opens onto a stuck one
+            
+        Raises:
+            RuntimeError: If any wave failed
+        """
+        errors = []
+        for wave in self._plan_waves(moves):
             try:
-                if servo.current_angle != self.closed_angle:
-                    servo.rotate_to(self.closed_angle, speed=self.speed)
+                rotate_servos([(self.doors[name], angle) for name, angle in wave], speed=self.speed)
             except Exception as e:
-                logger.warning(f"Failed to close servo: {e}")
+                if not keep_going:
+                    raise
+                errors.append(f"{', '.join(name for name, _ in wave)}: {e}")
+        if errors:
+            raise RuntimeError('; '.join(errors))
+    
+    def _close_all(self):
+        moves = [
+            (name, self.closed_angle)
+            for name, servo in self.doors.items()
+            if servo.current_angle != self.closed_angle
+        ]
+        try:
+            self._move(moves, keep_going=True)
+        except Exception as e:
+            logger.warning(f"Failed to close servo: {e}")
     
+    def _servo_for(self, bin_type: str) -> ServoController:
+        """Map a bin type to the servo driving its door"""
+        return self.doors[self._door_for(bin_type)]
+
     def route_to_bin(self, bin_type: str):
         """
         Open only the door for the given bin type.
         
         Args:
             bin_type: 'dry' | 'wet' | 'electronic' | 'reject' | 'processing'
+            
+        Raises:
+            RuntimeError: If a door failed to move
         """
         logger.info(f"Routing to bin (multi-servo): {bin_type}")
 
         # Open the appropriate door
-        target = None
-        if bin_type == 'dry':
-            target = self.dry
-        elif bin_type == 'wet':
-            target = self.wet
-        elif bin_type == 'electronic':
-            target = self.electronic
-        else:
-            # reject, processing, unknown, multi-object
-            target = self.unknown
+        door = self._door_for(bin_type)
+        target = self.doors[door]
 
-        # Close previously active door only, then open target.
+        # Close previously active door and open target together (unless
+        # they are mechanically coupled, then close first).
+        moves = []
         if self.active_servo and self.active_servo is not target:
-            try:
-                self.active_servo.rotate_to(self.closed_angle, speed=self.speed)
-            except Exception as e:
-                logger.warning(f"Failed to close previous active servo: {e}")
+            previous = next(name for name, servo in self.doors.items() if servo is self.active_servo)
+            moves.append((previous, self.closed_angle))
+        moves.append((door, self.open_angle))
 
         try:
-            target.rotate_to(self.open_angle, speed=self.speed)
-            self.active_servo = target
+            self._move(moves)
         except Exception as e:
-            logger.error(f"Failed to open door for {bin_type}: {e}")
+            logger.error(f"Failed to route to {bin_type}: {e}")
+            raise
+        finally:
+            if target.current_angle == self.open_angle:
+                self.active_servo = target
+            elif self.active_servo is not None and self.active_servo.current_angle == self.closed_angle:
+                self.active_servo = None
     
+    def close_bin(self, bin_type: str):
+        """
+        Close only the door for the given bin type.
+        
+        Args:
+            bin_type: 'dry' | 'wet' | 'electronic' | 'reject' | 'processing'
+            
+        Raises:
+            RuntimeError: If the door failed to close
+        """
+        target = self._servo_for(bin_type)
+        try:
+            self._move([(self._door_for(bin_type), self.closed_angle)])
+        except Exception as e:
+            logger.warning(f"Failed to close door for {bin_type}: {e}")
+            raise
+        finally:
+            if self.active_servo is target and target.current_angle == self.closed_angle:
+                self.active_servo = None
+
     def reset(self):
         """Close all doors."""
         logger.info("Resetting all bin doors (close)")
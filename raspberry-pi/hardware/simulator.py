@@ -0,0 +1,321 @@
+"""
+Simulated Hardware
+Drop-in stand-in for RPi.GPIO (plus a fake ADC) so the whole system can
+run and be profiled on plain Linux with realistic timing
+"""
+
+import heapq
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SOUND_CM_PER_S = 17150  # half the speed of sound (round trip)
+ECHO_LATENCY = 0.00045  # HC-SR04 burst time between trigger and echo rise
+SPIN_MARGIN = 0.002     # busy-wait this close to an edge (sleep wake-up jitter)
+
+
+class SimBin:
+    """Physical model of one bin as seen by its ultrasonic sensor"""
+    
+    def __init__(self, depth: float = 30.0, fill: float = 0.0, fill_rate: float = 0.0,
+                 noise_cm: float = 0.3, dropout: float = 0.0):
+        """
+        Args:
+            depth: Bin depth in cm
+            fill: Initial fill percentage
+            fill_rate: Background fill rate in percentage points per hour
+            noise_cm: Standard deviation of the measured distance
+            dropout: Probability that a ping gets no echo
+        """
+        self.depth = depth
+        self.fill = fill
+        self.fill_rate = fill_rate
+        self.noise_cm = noise_cm
+        self.dropout = dropout
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _advance(self):
+        now = time.monotonic()
+        self.fill = min(100.0, self.fill + self.fill_rate * (now - self._updated) / 3600.0)
+        self._updated = now
+    
+    def add(self, percent: float):
+        """Deposit an item occupying ``percent`` of the bin"""
+        with self._lock:
+            self._advance()
+            self.fill = min(100.0, self.fill + percent)
+    
+    def empty(self):
+        """Collection: reset to empty"""
+        with self._lock:
+            self._advance()
+            self.fill = 0.0
+    
+    def distance(self) -> Optional[float]:
+        """Distance the sensor would measure now, or None for a lost echo"""
+        with self._lock:
+            self._advance()
+            if random.random() < self.dropout:
+                return None
+            distance = self.depth * (1.0 - self.fill / 100.0)
+            return max(2.0, distance + random.gauss(0.0, self.noise_cm))
+
+
+class SimPWM:
+    """RPi.GPIO.PWM stand-in"""
+    
+    def __init__(self, gpio: "SimGPIO", pin: int, frequency: float):
+        self._gpio = gpio
+        self.pin = pin
+        self.frequency = frequency
+        self.duty_cycle = 0.0
+    
+    def start(self, duty_cycle: float):
+        self.ChangeDutyCycle(duty_cycle)
+    
+    def ChangeDutyCycle(self, duty_cycle: float):
+        self.duty_cycle = duty_cycle
+        self._gpio._on_pwm(self.pin, duty_cycle)
+    
+    def ChangeFrequency(self, frequency: float):
+        self.frequency = frequency
+    
+    def stop(self):
+        self.duty_cycle = 0.0
+
+
+class SimAnalogIn:
+    """adafruit_ads1x15 AnalogIn stand-in returning a noisy voltage"""
+    
+    def __init__(self, voltage: float = 0.4, noise: float = 0.01, full_scale: float = 4.096):
+        self.base_voltage = voltage
+        self.noise = noise
+        self.full_scale = full_scale
+    
+    @property
+    def voltage(self) -> float:
+        return max(0.0, random.gauss(self.base_voltage, self.noise))
+    
+    @property
+    def value(self) -> int:
+        return int(min(1.0, self.voltage / self.full_scale) * 32767)
+
+
+class SimGPIO:
+    """
+    Subset of the RPi.GPIO API on virtual pins.
+    
+    - Ultrasonic pairs: a trigger pulse schedules an echo pulse whose width
+      matches the attached SimBin's distance; edges are delivered to
+      add_event_detect callbacks at the right times, input() reflects them.
+    - Servo PWM: door angles are tracked from duty cycles; a door that
+      opens and closes again drops one item into its bin.
+    - Plain inputs: set_input() scripts levels (e.g. the IR sensor) and
+      fires matching edge callbacks.
+    """
+    
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+    
+    def __init__(self, item_fill: float = 2.0, bin_defaults: Optional[dict] = None):
+        """
+        Args:
+            item_fill: Fill percentage added to a bin per door cycle
+            bin_defaults: Keyword arguments for SimBin per bin name
+        """
+        self.item_fill = item_fill
+        self.bin_defaults = bin_defaults or {}
+        self.mode = None
+        
+        self._levels: Dict[int, int] = {}
+        self._callbacks: Dict[int, tuple] = {}
+        self._echo_windows: Dict[int, tuple] = {}
+        self._triggers: Dict[int, tuple] = {}   # trigger pin -> (echo pin, SimBin)
+        self._doors: Dict[int, str] = {}        # servo pin -> bin name
+        self._door_open: Dict[int, bool] = {}
+        self.bins: Dict[str, SimBin] = {}
+        self._lock = threading.Lock()
+        
+        # Scheduled edges (time, seq, pin, level), delivered by one thread
+        self._edges: list = []
+        self._edge_seq = 0
+        self._edge_cv = threading.Condition()
+        self._edge_thread = None
+        
+        # Diagnostics
+        self.pings = 0
+        self.deposits = 0
+    
+    # --- RPi.GPIO API -------------------------------------------------------
+    
+    def setmode(self, mode):
+        self.mode = mode
+    
+    def getmode(self):
+        return self.mode
+    
+    def setwarnings(self, flag):
+        pass
+    
+    def setup(self, pin, direction, pull_up_down=PUD_OFF, initial=None):
+        with self._lock:
+            if direction == self.OUT:
+                self._levels[pin] = self.LOW if initial is None else int(bool(initial))
+            else:
+                self._levels[pin] = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+    
+    def output(self, pin, value):
+        value = int(bool(value))
+        with self._lock:
+            previous = self._levels.get(pin, self.LOW)
+            self._levels[pin] = value
+        # Trigger pulse finished: the sensor answers with an echo pulse
+        if previous == self.HIGH and value == self.LOW and pin in self._triggers:
+            self._ping(pin)
+    
+    def input(self, pin) -> int:
+        window = self._echo_windows.get(pin)
+        if window is not None:
+            rise, fall = window
+            now = time.perf_counter()
+            return self.HIGH if rise <= now < fall else self.LOW
+        with self._lock:
+            return self._levels.get(pin, self.LOW)
+    
+    def add_event_detect(self, pin, edge, callback: Optional[Callable] = None, bouncetime=None):
+        with self._lock:
+            if pin in self._callbacks:
+                raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+            self._callbacks[pin] = (edge, callback)
+    
+    def remove_event_detect(self, pin):
+        with self._lock:
+            self._callbacks.pop(pin, None)
+    
+    def PWM(self, pin, frequency):
+        return SimPWM(self, pin, frequency)
+    
+    def cleanup(self, pin=None):
+        with self._lock:
+            if pin is None:
+                self._levels.clear()
+                self._callbacks.clear()
+                self._echo_windows.clear()
+            else:
+                self._levels.pop(pin, None)
+                self._callbacks.pop(pin, None)
+                self._echo_windows.pop(pin, None)
+    
+    # --- Simulation hooks ---------------------------------------------------
+    
+    def attach_bins(self, sensors: dict, doors: Optional[dict] = None):
+        """
+        Wire simulated bins to sensor and door pins
+        
+        Args:
+            sensors: Bin name -> (trigger_pin, echo_pin, depth)
+            doors: Bin name -> servo pin
+        """
+        for name, (trigger, echo, depth) in sensors.items():
+            options = dict(self.bin_defaults.get(name, {}), depth=depth)
+            sim_bin = self.bins.get(name) or SimBin(**options)
+            self.bins[name] = sim_bin
+            self._triggers[trigger] = (echo, sim_bin)
+        for name, pin in (doors or {}).items():
+            self._doors[pin] = name
+            self._door_open[pin] = False
+        logger.info(f"Simulated bins: { {n: round(b.fill, 1) for n, b in self.bins.items()} }")
+    
+    def set_input(self, pin, value):
+        """Drive a simulated input pin, firing edge callbacks"""
+        value = int(bool(value))
+        with self._lock:
+            previous = self._levels.get(pin, self.LOW)
+            self._levels[pin] = value
+        if previous != value:
+            self._fire(pin, value)
+    
+    def analog_in(self, channel: int = 0, voltage: float = 0.4) -> SimAnalogIn:
+        """Fake ADC channel (e.g. the MQ135 on an ADS1115)"""
+        return SimAnalogIn(voltage=voltage)
+    
+    def _fire(self, pin, level):
+        entry = self._callbacks.get(pin)
+        if entry is None:
+            return
+        edge, callback = entry
+        if callback is None:
+            return
+        if edge == self.BOTH or (edge == self.RISING) == (level == self.HIGH):
+            callback(pin)
+    
+    def _ping(self, trigger):
+        echo, sim_bin = self._triggers[trigger]
+        self.pings += 1
+        distance = sim_bin.distance()
+        if distance is None:
+            return
+        
+        rise = time.perf_counter() + ECHO_LATENCY
+        fall = rise + distance / SOUND_CM_PER_S
+        self._echo_windows[echo] = (rise, fall)
+        if echo in self._callbacks:
+            self._schedule(rise, echo, self.HIGH)
+            self._schedule(fall, echo, self.LOW)
+    
+    def _schedule(self, at: float, pin, level):
+        with self._edge_cv:
+            if self._edge_thread is None:
+                self._edge_thread = threading.Thread(target=self._deliver_edges,
+                                                     name="sim-gpio-edges", daemon=True)
+                self._edge_thread.start()
+            self._edge_seq += 1
+            heapq.heappush(self._edges, (at, self._edge_seq, pin, level))
+            self._edge_cv.notify()
+    
+    def _deliver_edges(self):
+        while True:
+            with self._edge_cv:
+                while not self._edges:
+                    self._edge_cv.wait()
+                at = self._edges[0][0]
+                # Coarse sleep, then spin the last stretch for microsecond accuracy
+                remaining = at - time.perf_counter()
+                if remaining > SPIN_MARGIN:
+                    self._edge_cv.wait(remaining - SPIN_MARGIN)
+                    continue
+                _, _, pin, level = heapq.heappop(self._edges)
+            while time.perf_counter() < at:
+                pass
+            try:
+                self._fire(pin, level)
+            except Exception as e:
+                logger.warning(f"Simulated edge callback on pin {pin} failed: {e}")
+    
+    def _on_pwm(self, pin, duty_cycle):
+        name = self._doors.get(pin)
+        if name is None or duty_cycle <= 0:
+            return
+        angle = (duty_cycle - 2.5) / 10.0 * 180.0
+        is_open = angle >= 45.0
+        was_open = self._door_open.get(pin, False)
+        self._door_open[pin] = is_open
+        if was_open and not is_open and name in self.bins:
+            self.bins[name].add(self.item_fill)
+            self.deposits += 1
+            logger.debug(f"Simulated deposit into {name}: {self.bins[name].fill:.1f}%")
@@ -3,9 +3,15 @@ Ultrasonic Sensor Handler
 Measures bin fill levels using HC-SR04
 """
 
-import RPi.GPIO as GPIO
+from hardware.backend import GPIO
 import time
 import logging
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from typing import Optional
+
+from hardware.fill_filter import StreamingDistanceFilter
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +19,13 @@ logger = logging.getLogger(__name__)
 class UltrasonicSensor:
     """Handles ultrasonic distance measurement for bin fill detection"""
     
-    def __init__(self, trigger_pin: int, echo_pin: int, bin_depth: float = 30.0):
+    # Speed of sound / 2, in cm per second
+    SOUND_CM_PER_S = 17150
+    
+    def __init__(self, trigger_pin: int, echo_pin: int, bin_depth: float = 30.0,
+                 mode: str = 'edge', sample_timeout: float = 0.03,
+                 sample_gap: float = 0.05,
+                 distance_filter: Optional[StreamingDistanceFilter] = None):
         """
         Initialize ultrasonic sensor
         
@@ -21,10 +33,29 @@ class UltrasonicSensor:
             trigger_pin: GPIO pin for trigger
             echo_pin: GPIO pin for echo
             bin_depth: Total bin depth in cm
+            mode: 'edge' (interrupt timestamps, no busy-wait) or 'poll'
+            sample_timeout: Max seconds to wait for one echo (edge mode)
+            sample_gap: Pause between samples so old echoes die out
+            distance_filter: Streaming estimator for fill readings
+                             (a default one is created if omitted)
         """
         self.trigger_pin = trigger_pin
         self.echo_pin = echo_pin
         self.bin_depth = bin_depth
+        self.mode = mode
+        self.sample_timeout = sample_timeout
+        self.sample_gap = sample_gap
+        self.filter = distance_filter or StreamingDistanceFilter()
+        
+        # Edge-mode state, written by the GPIO callback thread
+        self._rise_ns = None
+        self._fall_ns = None
+        self._armed = False
+        self._echo_done = Event()
+        
+        # Timing diagnostics
+        self.timeouts = 0
+        self.last_jitter_us = 0.0
         
         self._setup_gpio()
     
@@ -42,51 +73,132 @@ class UltrasonicSensor:
         except Exception as e:
             logger.error(f"Ultrasonic GPIO setup failed: {e}")
             raise
+        
+        # Timestamp echo edges from the GPIO callback thread instead of
+        # spinning on GPIO.input()
+        if self.mode == 'edge':
+            try:
+                GPIO.add_event_detect(self.echo_pin, GPIO.BOTH, callback=self._on_echo_edge)
+            except Exception as e:
+                logger.warning(
+                    f"Echo edge detection unavailable on pin {self.echo_pin}: {e} - "
+                    f"falling back to polling"
+                )
+                self.mode = 'poll'
     
-    def measure_distance(self, samples: int = 3) -> float:
+    def _on_echo_edge(self, channel):
         """
-        Measure distance to object
+        GPIO callback: timestamp echo rising/falling edges
+        
+        The pin level is deliberately not read here: by the time the
+        callback runs a short pulse (~175 us for a full bin) may already
+        be over. The echo line is low when the trigger fires, so the first
+        edge after arming is the rise and the second the fall.
+        """
+        now = time.perf_counter_ns()
+        if not self._armed:
+            return
+        if self._rise_ns is None:
+            self._rise_ns = now
+        else:
+            self._fall_ns = now
+            self._armed = False
+            self._echo_done.set()
+    
+    def _send_trigger(self):
+        """Send 10us trigger pulse"""
+        GPIO.output(self.trigger_pin, True)
+        time.sleep(0.00001)
+        GPIO.output(self.trigger_pin, False)
+    
+    def _sample_edge(self) -> Optional[float]:
+        """
+        One ranging using edge callbacks (no busy-wait)
         
-        Args:
-            samples: Number of measurements to average
-            
         Returns:
-            Distance in centimeters
+            Echo pulse duration in seconds, or None on timeout
         """
-        distances = []
+        self._rise_ns = None
+        self._fall_ns = None
+        self._echo_done.clear()
+        self._armed = True
         
-        for _ in range(samples):
-            # Send trigger pulse
-            GPIO.output(self.trigger_pin, True)
-            time.sleep(0.00001)
-            GPIO.output(self.trigger_pin, False)
-            
-            # Wait for echo
+        self._send_trigger()
+        
+        if not self._echo_done.wait(self.sample_timeout):
+            # Ignore the rest of this echo if it turns up late
+            self._armed = False
+            self.timeouts += 1
+            return None
+        
+        return (self._fall_ns - self._rise_ns) / 1e9
+    
+    def _sample_poll(self) -> Optional[float]:
+        """
+        One ranging by polling the echo pin
+        
+        Returns:
+            Echo pulse duration in seconds
+        """
+        self._send_trigger()
+        
+        # Wait for echo
+        pulse_start = time.time()
+        timeout_start = pulse_start
+        
+        while GPIO.input(self.echo_pin) == 0:
             pulse_start = time.time()
-            timeout_start = pulse_start
-            
-            while GPIO.input(self.echo_pin) == 0:
-                pulse_start = time.time()
-                if pulse_start - timeout_start > 0.1:
-                    break
-            
+            if pulse_start - timeout_start > 0.1:
+                break
+        
+        pulse_end = time.time()
+        timeout_end = pulse_end
+        
+        while GPIO.input(self.echo_pin) == 1:
             pulse_end = time.time()
-            timeout_end = pulse_end
-            
-            while GPIO.input(self.echo_pin) == 1:
-                pulse_end = time.time()
-                if pulse_end - timeout_end > 0.1:
-                    break
-            
-            # Calculate distance
-            pulse_duration = pulse_end - pulse_start
-            distance = pulse_duration * 17150  # Speed of sound / 2
-            distance = round(distance, 2)
-            
-            if 2 < distance < 400:  # Valid range for HC-SR04
-                distances.append(distance)
+            if pulse_end - timeout_end > 0.1:
+                break
+        
+        return pulse_end - pulse_start
+    
+    def sample_once(self) -> Optional[float]:
+        """
+        Take a single ranging sample
+        
+        Returns:
+            Distance in centimeters, or None if the echo was missing or
+            out of the sensor's valid range
+        """
+        if self.mode == 'edge':
+            pulse_duration = self._sample_edge()
+        else:
+            pulse_duration = self._sample_poll()
+        
+        if pulse_duration is None:
+            return None
+        
+        # Calculate distance
+        distance = round(pulse_duration * self.SOUND_CM_PER_S, 2)
+        
+        if 2 < distance < 400:  # Valid range for HC-SR04
+            return distance
+        return None
+    
+    def combine_samples(self, distances: list) -> float:
+        """
+        Reduce the valid samples of one read to a distance
+        
+        Args:
+            distances: Valid sample distances in cm
             
-            time.sleep(0.05)
+        Returns:
+            Average distance in centimeters, or -1 if there were none
+        """
+        # Spread of the echo timings within this read (1 cm ~ 58 us)
+        if len(distances) > 1:
+            self.last_jitter_us = statistics.pstdev(distances) / self.SOUND_CM_PER_S * 1e6
+        else:
+            self.last_jitter_us = 0.0
         
         if not distances:
             logger.warning(
@@ -97,21 +209,66 @@ class UltrasonicSensor:
             return -1
         
         avg_distance = sum(distances) / len(distances)
-        logger.debug(f"Measured distance: {avg_distance:.2f} cm")
+        logger.debug(
+            f"Measured distance: {avg_distance:.2f} cm "
+            f"(jitter {self.last_jitter_us:.0f} us, timeouts {self.timeouts})"
+        )
         
         return avg_distance
     
-    def get_fill_level(self) -> float:
+    def measure_distance(self, samples: int = 3) -> float:
+        """
+        Measure distance to object
+        
+        Args:
+            samples: Number of measurements to average
+            
+        Returns:
+            Distance in centimeters
+        """
+        distances = []
+        
+        for i in range(samples):
+            distance = self.sample_once()
+            if distance is not None:
+                distances.append(distance)
+            
+            if i < samples - 1:
+                time.sleep(self.sample_gap)
+        
+        return self.combine_samples(distances)
+    
+    def apply_samples(self, distances: list) -> Optional[float]:
         """
-        Calculate bin fill percentage
+        Feed the raw samples of one read through the streaming filter
         
+        Args:
+            distances: Valid sample distances in cm (empty = failed read)
+            
         Returns:
-            Fill level as percentage (0-100)
+            Filtered distance in cm, or None while the estimate is invalid
         """
-        distance = self.measure_distance()
+        # Keeps jitter diagnostics and the missing-echo warning
+        self.combine_samples(distances)
         
-        if distance < 0:
-            return 0
+        if not distances:
+            return self.filter.update(None)
+        for distance in distances:
+            self.filter.update(distance)
+        return self.filter.value
+    
+    def fill_from_distance(self, distance: Optional[float]) -> Optional[float]:
+        """
+        Convert a measured distance to a fill percentage
+        
+        Args:
+            distance: Distance in cm (None or negative means no valid reading)
+            
+        Returns:
+            Fill level as percentage (0-100), or None if invalid
+        """
+        if distance is None or distance < 0:
+            return None
         
         fill_height = self.bin_depth - distance
         fill_percentage = (fill_height / self.bin_depth) * 100
@@ -121,6 +278,44 @@ class UltrasonicSensor:
         logger.info(f"Bin fill level: {fill_percentage:.1f}%")
         return fill_percentage
     
+    def get_fill_level(self, samples: int = 1) -> Optional[float]:
+        """
+        Calculate bin fill percentage from the filtered distance
+        
+        Args:
+            samples: Physical samples to take for this read
+            
+        Returns:
+            Fill level as percentage (0-100), or None if the sensor has no
+            valid reading (a failed read is never reported as empty)
+        """
+        distances = []
+        for i in range(samples):
+            distance = self.sample_once()
+            if distance is not None:
+                distances.append(distance)
+            if i < samples - 1:
+                time.sleep(self.sample_gap)
+        
+        return self.fill_from_distance(self.apply_samples(distances))
+    
+    def timing_stats(self) -> dict:
+        """
+        Ranging diagnostics
+        
+        Returns:
+            Dictionary with mode, cumulative timeouts, echo jitter across
+            recent reads (from the filter's ring buffer, None until it
+            holds two samples) and jitter within the last read
+        """
+        spread = self.filter.spread()
+        return {
+            'mode': self.mode,
+            'timeouts': self.timeouts,
+            'jitter_us': None if spread is None else round(spread / self.SOUND_CM_PER_S * 1e6, 1),
+            'read_jitter_us': round(self.last_jitter_us, 1),
+        }
+    
     def is_full(self, threshold: float = 80.0) -> bool:
         """
         Check if bin is full
@@ -132,37 +327,191 @@ class UltrasonicSensor:
             True if bin is full
         """
         fill_level = self.get_fill_level()
-        return fill_level >= threshold
+        return fill_level is not None and fill_level >= threshold
 
 
 class MultiBinMonitor:
-    """Monitors multiple bins with ultrasonic sensors"""
+    """
+    Monitors multiple bins with ultrasonic sensors
+    
+    Sensors are fired in time slots: sensors in the same slot range in
+    parallel, sensors that can hear each other's pings (interference
+    groups) are placed in different slots and staggered by the echo
+    die-out gap.
+    """
     
-    def __init__(self, bin_configs: dict):
+    def __init__(self, bin_configs: dict, mode: str = 'edge', sample_timeout: float = 0.03,
+                 interference_groups=None, samples=1, sample_gap: float = 0.05,
+                 max_sweep_time: float = 1.0, filter_options: Optional[dict] = None):
         """
         Initialize multiple bin monitors
         
         Args:
             bin_configs: Dict mapping bin names to (trigger_pin, echo_pin, depth) tuples
+            mode: Ranging mode for all sensors ('edge' or 'poll')
+            sample_timeout: Per-sample echo timeout in seconds (edge mode)
+            interference_groups: Lists of bin names whose sensors must not fire together
+            samples: Samples per bin per sweep; int or dict of bin name -> int
+            sample_gap: Seconds between slots so echoes die out
+            max_sweep_time: Bound on a sweep; no new sample round starts after it
+            filter_options: Keyword arguments for each sensor's StreamingDistanceFilter
         """
         self.sensors = {}
         
         for bin_name, (trigger, echo, depth) in bin_configs.items():
-            self.sensors[bin_name] = UltrasonicSensor(trigger, echo, depth)
+            self.sensors[bin_name] = UltrasonicSensor(
+                trigger, echo, depth, mode=mode, sample_timeout=sample_timeout,
+                sample_gap=sample_gap,
+                distance_filter=StreamingDistanceFilter(**(filter_options or {})),
+            )
             logger.info(f"Initialized sensor for {bin_name} bin")
+        
+        self.sample_gap = sample_gap
+        self.max_sweep_time = max_sweep_time
+        self.set_sample_budget(samples)
+        self.slots = self._build_slots(interference_groups or [])
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.sensors)), thread_name_prefix="ultrasonic"
+        )
+        
+        self.last_sweep_time = 0.0
+        self.last_samples = {}  # raw samples of the last sweep, for session recording
+        self.invalid_bins = []
+        self.levels = {name: None for name in self.sensors}
+        logger.info(f"Ultrasonic schedule: {self.slots}")
     
-    def get_all_fill_levels(self) -> dict:
+    def set_sample_budget(self, samples):
         """
-        Get fill levels for all bins
+        Set samples per bin per sweep
         
+        Args:
+            samples: int for every bin, or dict of bin name -> int
+        """
+        if isinstance(samples, dict):
+            self.samples = {name: max(1, int(samples.get(name, 1))) for name in self.sensors}
+        else:
+            self.samples = {name: max(1, int(samples)) for name in self.sensors}
+    
+    def _build_slots(self, interference_groups) -> list:
+        """Greedy coloring: put each sensor in the first slot with no interfering sensor"""
+        groups = [set(group) for group in interference_groups]
+        
+        def interferes(a, b):
+            return any(a in group and b in group for group in groups)
+        
+        slots = []
+        for name in self.sensors:
+            for slot in slots:
+                if not any(interferes(name, other) for other in slot):
+                    slot.append(name)
+                    break
+            else:
+                slots.append([name])
+        return slots
+    
+    def _fire_slot(self, names: list) -> dict:
+        """Take one sample from each sensor in the slot concurrently"""
+        if len(names) == 1:
+            return {names[0]: self.sensors[names[0]].sample_once()}
+        futures = {name: self._executor.submit(self.sensors[name].sample_once) for name in names}
+        return {name: future.result() for name, future in futures.items()}
+    
+    def sweep_distances(self, names=None) -> dict:
+        """
+        Run one scheduled sweep over all sensors (or a subset)
+        
+        Args:
+            names: Bin names to sample (None = all)
+            
+        Returns:
+            Dictionary mapping the swept bin names to filtered distances in cm
+            (None while a sensor's estimate is invalid)
+        """
+        start = time.monotonic()
+        wanted = set(self.sensors if names is None else names) & set(self.sensors)
+        collected = {name: [] for name in self.sensors if name in wanted}
+        rounds = max((self.samples[name] for name in collected), default=0)
+        slots = [[name for name in slot if name in wanted] for slot in self.slots]
+        slots = [slot for slot in slots if slot]
+        
+        for r in range(rounds):
+            # Every bin gets at least one round; later rounds are skipped if
+            # they would push the sweep past its latency bound.
+            if r > 0 and time.monotonic() - start >= self.max_sweep_time:
+                logger.debug(f"Sweep budget exhausted after {r} round(s)")
+                break
+            
+            for i, slot in enumerate(slots):
+                due = [name for name in slot if self.samples[name] > r]
+                if not due:
+                    continue
+                for name, distance in self._fire_slot(due).items():
+                    if distance is not None:
+                        collected[name].append(distance)
+                
+                last = r == rounds - 1 and i == len(slots) - 1
+                if not last:
+                    time.sleep(self.sample_gap)
+        
+        self.last_samples = collected
+        distances = self._apply_sweep(collected)
+        
+        self.last_sweep_time = time.monotonic() - start
+        logger.debug(f"Bin sweep took {self.last_sweep_time * 1000:.0f} ms")
+        return distances
+    
+    def _apply_sweep(self, collected: dict) -> dict:
+        """Filter the raw samples of one sweep and track invalid bins"""
+        distances = {name: self.sensors[name].apply_samples(samples)
+                     for name, samples in collected.items()}
+        for name, distance in distances.items():
+            if distance is None and name not in self.invalid_bins:
+                self.invalid_bins.append(name)
+            elif distance is not None and name in self.invalid_bins:
+                self.invalid_bins.remove(name)
+        return distances
+    
+    def replay_samples(self, collected: dict) -> dict:
+        """
+        Feed recorded raw samples through the filters instead of ranging
+        
+        Args:
+            collected: Bin name -> list of sample distances in cm
+            
         Returns:
             Dictionary mapping bin names to fill percentages
         """
-        levels = {}
-        for bin_name, sensor in self.sensors.items():
-            levels[bin_name] = sensor.get_fill_level()
+        collected = {name: samples for name, samples in collected.items() if name in self.sensors}
+        for bin_name, distance in self._apply_sweep(collected).items():
+            self.levels[bin_name] = self.sensors[bin_name].fill_from_distance(distance)
+        return dict(self.levels)
+    
+    def get_all_fill_levels(self, names=None) -> dict:
+        """
+        Get fill levels for all bins
         
-        return levels
+        Args:
+            names: Bins to re-sample (None = all); the others keep their
+                   last known level
+            
+        Returns:
+            Dictionary mapping bin names to fill percentages
+            (None for bins without a valid reading)
+        """
+        distances = self.sweep_distances(names)
+        for bin_name, distance in distances.items():
+            self.levels[bin_name] = self.sensors[bin_name].fill_from_distance(distance)
+        return dict(self.levels)
+    
+    def timing_stats(self) -> dict:
+        """Ranging diagnostics per bin (see UltrasonicSensor.timing_stats)"""
+        return {name: sensor.timing_stats() for name, sensor in self.sensors.items()}
+    
+    def max_jitter_us(self) -> Optional[float]:
+        """Worst echo jitter across bins, or None before any bin has one"""
+        jitters = [stats['jitter_us'] for stats in self.timing_stats().values()
+                   if stats['jitter_us'] is not None]
+        return max(jitters, default=None)
     
     def check_any_full(self, threshold: float = 80.0) -> list:
         """
@@ -4,21 +4,39 @@ Orchestrates all system components
 """
 
 import logging
+import os
 import time
 import signal
 import sys
-from threading import Thread
+from threading import Lock, Thread
 
 import cv2
 
-from config import get_config
+from config import (get_config, parse_brokers, parse_interference_groups, parse_sample_budget,
+                    parse_topic_policies)
+from detection.frame_source import create_frame_source
 from detection.heuristic_model import HeuristicWasteClassifier
 from detection.inference import InferencePipeline
+from detection.motion import MotionTrigger
+from detection.result_cache import CachedDetector, ResultCache
 from detection.preprocessing import preprocess_for_inference
+from detection.voting import TemporalVoter
+from hardware.actuation import ActuationWorker
+from hardware.fill_forecast import FillForecaster
+from hardware.sampling import AdaptiveSampler
 from hardware.servo_control import BinServoController
 from hardware.ultrasonic import MultiBinMonitor
+from hardware.backend import is_simulated
 from hardware.gpio_setup import GPIOConfig
+from hardware.ir_sensor import IRSensor
+from mqtt.commands import CommandDispatcher
 from mqtt.mqtt_publish import MQTTPublisher
+from mqtt.offline_queue import OfflineQueue
+from mqtt.status_gate import BinStatusGate
+from session.recorder import SessionRecorder
+from telemetry.metrics import MetricsRegistry
+from telemetry.metrics_server import MetricsServer
+from telemetry.tracing import CURRENT_TRACE, TraceLogFilter, Tracer
 
 # Load configuration
 config = get_config()
@@ -26,38 +44,272 @@ config = get_config()
 # Setup logging
 logging.basicConfig(
     level=getattr(logging, config.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - %(trace)s%(message)s'
 )
+# Prefix log lines with the trace ID of the item being processed
+for _handler in logging.getLogger().handlers:
+    _handler.addFilter(TraceLogFilter())
 logger = logging.getLogger(__name__)
 
+# Longest a remote detector switch waits for the current item (seconds)
+DETECTOR_SWAP_TIMEOUT = 10.0
+# Longest a remote door command waits for queued routing (seconds)
+DOOR_COMMAND_TIMEOUT = 30.0
+
 
 class SmartBinSystem:
     """Main system orchestrator"""
     
-    def __init__(self):
-        """Initialize all system components"""
+    def __init__(self, offline: bool = False):
+        """
+        Initialize all system components
+        
+        Args:
+            offline: Never connect to the MQTT broker (session replay);
+                     publishes are dropped
+        """
         logger.info("Initializing Smart Bin System")
         
+        # Per-stage latency histograms (served on /metrics)
+        self.metrics = MetricsRegistry()
+        self.metrics_server = None
+        if config.METRICS_PORT > 0:
+            self.metrics_server = MetricsServer(self.metrics, host=config.METRICS_HOST, port=config.METRICS_PORT)
+        
+        # Trace ID and span timings per item (see telemetry/waterfall.py)
+        self.tracer = Tracer(
+            dump_path=config.TRACE_DUMP or None,
+            max_bytes=config.TRACE_DUMP_MAX_BYTES,
+            metrics=self.metrics,
+        )
+        
         # Initialize GPIO
         GPIOConfig.initialize()
         GPIOConfig.setup_leds()
         
         # Initialize detector (YOLO, TFLite, or heuristic)
-        det_type = getattr(config, "DETECTOR_TYPE", "tflite").lower()
-
+        self.result_cache = None
+        self.detector = self._create_detector(getattr(config, "DETECTOR_TYPE", "tflite"))
+        
+        # Camera, or a recorded/synthetic source for offline runs
+        source_spec = config.FRAME_SOURCE
+        if source_spec == 'camera':
+            source_spec = f"camera:{config.CAMERA_ID}"
+        self.camera = InferencePipeline(
+            camera_id=config.CAMERA_ID,
+            resolution=config.CAMERA_RESOLUTION,
+            threaded=config.CAMERA_THREADED,
+            source=create_frame_source(
+                source_spec,
+                resolution=config.CAMERA_RESOLUTION,
+                pacing=config.FRAME_PACING,
+                fps=config.FRAME_FPS or None,
+                loop=config.FRAME_LOOP,
+            ),
+        )
+        
+        # Multi-servo setup: one motor per bin door
+        self.servo = BinServoController(
+            dry_pin=GPIOConfig.SERVO_DRY_PIN,
+            wet_pin=GPIOConfig.SERVO_WET_PIN,
+            electronic_pin=GPIOConfig.SERVO_ELECTRONIC_PIN,
+            unknown_pin=GPIOConfig.SERVO_UNKNOWN_PIN,
+            speed=config.SERVO_SPEED,
+            exclusive_groups=config.SERVO_EXCLUSIVE_GROUPS,
+            max_concurrent=config.SERVO_MAX_CONCURRENT,
+        )
+        
+        # Door sequencing runs on its own thread so detection never waits
+        # for servo motion or the drop dwell
+        self.actuator = ActuationWorker(
+            self.servo,
+            dwell=config.SERVO_DWELL,
+            max_pending=config.ACTUATION_QUEUE_SIZE,
+            metrics=self.metrics,
+            on_complete=self._on_item_deposited,
+        )
+        
+        self.bin_monitor = MultiBinMonitor(
+            GPIOConfig.get_bin_sensors(),
+            mode=config.ULTRASONIC_MODE,
+            sample_timeout=config.ULTRASONIC_SAMPLE_TIMEOUT,
+            interference_groups=parse_interference_groups(
+                config.ULTRASONIC_INTERFERENCE_GROUPS, GPIOConfig.get_bin_sensors()
+            ),
+            samples=parse_sample_budget(config.ULTRASONIC_SAMPLES),
+            sample_gap=config.ULTRASONIC_SAMPLE_GAP,
+            max_sweep_time=config.ULTRASONIC_MAX_SWEEP_TIME,
+            filter_options={
+                'window': config.ULTRASONIC_FILTER_WINDOW,
+                'alpha': config.ULTRASONIC_FILTER_ALPHA,
+                'max_jump': config.ULTRASONIC_OUTLIER_CM,
+            },
+        )
+        
+        # Read bins soon after deposits, back off while they are idle
+        self.bin_sampler = AdaptiveSampler(
+            self.bin_monitor.sensors,
+            base_interval=config.BIN_STATUS_INTERVAL,
+            max_interval=config.BIN_SAMPLE_MAX_INTERVAL,
+            backoff=config.BIN_SAMPLE_BACKOFF,
+            settle_delay=config.BIN_SAMPLE_SETTLE,
+            full_threshold=config.BIN_FULL_THRESHOLD,
+            near_full_margin=config.BIN_SAMPLE_NEAR_FULL_MARGIN,
+            near_full_interval=config.BIN_SAMPLE_NEAR_FULL_INTERVAL,
+        )
+        
+        self.fill_forecast = FillForecaster(
+            self.bin_monitor.sensors,
+            alpha=config.FORECAST_ALPHA,
+            beta=config.FORECAST_BETA,
+            full_threshold=config.BIN_FULL_THRESHOLD,
+        )
+        
+        offline_queue = None
+        if config.MQTT_QUEUE_SIZE > 0:
+            offline_queue = OfflineQueue(
+                config.MQTT_QUEUE_DIR,
+                max_messages=config.MQTT_QUEUE_SIZE,
+                policies=parse_topic_policies(config.MQTT_QUEUE_POLICIES),
+            )
+        
+        brokers = [(config.MQTT_BROKER, config.MQTT_PORT)]
+        if config.MQTT_LOCAL_FIRST:
+            brokers.insert(0, ('localhost', config.MQTT_PORT))
+        brokers += parse_brokers(config.MQTT_FALLBACK_BROKERS, config.MQTT_PORT)
+        brokers = list(dict.fromkeys(brokers))
+        
+        self.mqtt = MQTTPublisher(
+            broker=brokers[0][0],
+            port=brokers[0][1],
+            client_id=config.MQTT_CLIENT_ID,
+            offline_queue=offline_queue,
+            replay_rate=config.MQTT_REPLAY_RATE,
+            batch_topics=config.MQTT_BATCH_TOPICS,
+            batch_window=config.MQTT_BATCH_WINDOW,
+            batch_max=config.MQTT_BATCH_MAX,
+            fallback_brokers=brokers[1:],
+            reconnect_min_delay=config.MQTT_RECONNECT_MIN_DELAY,
+            reconnect_max_delay=config.MQTT_RECONNECT_MAX_DELAY,
+            # Simulated bins must never pass for real fill levels on the dashboard
+            status_fields={'simulated': True} if is_simulated() else None,
+        )
+        self.status_gate = BinStatusGate(
+            deadband=config.BIN_STATUS_DEADBAND,
+            full_threshold=config.BIN_FULL_THRESHOLD,
+            hysteresis=config.BIN_FULL_HYSTERESIS,
+            heartbeat=config.BIN_STATUS_HEARTBEAT,
+        )
+        
+        self.metrics.gauge(
+            'mqtt_queue_depth',
+            lambda: self.mqtt.queue_stats().get('depth'),
+            'Messages waiting in the offline MQTT queue',
+        )
+        self.metrics.gauge(
+            'mqtt_connected',
+            lambda: int(self.mqtt.connected),
+            '1 while connected to the MQTT broker',
+        )
+        self.metrics.gauge(
+            'actuation_queue_depth',
+            lambda: self.actuator.stats()['pending'],
+            'Routing commands waiting for a door',
+        )
+        self.metrics.gauge(
+            'ultrasonic_jitter_us',
+            self.bin_monitor.max_jitter_us,
+            'Worst echo timing jitter across recent bin reads (microseconds)',
+        )
+        self.metrics.gauge(
+            'ultrasonic_timeouts',
+            lambda: sum(stats['timeouts'] for stats in self.bin_monitor.timing_stats().values()),
+            'Echoes that never arrived, all bins',
+        )
+        
+        # Optional session recording for offline replay (see session/replay.py)
+        self.recorder = None
+        if config.SESSION_RECORD_DIR:
+            self.recorder = SessionRecorder(
+                os.path.join(config.SESSION_RECORD_DIR, f"session-{time.strftime('%Y%m%d-%H%M%S')}.sbs"),
+                bins=list(self.bin_monitor.sensors),
+                frame_format=config.SESSION_FRAME_FORMAT,
+                jpeg_quality=config.SESSION_JPEG_QUALITY,
+                metadata={'config': {
+                    key: getattr(config, key) for key in dir(config)
+                    if key.isupper() and isinstance(getattr(config, key), (str, int, float, bool, list, tuple))
+                }},
+            )
+        
+        # Trigger: manual spacebar capture, or automatic motion gating
+        # optionally armed by the IR sensor.
+        self.trigger_mode = config.TRIGGER_MODE
+        self.motion_trigger = None
+        self.ir_sensor = None
+        
+        if self.trigger_mode == 'auto':
+            self.motion_trigger = MotionTrigger(
+                enter_fraction=config.MOTION_ENTER_FRACTION,
+                settle_frames=config.MOTION_SETTLE_FRAMES,
+                on_enter=self._on_scene_change,
+            )
+            if config.USE_IR_TRIGGER:
+                self.ir_sensor = IRSensor(
+                    GPIOConfig.IR_SENSOR_PIN,
+                    callback=self.motion_trigger.notify_ir,
+                )
+        
+        # Remote control on smartbin/commands
+        self.commands = None
+        if config.COMMANDS_ENABLED:
+            self.commands = CommandDispatcher(self.mqtt, max_pending=config.COMMAND_QUEUE_SIZE)
+            self.commands.register('capture', self._cmd_capture)
+            self.commands.register('sweep', self._cmd_sweep)
+            self.commands.register('threshold', self._cmd_threshold)
+            self.commands.register('door', self._cmd_door)
+            self.commands.register('detector', self._cmd_detector)
+        
+        # System state; one item at a time (the detector and a direct
+        # camera read are not safe to use from two threads)
+        self.running = False
+        self._item_lock = Lock()
+        
+        # Connect to MQTT in the background; a down broker must not block
+        # startup (messages are queued until it comes back)
+        if offline:
+            logger.info("Offline mode, not connecting to MQTT")
+        else:
+            self.mqtt.connect()
+            if not self.mqtt.wait_ready(config.MQTT_CONNECT_TIMEOUT):
+                logger.warning("MQTT broker not reachable yet, continuing offline")
+        
+        logger.info("System initialization complete")
+    
+    def _create_detector(self, det_type: str):
+        """
+        Build a detector (YOLO, TFLite, or heuristic)
+        
+        Args:
+            det_type: 'yolo', 'heuristic' or 'tflite'
+            
+        Returns:
+            Detector, wrapped in the result cache when enabled
+        """
+        det_type = det_type.lower()
+        
         if det_type == "yolo":
             # Lazy import so Raspberry Pi can run TFLite / heuristic
             # without requiring ultralytics to be installed
             from detection.yolo_model import WasteDetector
 
             logger.info("Detector: YOLO")
-            self.detector = WasteDetector(
+            detector = WasteDetector(
                 model_path=config.MODEL_PATH,
                 conf_threshold=config.CONFIDENCE_THRESHOLD,
             )
         elif det_type == "heuristic":
             logger.info("Detector: Heuristic (no ML, OpenCV only)")
-            self.detector = HeuristicWasteClassifier(
+            detector = HeuristicWasteClassifier(
                 conf_threshold=config.CONFIDENCE_THRESHOLD,
             )
         else:
@@ -66,47 +318,31 @@ class SmartBinSystem:
             from detection.tflite_model import TFLiteWasteClassifier
 
             logger.info("Detector: TFLite")
-            self.detector = TFLiteWasteClassifier(
+            detector = TFLiteWasteClassifier(
                 model_path=config.TFLITE_MODEL_PATH,
                 labels_path=config.TFLITE_LABELS_PATH,
                 input_size=config.TFLITE_INPUT_SIZE,
                 conf_threshold=config.CONFIDENCE_THRESHOLD,
+                num_threads=config.TFLITE_NUM_THREADS,
+                delegate=config.TFLITE_DELEGATE,
             )
         
-        self.camera = InferencePipeline(
-            camera_id=config.CAMERA_ID,
-            resolution=config.CAMERA_RESOLUTION
-        )
+        # Reuse results for near-identical frames (item sitting in view)
+        if config.RESULT_CACHE_SIZE > 0:
+            if self.result_cache is None:
+                self.result_cache = ResultCache(
+                    max_entries=config.RESULT_CACHE_SIZE,
+                    max_distance=config.RESULT_CACHE_MAX_DISTANCE,
+                    ttl=config.RESULT_CACHE_TTL,
+                )
+            detector = CachedDetector(detector, self.result_cache)
         
-        # Multi-servo setup: one motor per bin door
-        self.servo = BinServoController(
-            dry_pin=GPIOConfig.SERVO_DRY_PIN,
-            wet_pin=GPIOConfig.SERVO_WET_PIN,
-            electronic_pin=GPIOConfig.SERVO_ELECTRONIC_PIN,
-            unknown_pin=GPIOConfig.SERVO_UNKNOWN_PIN,
-            speed=config.SERVO_SPEED,
-        )
-        
-        self.bin_monitor = MultiBinMonitor(GPIOConfig.get_bin_sensors())
-        
-        self.mqtt = MQTTPublisher(
-            broker=config.MQTT_BROKER,
-            port=config.MQTT_PORT,
-            client_id=config.MQTT_CLIENT_ID
-        )
-        
-        # IR sensor removed – system now uses manual camera trigger
-        # via keyboard (spacebar) instead of hardware IR detection.
-        
-        # System state
-        self.running = False
-        self.processing = False
-        
-        # Connect to MQTT
-        self.mqtt.connect()
-        time.sleep(2)
-        
-        logger.info("System initialization complete")
+        return detector
+    
+    @property
+    def processing(self) -> bool:
+        """True while an item is being classified"""
+        return self._item_lock.locked()
     
     def on_object_detected(self):
         """Callback when IR sensor detects object"""
@@ -115,137 +351,502 @@ class SmartBinSystem:
             return
         
         logger.info("Object detected - starting detection")
-        self.process_waste()
+        self.process_waste(trigger='ir')
+    
+    def _on_item_deposited(self, destination):
+        """Actuation callback: the door has closed, re-read that bin once it settles"""
+        self.bin_sampler.notify_deposit(destination)
+        # The item has dropped out of view
+        self._on_scene_change()
     
-    def process_waste(self, frame=None):
-        """Main waste processing pipeline
+    def _on_scene_change(self):
+        """
+        The scene in front of the camera changed (an item entered or was
+        deposited): cached results are scoped to one scene, so a look-alike
+        next item is classified afresh. Repeated triggers on the item still
+        in view (IR bounce, double press, remote capture, a jammed door)
+        keep hitting the cache until then.
+        """
+        if self.result_cache is not None:
+            self.result_cache.clear()
+    
+    def process_waste(self, frame=None, captured_at=None, trigger='', sequence=0):
+        """
+        Process one item unless another one is already in progress
+        
+        Triggers can race (IR callback, capture loops, remote commands);
+        the loser is dropped rather than queued.
+        
+        Returns:
+            Detection summary, or None if nothing was classified or the
+            system was busy
+        """
+        if not self._item_lock.acquire(blocking=False):
+            logger.info("Already processing, ignoring trigger")
+            return None
+        try:
+            return self._process_item(frame, captured_at, trigger, sequence)
+        finally:
+            self._item_lock.release()
+    
+    def _process_item(self, frame=None, captured_at=None, trigger='', sequence=0):
+        """Main waste processing pipeline (caller holds the item lock)
         
         Args:
             frame: Optional pre-captured frame to use. If None,
                    a new frame will be captured from the camera.
+            captured_at: time.monotonic() when ``frame`` was captured
+            trigger: What started processing (ir, motion, manual, command)
+            sequence: Camera sequence number of ``frame``, so a burst
+                   never classifies the same frame twice
+                   
+        Returns:
+            Detection summary, or None if nothing was classified
         """
-        self.processing = True
         GPIOConfig.set_status_led(True)
+        started = time.perf_counter()
+        
+        # The trace follows the item to the actuation worker, which ends it
+        # once the door has closed
+        trace = self.tracer.start(trigger)
+        routed = False
+        trace_token = CURRENT_TRACE.set(trace)
+        if self.recorder is not None:
+            self.recorder.event('trigger', trace=trace.id, trigger=trigger)
         
         try:
             # Capture frame only if one wasn't provided (e.g. manual trigger)
             if frame is None:
                 logger.info("Capturing frame")
-                frame = self.camera.capture_frame()
+                with trace.span('capture'):
+                    captured = self.camera.read_latest()
+                if captured is not None:
+                    frame, sequence = captured.frame, captured.sequence
             else:
                 logger.info("Using provided frame for processing")
+                if captured_at is not None:
+                    trace.add_span('frame_age', captured_at, trace.start)
             
             if frame is None:
                 logger.error("Failed to capture frame")
+                trace.end(error='capture failed')
                 return
             
-            # Preprocess if enabled
-            if config.ENABLE_PREPROCESSING:
-                frame = preprocess_for_inference(frame, resize=True, enhance=True)
-            
-            # Run detection
+            # Run detection (single frame, or a fused burst of frames)
             logger.info("Running waste detection")
-            detections = self.detector.detect(frame)
+            burst = None
+            if config.BURST_FRAMES > 1:
+                detections, burst = self._classify_burst(frame, trace, sequence)
+            else:
+                detections = self._detect(frame, trace)
+            
+            if self.result_cache is not None:
+                logger.debug(f"Result cache: {self.result_cache.stats()}")
             
             # Get detection summary
-            summary = self.detector.get_detection_summary(detections)
+            with trace.span('summary'):
+                summary = self.detector.get_detection_summary(detections)
+            if burst is not None:
+                summary['burst'] = burst
+            summary['trace'] = trace.payload()
+            if self.recorder is not None:
+                self.recorder.event(
+                    'decision',
+                    trace=trace.id,
+                    destination=summary['destination'],
+                    objects=summary['objects'],
+                )
             
             # Publish to MQTT
-            self.mqtt.publish_detection(summary)
+            with trace.span('mqtt_publish'):
+                self.mqtt.publish_detection(summary)
             
             # Control servo based on detection
             destination = summary['destination']
             
             if destination != 'none':
                 logger.info(f"Routing to: {destination}")
-                self.servo.route_to_bin(destination)
-                time.sleep(2)  # Allow time for waste to drop
-                self.servo.reset()
+                routed = self.actuator.submit(destination, trace=trace)
             else:
                 logger.info("No objects detected")
             
             GPIOConfig.set_status_led(False)
+            self.metrics.observe('stage_seconds', time.perf_counter() - started, stage='process')
+            if not routed:
+                trace.end(destination=destination)
+            return summary
             
         except Exception as e:
             logger.error(f"Processing error: {e}")
+            trace.end(error=str(e))
             GPIOConfig.set_error_led(True)
             self.mqtt.publish_system_status('error', str(e))
             time.sleep(1)
             GPIOConfig.set_error_led(False)
         
         finally:
-            self.processing = False
+            CURRENT_TRACE.reset(trace_token)
+    
+    def _prepare_frame(self, frame):
+        """Apply optional preprocessing before inference"""
+        if config.ENABLE_PREPROCESSING:
+            frame = preprocess_for_inference(frame, resize=True, enhance=True)
+        return frame
+    
+    def _detect(self, frame, trace, cached=True):
+        """
+        Preprocess and classify one frame, timing both stages
+        
+        Args:
+            frame: Frame to classify
+            trace: Trace of the item being classified
+            cached: Allow a result cache hit (burst frames must not use it:
+                    they are near-identical by design and would only echo
+                    the first frame's result)
+        """
+        detector = self.detector
+        if not cached and isinstance(detector, CachedDetector):
+            detector = detector.detector
+        if self.recorder is not None:
+            self.recorder.frame(frame, trace.id)
+        with trace.span('preprocess'):
+            prepared = self._prepare_frame(frame)
+        with trace.span('inference'):
+            return detector.detect(prepared)
+    
+    def _classify_burst(self, frame, trace, sequence=0):
+        """
+        Classify up to BURST_FRAMES frames spread over BURST_WINDOW seconds
+        and fuse their scores.
+        
+        Stops after the first frame whose fused confidence clears the
+        detector threshold, so clean items cost a single inference.
+        Detectors that locate objects (YOLO boxes) skip the burst: fusing
+        them to one label would hide multi-object "processing" routing.
+        
+        Args:
+            frame: First frame of the burst
+            trace: Trace of the item being classified
+            sequence: Camera sequence number of ``frame``
+            
+        Returns:
+            (detections, burst payload) where detections holds the fused
+            top-1 result in the usual detector format (with probs/top_k
+            when the detector reports them); the payload is None when the
+            burst was skipped
+        """
+        voter = TemporalVoter(config.BURST_FUSION)
+        interval = config.BURST_WINDOW / max(1, config.BURST_FRAMES - 1)
+        fused = None
+        
+        for i in range(config.BURST_FRAMES):
+            if i > 0:
+                time.sleep(interval)
+                with trace.span('capture'):
+                    captured = self.camera.read_latest(after_sequence=sequence)
+                if captured is None:
+                    logger.warning("Burst capture failed, using frames collected so far")
+                    break
+                sequence = captured.sequence
+                frame = captured.frame
+            
+            detections = self._detect(frame, trace, cached=(i == 0))
+            if i == 0 and (len(detections) > 1 or any(d.get('bbox') is not None for d in detections)):
+                return detections, None
+            voter.add(detections)
+            fused = voter.result()
+            
+            if fused is not None and fused.confidence >= self.detector.conf_threshold:
+                break
+        
+        logger.info(
+            f"Burst fused {len(voter)} frame(s): "
+            f"{fused.label if fused else 'none'} ({fused.confidence if fused else 0.0})"
+        )
+        
+        if fused is None:
+            return [], voter.payload()
+        
+        return [fused.detection(top_k=getattr(self.detector, 'top_k', 3))], voter.payload()
     
     def monitor_bins(self):
         """Background thread for monitoring bin levels"""
         while self.running:
             try:
-                # Get fill levels
-                levels = self.bin_monitor.get_all_fill_levels()
-                
-                # Publish status
-                self.mqtt.publish_bin_status(levels)
-                
-                # Check for full bins using current readings (avoid re-triggering sensors)
-                full_bins = [
-                    bin_name
-                    for bin_name, level in levels.items()
-                    if level >= config.BIN_FULL_THRESHOLD
-                ]
-                
-                if full_bins:
-                    for bin_name in full_bins:
-                        self.mqtt.publish_system_status('alert', f'{bin_name} bin is full')
+                # Only re-sample the bins whose adaptive schedule is due;
+                # the others keep their last level
+                due = self.bin_sampler.due_bins()
+                if due:
+                    with self.metrics.timer('bin_sweep_seconds'):
+                        levels = self.bin_monitor.get_all_fill_levels(due)
+                    if self.recorder is not None:
+                        self.recorder.sensors(self.bin_monitor.last_samples)
+                    self.update_bin_levels(levels, {name: levels[name] for name in due})
+                else:
+                    self.update_bin_levels(dict(self.bin_monitor.levels))
                 
-                time.sleep(config.BIN_STATUS_INTERVAL)
+                # Sleep until the next bin is due, a deposit arrives, or the
+                # heartbeat (HEARTBEAT=0 disables it: no bound beyond the schedule)
+                self.bin_sampler.wait(max_wait=config.BIN_STATUS_HEARTBEAT or None)
                 
             except Exception as e:
                 logger.error(f"Bin monitoring error: {e}")
                 time.sleep(10)
     
+    def update_bin_levels(self, levels, sampled=None):
+        """
+        Feed new fill levels to the schedule and forecast, then publish
+        status and alerts when the gate says so
+        
+        Args:
+            levels: Latest fill percentage per bin (None = no valid reading)
+            sampled: The bins actually measured this time, if any
+            
+        Returns:
+            BinStatusGate decision
+        """
+        if sampled:
+            self.bin_sampler.record(sampled)
+            self.fill_forecast.update(sampled)
+            if self.recorder is not None:
+                self.recorder.event('levels', levels=sampled)
+        
+        # Only publish on meaningful change, threshold crossing or heartbeat;
+        # bins without a valid reading are neither full nor empty
+        decision = self.status_gate.update(levels)
+        
+        if decision.publish:
+            extra = {
+                'sweep_ms': round(self.bin_monitor.last_sweep_time * 1000, 1),
+                'invalid': self.bin_monitor.invalid_bins,
+                'full': sorted(self.status_gate.latched),
+                'reason': decision.reason,
+                'fill_rate': self.fill_forecast.fill_rates(),  # % per hour
+                'time_to_full': self.fill_forecast.time_to_full(),  # seconds
+            }
+            if decision.reason == 'heartbeat':
+                # Low-rate link and sensor health metrics ride along with the heartbeat
+                extra['mqtt_queue'] = self.mqtt.queue_stats()
+                extra['ranging'] = self.bin_monitor.timing_stats()
+            sent = self.mqtt.publish_bin_status(levels, extra=extra)
+            if not sent:
+                self.status_gate.invalidate()
+        
+        # Alerts are latched: raised once, cleared once the bin is emptied.
+        # An alert that could not be sent or queued is retried next update.
+        for bin_name in decision.raised:
+            if not self.mqtt.publish_system_status('alert', f'{bin_name} bin is full'):
+                self.status_gate.revert_alert(bin_name)
+        for bin_name in decision.cleared:
+            if not self.mqtt.publish_system_status('alert_cleared', f'{bin_name} bin emptied'):
+                self.status_gate.revert_alert(bin_name)
+        
+        return decision
+    
+    def _cmd_capture(self, args):
+        """Remote command: capture and classify one item now"""
+        if not self._item_lock.acquire(blocking=False):
+            raise RuntimeError("already processing an item")
+        try:
+            summary = self._process_item(trigger='command')
+        finally:
+            self._item_lock.release()
+        if summary is None:
+            raise RuntimeError("capture failed")
+        return {'destination': summary['destination'], 'count': summary['count']}
+    
+    def _cmd_sweep(self, args):
+        """Remote command: read every bin now and publish the result"""
+        self.status_gate.invalidate()
+        self.bin_sampler.request_sweep()
+        return {'scheduled': sorted(self.bin_monitor.sensors)}
+    
+    def _cmd_threshold(self, args):
+        """Remote command: change the detection confidence threshold"""
+        value = float(args['value'])
+        if not 0.0 <= value <= 1.0:
+            raise ValueError("threshold must be between 0 and 1")
+        
+        # Set it on the real detector, not the cache wrapper
+        detector = self.detector
+        if isinstance(detector, CachedDetector):
+            detector = detector.detector
+        previous = detector.conf_threshold
+        detector.conf_threshold = value
+        if self.result_cache is not None:
+            self.result_cache.clear()
+        
+        logger.info(f"Confidence threshold {previous} -> {value}")
+        return {'previous': previous, 'value': value}
+    
+    def _cmd_door(self, args):
+        """Remote command: open or close one bin door"""
+        bin_type = args['bin']
+        action = args.get('action', 'open')
+        if bin_type not in self.servo.doors:
+            raise ValueError(f"unknown bin: {bin_type}")
+        
+        # Through the actuation queue: only the worker thread drives the
+        # doors, so a remote move never interleaves with routing
+        self.actuator.move_door(bin_type, action, timeout=DOOR_COMMAND_TIMEOUT)
+        return {'bin': bin_type, 'action': action}
+    
+    def _cmd_detector(self, args):
+        """Remote command: switch detector type without a restart"""
+        det_type = args['type'].lower()
+        if det_type not in ('tflite', 'heuristic', 'yolo'):
+            raise ValueError(f"unknown detector type: {det_type}")
+        
+        # Build first so a failed load leaves the current detector running
+        detector = self._create_detector(det_type)
+        
+        # Swap between items, never under an in-flight inference
+        if not self._item_lock.acquire(timeout=DETECTOR_SWAP_TIMEOUT):
+            raise RuntimeError("item still processing, detector not switched")
+        try:
+            previous = self.detector
+            if self.result_cache is not None:
+                self.result_cache.clear()
+            self.detector = detector
+        finally:
+            self._item_lock.release()
+        
+        # Free the old model (TFLite interpreter, delegate buffers)
+        if isinstance(previous, CachedDetector):
+            previous = previous.detector
+        if hasattr(previous, 'close'):
+            previous.close()
+        return {'type': det_type}
+    
     def manual_capture_loop(self):
         """
         Manual camera loop:
         - Shows live camera feed
         - Press SPACE to capture current frame and run detection
         - Press 'q' to quit the application
-        - After each detection, waits 10 seconds before resuming feed
+        - Detection runs on a background thread so the feed keeps updating;
+          SPACE is ignored until it has finished and CAPTURE_COOLDOWN
+          seconds have passed (door motion runs on the actuation worker)
         """
         window_name = "Smart Bin - Press SPACE to capture, Q to quit"
         logger.info("Starting manual capture loop (SPACE=capture, Q=quit)")
         
+        last_sequence = 0
+        classifier = None
+        ready_at = 0.0
+        
+        def classify(frame, captured_at, sequence):
+            nonlocal ready_at
+            try:
+                self.process_waste(frame, captured_at=captured_at, trigger='manual', sequence=sequence)
+            finally:
+                # Short pause before the next capture cycle
+                ready_at = time.monotonic() + config.CAPTURE_COOLDOWN
+                logger.info(
+                    f"Detection complete - next capture in {config.CAPTURE_COOLDOWN:.1f} seconds"
+                )
+        
         while self.running:
-            frame = self.camera.capture_frame()
+            # Wait for a frame we haven't shown yet instead of re-displaying
+            # the same buffered frame in a tight loop.
+            captured = self.camera.read_latest(after_sequence=last_sequence)
             
-            if frame is None:
+            if captured is None:
                 logger.error("Failed to read frame from camera in manual loop")
                 break
             
+            last_sequence = captured.sequence
+            frame = captured.frame
+            
             cv2.imshow(window_name, frame)
             key = cv2.waitKey(1) & 0xFF
             
             if key == ord(' '):
+                if (classifier is not None and classifier.is_alive()) or time.monotonic() < ready_at:
+                    logger.info("Spacebar pressed - still busy with the last item, ignored")
+                    continue
                 logger.info("Spacebar pressed - processing current frame")
-                cv2.destroyAllWindows()
-                self.process_waste(frame)
                 
-                # Wait 10 seconds before next capture cycle
-                logger.info("Detection complete - waiting 10 seconds before next capture")
-                for _ in range(10):
-                    if not self.running:
-                        break
-                    time.sleep(1)
+                # With the threaded grabber, classify the newest frame rather
+                # than the one that was on screen when the key was read.
+                captured_at = captured.timestamp
+                sequence = captured.sequence
+                if self.camera.threaded:
+                    latest = self.camera.read_latest()
+                    if latest is not None:
+                        logger.debug(
+                            f"Classifying frame #{latest.sequence} "
+                            f"(age {latest.age * 1000:.0f} ms)"
+                        )
+                        frame = latest.frame
+                        captured_at = latest.timestamp
+                        sequence = latest.sequence
                 
-                logger.info("Resuming camera preview")
-                # Loop continues and recreates window on next imshow
+                # Classify off the preview thread; the feed keeps running
+                classifier = Thread(target=classify, args=(frame, captured_at, sequence),
+                                    name="manual-classify", daemon=True)
+                classifier.start()
             
             elif key == ord('q'):
                 logger.info("Q pressed - exiting manual capture loop")
                 self.running = False
                 break
         
+        # Let an in-flight item finish before the system shuts down
+        if classifier is not None:
+            classifier.join(timeout=10)
         cv2.destroyAllWindows()
     
+    def auto_capture_loop(self):
+        """
+        Automatic (headless) loop:
+        - Checks frames at DETECTION_FPS with cheap motion gating
+        - Runs detection once an item has entered and settled
+        """
+        logger.info("Starting automatic capture loop (motion gating)")
+        
+        interval = 1.0 / max(1, config.DETECTION_FPS)
+        last_sequence = 0
+        
+        while self.running:
+            started = time.monotonic()
+            
+            captured = self.camera.read_latest(after_sequence=last_sequence)
+            if captured is None:
+                logger.error("Failed to read frame from camera in auto loop")
+                break
+            last_sequence = captured.sequence
+            
+            if self.motion_trigger.update(captured.frame) and not self.processing:
+                # Classify the newest frame, not the one used for gating
+                latest = self.camera.read_latest() if self.camera.threaded else None
+                chosen = latest if latest is not None else captured
+                self.process_waste(chosen.frame, captured_at=chosen.timestamp, trigger='motion',
+                                   sequence=chosen.sequence)
+            
+            remaining = interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+    
+    def report_metrics(self):
+        """Background thread: latency summary on smartbin/system every SYSTEM_STATUS_INTERVAL"""
+        while self.running:
+            deadline = time.monotonic() + config.SYSTEM_STATUS_INTERVAL
+            while self.running and time.monotonic() < deadline:
+                time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+            if not self.running:
+                break
+            
+            latency = self.metrics.summary('stage_seconds', 'stage')
+            sweep = self.metrics.summary('bin_sweep_seconds', 'stage')
+            if sweep:
+                latency['bin_sweep'] = sweep['']
+            self.mqtt.publish_system_status('metrics', 'Latency summary', extra={
+                'latency_ms': latency,
+                'actuation': self.actuator.stats(),
+                'mqtt_queue': self.mqtt.queue_stats(),
+            })
+    
     def run(self):
         """Start the system"""
         self.running = True
@@ -256,17 +857,29 @@ class SmartBinSystem:
         time.sleep(0.5)
         GPIOConfig.set_status_led(False)
         
+        self.actuator.start()
+        if self.commands is not None:
+            self.commands.start()
+        
         # Start bin monitoring thread
         monitor_thread = Thread(target=self.monitor_bins, daemon=True)
         monitor_thread.start()
         
-        logger.info(
-            "Smart Bin System running in manual camera mode - "
-            "press SPACE to capture, Q to quit"
-        )
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+        if config.METRICS_SUMMARY and config.SYSTEM_STATUS_INTERVAL > 0:
+            Thread(target=self.report_metrics, name="metrics-report", daemon=True).start()
         
         try:
-            self.manual_capture_loop()
+            if self.trigger_mode == 'auto':
+                logger.info("Smart Bin System running in automatic trigger mode")
+                self.auto_capture_loop()
+            else:
+                logger.info(
+                    "Smart Bin System running in manual camera mode - "
+                    "press SPACE to capture, Q to quit"
+                )
+                self.manual_capture_loop()
         except KeyboardInterrupt:
             logger.info("Shutdown requested")
         finally:
@@ -277,13 +890,22 @@ class SmartBinSystem:
         logger.info("Shutting down system")
         
         self.running = False
+        self.bin_sampler.stop()
+        if self.commands is not None:
+            self.commands.stop()
         
         # Publish shutdown status
         self.mqtt.publish_system_status('shutdown', 'System shutting down')
         
-        # Cleanup components
+        # Cleanup components (let queued doors finish first)
+        self.actuator.stop()
+        self.servo.reset()
         self.servo.cleanup()
         self.camera.release()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
         self.mqtt.disconnect()
         GPIOConfig.cleanup()
         
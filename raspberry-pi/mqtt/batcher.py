@@ -0,0 +1,117 @@
+"""
+Telemetry Batcher
+Coalesces MQTT messages per topic over a short window or size threshold
+"""
+
+import logging
+import time
+from threading import Condition, Thread
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MessageBatcher:
+    """
+    Per-topic batching with a time window and a size threshold.
+    
+    The first record of a topic opens its window; the batch is flushed
+    when the window expires or ``max_records`` is reached, whichever comes
+    first. Flushing happens on a background thread, never on the caller.
+    """
+    
+    def __init__(self, flush: Callable[[str, List[Tuple[int, Dict[str, Any]]]], None],
+                 window: float = 2.0, max_records: int = 20):
+        """
+        Initialize batcher
+        
+        Args:
+            flush: Called with (topic, [(epoch_ms, record), ...]) per batch
+            window: Maximum seconds a record waits before its batch is sent
+            max_records: Records per batch that trigger an immediate flush
+        """
+        self._flush = flush
+        self.window = window
+        self.max_records = max(1, max_records)
+        
+        self._pending: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._cond = Condition()
+        self._running = True
+        
+        # Metrics
+        self.records = 0
+        self.batches = 0
+        
+        self._thread = Thread(target=self._run, name="mqtt-batcher", daemon=True)
+        self._thread.start()
+    
+    def add(self, topic: str, record: Dict[str, Any], ts_ms: int):
+        """
+        Queue one record
+        
+        Args:
+            topic: Destination topic
+            record: Message body (without timestamp)
+            ts_ms: Event time in epoch milliseconds
+        """
+        with self._cond:
+            batch = self._pending.setdefault(topic, [])
+            if not batch:
+                self._deadlines[topic] = time.monotonic() + self.window
+            batch.append((ts_ms, record))
+            self.records += 1
+            if len(batch) >= self.max_records:
+                self._deadlines[topic] = 0.0
+            self._cond.notify()
+    
+    def _take_due(self) -> List[Tuple[str, list]]:
+        now = time.monotonic()
+        due = [topic for topic, deadline in self._deadlines.items() if deadline <= now]
+        batches = []
+        for topic in due:
+            del self._deadlines[topic]
+            batches.append((topic, self._pending.pop(topic)))
+        return batches
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    batches = self._take_due()
+                    if batches:
+                        break
+                    timeout = None
+                    if self._deadlines:
+                        timeout = max(0.0, min(self._deadlines.values()) - time.monotonic())
+                    self._cond.wait(timeout)
+                else:
+                    # Stopping: hand over whatever is left
+                    batches = list(self._pending.items())
+                    self._pending.clear()
+                    self._deadlines.clear()
+            
+            for topic, records in batches:
+                try:
+                    self._flush(topic, records)
+                    self.batches += 1
+                except Exception as e:
+                    logger.error(f"Batch flush failed for {topic}: {e}")
+            
+            if not self._running:
+                return
+    
+    def stats(self) -> dict:
+        """Records per batch achieved so far"""
+        return {
+            'records': self.records,
+            'batches': self.batches,
+            'records_per_batch': round(self.records / self.batches, 1) if self.batches else 0.0,
+        }
+    
+    def stop(self):
+        """Flush pending batches and stop the thread"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=2.0)
@@ -0,0 +1,193 @@
+"""
+Compact Telemetry Codec
+CBOR (RFC 8949) encoding for batched MQTT telemetry, with the matching
+decoder for consumers. Any standard CBOR library can also read batches.
+
+Batch layout (a CBOR map):
+    {'v': 1, 'topic': str, 't0': epoch_ms, 'r': [[dt_ms, record], ...]}
+
+Record timestamps are ``t0 + dt_ms``; records carry no ISO timestamp strings.
+Floats are sent as float32 (plenty for percentages and confidences).
+"""
+
+import struct
+import time
+from typing import Any, Dict, List, Tuple
+
+BATCH_VERSION = 1
+
+# CBOR major types
+_UINT, _NEGINT, _BYTES, _TEXT, _ARRAY, _MAP, _SIMPLE = 0, 1, 2, 3, 4, 5, 7
+
+
+def _head(major: int, value: int) -> bytes:
+    if value < 24:
+        return bytes([(major << 5) | value])
+    if value < 0x100:
+        return bytes([(major << 5) | 24, value])
+    if value < 0x10000:
+        return bytes([(major << 5) | 25]) + struct.pack('>H', value)
+    if value < 0x100000000:
+        return bytes([(major << 5) | 26]) + struct.pack('>I', value)
+    if value >= 0x10000000000000000:
+        raise ValueError(f"Integer out of CBOR range: {value}")
+    return bytes([(major << 5) | 27]) + struct.pack('>Q', value)
+
+
+def _encode(value: Any, out: bytearray):
+    if value is None:
+        out.append(0xf6)
+    elif value is True:
+        out.append(0xf5)
+    elif value is False:
+        out.append(0xf4)
+    elif isinstance(value, int):
+        if value >= 0:
+            out += _head(_UINT, value)
+        else:
+            out += _head(_NEGINT, -1 - value)
+    elif isinstance(value, float):
+        if value.is_integer() and abs(value) < 2 ** 53:
+            _encode(int(value), out)
+        else:
+            out.append(0xfa)
+            out += struct.pack('>f', value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        out += _head(_TEXT, len(data))
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        out += _head(_BYTES, len(value))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        out += _head(_ARRAY, len(value))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        out += _head(_MAP, len(value))
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out)
+    else:
+        # numpy scalars and the like
+        if hasattr(value, 'item'):
+            _encode(value.item(), out)
+        else:
+            _encode(str(value), out)
+
+
+def encode(value: Any) -> bytes:
+    """Encode a JSON-like value as CBOR"""
+    out = bytearray()
+    _encode(value, out)
+    return bytes(out)
+
+
+def _decode(data: bytes, pos: int) -> Tuple[Any, int]:
+    initial = data[pos]
+    pos += 1
+    major, info = initial >> 5, initial & 0x1f
+    
+    if major == _SIMPLE:
+        if info == 20:
+            return False, pos
+        if info == 21:
+            return True, pos
+        if info in (22, 23):
+            return None, pos
+        if info == 25:
+            return _half_to_float(struct.unpack_from('>H', data, pos)[0]), pos + 2
+        if info == 26:
+            return struct.unpack_from('>f', data, pos)[0], pos + 4
+        if info == 27:
+            return struct.unpack_from('>d', data, pos)[0], pos + 8
+        raise ValueError(f"Unsupported CBOR simple value {info}")
+    
+    if info < 24:
+        value = info
+    elif info == 24:
+        value, pos = data[pos], pos + 1
+    elif info == 25:
+        value, pos = struct.unpack_from('>H', data, pos)[0], pos + 2
+    elif info == 26:
+        value, pos = struct.unpack_from('>I', data, pos)[0], pos + 4
+    elif info == 27:
+        value, pos = struct.unpack_from('>Q', data, pos)[0], pos + 8
+    else:
+        raise ValueError("Indefinite-length CBOR items are not supported")
+    
+    if major == _UINT:
+        return value, pos
+    if major == _NEGINT:
+        return -1 - value, pos
+    if major == _BYTES:
+        return bytes(data[pos:pos + value]), pos + value
+    if major == _TEXT:
+        return data[pos:pos + value].decode('utf-8'), pos + value
+    if major == _ARRAY:
+        items = []
+        for _ in range(value):
+            item, pos = _decode(data, pos)
+            items.append(item)
+        return items, pos
+    if major == _MAP:
+        mapping = {}
+        for _ in range(value):
+            key, pos = _decode(data, pos)
+            mapping[key], pos = _decode(data, pos)
+        return mapping, pos
+    raise ValueError(f"Unsupported CBOR major type {major}")
+
+
+def _half_to_float(half: int) -> float:
+    return struct.unpack('>e', struct.pack('>H', half))[0]
+
+
+def decode(data: bytes) -> Any:
+    """Decode a CBOR payload produced by encode()"""
+    value, pos = _decode(data, 0)
+    if pos != len(data):
+        raise ValueError(f"Trailing bytes after CBOR item ({len(data) - pos})")
+    return value
+
+
+def epoch_ms() -> int:
+    """Current time in epoch milliseconds"""
+    return int(time.time() * 1000)
+
+
+def encode_batch(topic: str, records: List[Tuple[int, Dict[str, Any]]]) -> bytes:
+    """
+    Encode a batch of timestamped records
+    
+    Args:
+        topic: Topic the records belong to
+        records: (epoch_ms, record) pairs in publish order
+    
+    Returns:
+        CBOR payload
+    """
+    t0 = records[0][0] if records else epoch_ms()
+    return encode({
+        'v': BATCH_VERSION,
+        'topic': topic,
+        't0': t0,
+        'r': [[ts - t0, record] for ts, record in records],
+    })
+
+
+def decode_batch(payload: bytes) -> List[Dict[str, Any]]:
+    """
+    Decode a batch back into individual records
+    
+    Args:
+        payload: Payload from a ``<topic>/batch`` message
+    
+    Returns:
+        Records, each with its epoch-millisecond time under ``'ts'``
+    """
+    batch = decode(payload)
+    if batch.get('v') != BATCH_VERSION:
+        raise ValueError(f"Unsupported batch version: {batch.get('v')}")
+    t0 = batch['t0']
+    return [dict(record, ts=t0 + dt) for dt, record in batch['r']]
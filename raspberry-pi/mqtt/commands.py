@@ -0,0 +1,150 @@
+"""
+Remote Commands
+Receives operator commands on smartbin/commands and runs them off the
+MQTT network thread, acknowledging each one on smartbin/commands/ack
+"""
+
+import json
+import logging
+import queue
+import time
+from dataclasses import dataclass, field
+from threading import Thread
+from typing import Any, Callable, Dict, Optional
+
+from mqtt.topics import MQTTTopics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Command:
+    """One received command"""
+    id: str
+    name: str
+    args: Dict[str, Any] = field(default_factory=dict)
+    received_at: float = field(default_factory=time.monotonic)
+
+
+class CommandDispatcher:
+    """
+    Bounded command queue between the MQTT network thread and a worker.
+    
+    Message format::
+        
+        {"id": "op-42", "command": "threshold", "args": {"value": 0.7}}
+    
+    Handlers receive the ``args`` dict and return a JSON-serialisable
+    result; raising marks the command as failed. Unknown, malformed or
+    overflowing commands are rejected immediately.
+    """
+    
+    def __init__(self, publisher, topic: str = MQTTTopics.COMMANDS, max_pending: int = 16):
+        """
+        Initialize dispatcher
+        
+        Args:
+            publisher: MQTTPublisher used to subscribe and send acks
+            topic: Command topic
+            max_pending: Commands that may wait before new ones are rejected
+        """
+        self.publisher = publisher
+        self.topic = topic
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        
+        self._queue: "queue.Queue[Optional[Command]]" = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = None
+        
+        # Metrics
+        self.executed = 0
+        self.failed = 0
+        self.rejected = 0
+    
+    def register(self, name: str, handler: Callable[[Dict[str, Any]], Any]):
+        """
+        Register a command handler
+        
+        Args:
+            name: Command name
+            handler: Callable taking the args dict
+        """
+        self.handlers[name] = handler
+    
+    def start(self):
+        """Subscribe and start the worker thread"""
+        if self._thread is not None:
+            return
+        self._thread = Thread(target=self._run, name="mqtt-commands", daemon=True)
+        self._thread.start()
+        self.publisher.subscribe(self.topic, self._on_message, qos=1)
+        logger.info(f"Accepting commands: {sorted(self.handlers)}")
+    
+    def _ack(self, command_id: str, name: str, status: str, **fields):
+        self.publisher.publish_command_ack(dict(id=command_id, command=name, status=status, **fields))
+    
+    def _on_message(self, client, userdata, message):
+        """Paho callback (network thread): validate and enqueue only"""
+        try:
+            data = json.loads(message.payload)
+            name = data['command']
+            command = Command(id=str(data.get('id', '')), name=name, args=data.get('args') or {})
+        except (ValueError, KeyError, TypeError) as e:
+            self.rejected += 1
+            logger.warning(f"Malformed command: {e}")
+            self._ack('', '', 'rejected', error=f'malformed command: {e}')
+            return
+        
+        if command.name not in self.handlers:
+            self.rejected += 1
+            self._ack(command.id, command.name, 'rejected', error='unknown command')
+            return
+        if not isinstance(command.args, dict):
+            self.rejected += 1
+            self._ack(command.id, command.name, 'rejected', error='args must be an object')
+            return
+        
+        try:
+            self._queue.put_nowait(command)
+        except queue.Full:
+            self.rejected += 1
+            self._ack(command.id, command.name, 'rejected', error='command queue full')
+    
+    def _run(self):
+        while True:
+            command = self._queue.get()
+            if command is None:
+                return
+            
+            start = time.monotonic()
+            try:
+                result = self.handlers[command.name](command.args)
+                self.executed += 1
+                self._ack(command.id, command.name, 'ok', result=result,
+                          duration_ms=round((time.monotonic() - start) * 1000, 1))
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Command {command.name} failed: {e}")
+                self._ack(command.id, command.name, 'error', error=str(e))
+    
+    def stats(self) -> dict:
+        """Command counters"""
+        return {
+            'pending': self._queue.qsize(),
+            'executed': self.executed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+        }
+    
+    def stop(self):
+        """Stop the worker after the command in progress"""
+        if self._thread is None:
+            return
+        # Drop queued work; only the running command is allowed to finish
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+        self._thread = None
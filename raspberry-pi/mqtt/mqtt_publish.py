@@ -6,8 +6,15 @@ Publishes detection results and sensor data to MQTT broker
 import paho.mqtt.client as mqtt
 import json
 import logging
+import random
+import time
 from datetime import datetime
-from typing import Dict, Any
+from threading import Event, Thread
+from typing import Dict, Any, List, Optional, Tuple
+
+from mqtt.batcher import MessageBatcher
+from mqtt.codec import encode_batch, epoch_ms
+from mqtt.offline_queue import OfflineQueue
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +22,13 @@ logger = logging.getLogger(__name__)
 class MQTTPublisher:
     """Handles MQTT connection and message publishing"""
     
-    def __init__(self, broker: str, port: int = 1883, client_id: str = "smartbin_pi"):
+    def __init__(self, broker: str, port: int = 1883, client_id: str = "smartbin_pi",
+                 offline_queue: Optional[OfflineQueue] = None, replay_rate: float = 20.0,
+                 replay_ack_timeout: float = 5.0, batch_topics: Optional[List[str]] = None,
+                 batch_window: float = 2.0, batch_max: int = 20,
+                 fallback_brokers: Optional[List[Tuple[str, int]]] = None,
+                 reconnect_min_delay: float = 1.0, reconnect_max_delay: float = 60.0,
+                 status_fields: Optional[Dict[str, Any]] = None):
         """
         Initialize MQTT publisher
         
@@ -23,12 +36,52 @@ class MQTTPublisher:
             broker: MQTT broker address
             port: Broker port
             client_id: Unique client identifier
+            offline_queue: Store-and-forward queue for messages published while
+                           disconnected (None = drop them, as before)
+            replay_rate: Maximum replayed messages per second after reconnect
+            replay_ack_timeout: Seconds to wait for the broker to acknowledge a
+                                replayed QoS>0 message before pausing replay
+            batch_topics: Topics to coalesce into CBOR batches published on
+                          "<topic>/batch" (None/empty = plain JSON per message)
+            batch_window: Maximum seconds a message waits in a batch
+            batch_max: Messages per batch that trigger an immediate send
+            fallback_brokers: (host, port) pairs tried in order after the
+                              primary broker fails
+            reconnect_min_delay: First reconnect delay in seconds
+            reconnect_max_delay: Cap on the exponential reconnect delay
+            status_fields: Fields stamped on every bin and system status
+                           message (e.g. {'simulated': True})
         """
         self.broker = broker
         self.port = port
         self.client_id = client_id
         self.client = None
         self.connected = False
+        self.ready = Event()
+        self._subscriptions = {}  # topic -> qos, restored on every (re)connect
+        self.status_fields = dict(status_fields or {})
+        
+        # Brokers in preference order; the first is the primary
+        self.brokers = [(broker, port)] + [b for b in (fallback_brokers or []) if b != (broker, port)]
+        self._broker_index = 0
+        self.reconnect_min_delay = reconnect_min_delay
+        self.reconnect_max_delay = max(reconnect_min_delay, reconnect_max_delay)
+        self._attempt = 0
+        
+        self.queue = offline_queue
+        self.replay_rate = replay_rate
+        self.replay_ack_timeout = replay_ack_timeout
+        self._replay_wake = Event()
+        self._replay_thread = None
+        self._closing = False
+        
+        self.batch_topics = set(batch_topics or [])
+        self._batch_qos = {}
+        self.batcher = None
+        if self.batch_topics:
+            self.batcher = MessageBatcher(self._flush_batch, window=batch_window,
+                                          max_records=batch_max)
+            logger.info(f"Batching MQTT topics: {sorted(self.batch_topics)}")
         
         self._setup_client()
     
@@ -38,6 +91,8 @@ class MQTTPublisher:
             self.client = mqtt.Client(client_id=self.client_id)
             self.client.on_connect = self._on_connect
             self.client.on_disconnect = self._on_disconnect
+            self.client.on_connect_fail = self._on_connect_fail
+            self._schedule_retry()
             
             logger.info(f"MQTT client created: {self.client_id}")
         except Exception as e:
@@ -48,32 +103,193 @@ class MQTTPublisher:
         """Callback for successful connection"""
         if rc == 0:
             self.connected = True
+            self._attempt = 0
+            self._schedule_retry()
+            self.ready.set()
             logger.info(f"Connected to MQTT broker: {self.broker}:{self.port}")
+            for topic, qos in self._subscriptions.items():
+                client.subscribe(topic, qos=qos)
+            # Replay runs on its own thread; never block the network loop here
+            self._replay_wake.set()
         else:
             logger.error(f"Connection failed with code {rc}")
+            self._next_broker()
     
     def _on_disconnect(self, client, userdata, rc):
         """Callback for disconnection"""
         self.connected = False
+        self.ready.clear()
         logger.warning(f"Disconnected from MQTT broker (code: {rc})")
     
+    def _on_connect_fail(self, client, userdata):
+        """Callback when a (re)connect attempt could not reach the broker"""
+        logger.debug(f"MQTT broker {self.broker}:{self.port} unreachable")
+        self._next_broker()
+    
+    def _schedule_retry(self):
+        """
+        Set the wait before the next reconnect attempt
+        
+        Exponential backoff with full jitter: the delay is drawn uniformly
+        from [min_delay, min_delay * 2^attempt] (capped), so a fleet of bins
+        does not reconnect in lockstep after a broker restart. Paho sleeps
+        the configured delay in its own network thread.
+        """
+        ceiling = min(self.reconnect_max_delay,
+                      self.reconnect_min_delay * (2 ** min(self._attempt, 16)))
+        delay = random.uniform(self.reconnect_min_delay, ceiling)
+        self.client.reconnect_delay_set(min_delay=delay, max_delay=delay)
+    
+    def _next_broker(self):
+        """Move on to the next broker candidate after a failed attempt"""
+        self._attempt += 1
+        self._schedule_retry()
+        if len(self.brokers) > 1:
+            self._broker_index = (self._broker_index + 1) % len(self.brokers)
+            self.broker, self.port = self.brokers[self._broker_index]
+            self.client.connect_async(self.broker, self.port, keepalive=60)
+            logger.info(f"Trying MQTT broker {self.broker}:{self.port}")
+    
     def connect(self):
-        """Connect to MQTT broker"""
-        try:
-            logger.info(f"Connecting to {self.broker}:{self.port}")
-            self.client.connect(self.broker, self.port, keepalive=60)
-            self.client.loop_start()
-        except Exception as e:
-            logger.error(f"Connection failed: {e}")
-            raise
+        """
+        Start connecting in the background
+        
+        Never blocks on the network and never raises for an unreachable
+        broker; use wait_ready() to wait for the first connection.
+        """
+        logger.info(f"Connecting to {self.broker}:{self.port}")
+        self.client.connect_async(self.broker, self.port, keepalive=60)
+        self.client.loop_start()
+        self._start_replay()
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until connected to a broker
+        
+        Args:
+            timeout: Maximum seconds to wait (None = forever)
+            
+        Returns:
+            True if connected
+        """
+        return self.ready.wait(timeout)
     
     def disconnect(self):
         """Disconnect from broker"""
+        if self.batcher is not None:
+            # Hand pending batches to the client/queue before shutting down
+            self.batcher.stop()
+            self.batcher = None
+        self._closing = True
+        self._replay_wake.set()
+        if self._replay_thread is not None:
+            self._replay_thread.join(timeout=2.0)
+            self._replay_thread = None
+        if self.queue is not None:
+            self.queue.close()
+        
         if self.client:
             self.client.loop_stop()
             self.client.disconnect()
             logger.info("Disconnected from MQTT broker")
     
+    def _start_replay(self):
+        """Start the background replay thread (once)"""
+        if self.queue is None or self._replay_thread is not None:
+            return
+        self._replay_thread = Thread(target=self._replay_loop, name="mqtt-replay", daemon=True)
+        self._replay_thread.start()
+    
+    def _replay_loop(self):
+        """Drain the offline queue in order whenever the broker is reachable"""
+        while not self._closing:
+            self._replay_wake.wait(timeout=1.0)
+            self._replay_wake.clear()
+            
+            replayed = 0
+            start = time.monotonic()
+            try:
+                while self.connected and not self._closing:
+                    message = self.queue.peek()
+                    if message is None:
+                        break
+                    
+                    info = self.client.publish(message.topic, message.payload, qos=message.qos)
+                    if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                        break
+                    if message.qos > 0:
+                        # Backpressure: one unacknowledged replay in flight at a time
+                        info.wait_for_publish(timeout=self.replay_ack_timeout)
+                        if not info.is_published():
+                            logger.warning("Replay not acknowledged, pausing")
+                            break
+                    
+                    self.queue.ack(message.seq)
+                    replayed += 1
+                    if self.replay_rate > 0:
+                        time.sleep(1.0 / self.replay_rate)
+            except Exception as e:
+                # Keep the thread alive; the next wake-up retries from the
+                # oldest unacknowledged message
+                logger.error(f"Queue replay error: {e}")
+            
+            if replayed:
+                elapsed = time.monotonic() - start
+                logger.info(
+                    f"Replayed {replayed} queued message(s) in {elapsed:.1f}s "
+                    f"({len(self.queue)} left)"
+                )
+    
+    def _send(self, topic: str, payload, qos: int = 0) -> bool:
+        """
+        Publish now, or queue for later if the broker is unreachable
+        
+        Returns:
+            True if published or queued
+        """
+        if self.queue is not None and (not self.connected or len(self.queue)):
+            # Anything already queued goes first, so new messages queue behind it
+            queued = self.queue.put(topic, payload, qos)
+            self._replay_wake.set()
+            return queued
+        
+        if not self.connected:
+            return False
+        
+        result = self.client.publish(topic, payload, qos=qos)
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            return True
+        
+        logger.error(f"Publish failed with code {result.rc}")
+        if self.queue is not None:
+            return self.queue.put(topic, payload, qos)
+        return False
+    
+    def _emit(self, topic: str, data: Dict[str, Any], qos: int = 0) -> bool:
+        """
+        Publish a message body as JSON, or add it to the topic's batch
+        
+        Returns:
+            True if published, queued or batched
+        """
+        if self.batcher is not None and topic in self.batch_topics:
+            record = dict(data)
+            record.pop('timestamp', None)
+            self._batch_qos[topic] = max(qos, self._batch_qos.get(topic, 0))
+            self.batcher.add(topic, record, epoch_ms())
+            return True
+        return self._send(topic, json.dumps(data), qos)
+    
+    def _flush_batch(self, topic: str, records: list):
+        """Send one coalesced batch (runs on the batcher thread)"""
+        payload = encode_batch(topic, records)
+        self._send(f"{topic}/batch", payload, qos=self._batch_qos.get(topic, 0))
+        logger.debug(f"Sent batch of {len(records)} on {topic} ({len(payload)} bytes)")
+    
+    def queue_stats(self) -> Dict[str, Any]:
+        """Offline queue depth, drops and replay rate (empty if disabled)"""
+        return self.queue.stats() if self.queue is not None else {}
+    
     def publish_detection(self, detection_data: Dict[str, Any]):
         """
         Publish detection results
@@ -81,7 +297,7 @@ class MQTTPublisher:
         Args:
             detection_data: Detection summary dictionary
         """
-        if not self.connected:
+        if not self.connected and self.queue is None:
             logger.warning("Not connected to broker, skipping publish")
             return
         
@@ -90,56 +306,99 @@ class MQTTPublisher:
         
         # Publish to detection topic
         topic = "smartbin/detection"
-        payload = json.dumps(detection_data)
-        
-        result = self.client.publish(topic, payload, qos=1)
         
-        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+        if self._emit(topic, detection_data, qos=1):
             logger.info(f"Published detection: {detection_data['count']} objects → {detection_data['destination']}")
-        else:
-            logger.error(f"Publish failed with code {result.rc}")
     
-    def publish_bin_status(self, bin_levels: Dict[str, float]):
+    def publish_bin_status(self, bin_levels: Dict[str, Optional[float]],
+                           extra: Optional[Dict[str, Any]] = None):
         """
         Publish bin fill levels
         
         Args:
-            bin_levels: Dictionary of bin names to fill percentages
+            bin_levels: Dictionary of bin names to fill percentages (None = no valid reading)
+            extra: Optional additional fields (e.g. sweep timing)
+            
+        Returns:
+            True if the message was handed to the client or queued
         """
-        if not self.connected:
-            return
+        if not self.connected and self.queue is None:
+            return False
         
-        payload = json.dumps({
+        data = {
             'levels': bin_levels,
-            'timestamp': datetime.now().isoformat()
-        })
+            'timestamp': datetime.now().isoformat(),
+            **self.status_fields,
+        }
+        if extra:
+            data.update(extra)
         
         topic = "smartbin/bin_status"
-        self.client.publish(topic, payload, qos=0)
+        sent = self._emit(topic, data, qos=0)
         
         logger.debug(f"Published bin status: {bin_levels}")
+        return sent
+    
+    def subscribe(self, topic: str, callback, qos: int = 1):
+        """
+        Subscribe to a topic (kept across reconnects)
+        
+        Args:
+            topic: Topic filter
+            callback: Paho message callback (client, userdata, message); runs on
+                      the network thread and must not block
+            qos: Subscription QoS
+        """
+        self._subscriptions[topic] = qos
+        self.client.message_callback_add(topic, callback)
+        if self.connected:
+            self.client.subscribe(topic, qos=qos)
+        logger.info(f"Subscribed to {topic}")
+    
+    def publish_command_ack(self, ack: Dict[str, Any]):
+        """
+        Publish the outcome of a remote command
+        
+        Args:
+            ack: Acknowledgement (id, command, status, result/error)
+        """
+        ack['timestamp'] = datetime.now().isoformat()
+        
+        topic = "smartbin/commands/ack"
+        self._emit(topic, ack, qos=1)
+        
+        logger.info(f"Command {ack.get('command')} ({ack.get('id')}): {ack.get('status')}")
     
-    def publish_system_status(self, status: str, message: str = ""):
+    def publish_system_status(self, status: str, message: str = "",
+                              extra: Optional[Dict[str, Any]] = None):
         """
         Publish system status updates
         
         Args:
-            status: Status type (ready/processing/error)
+            status: Status type (ready/processing/error/metrics)
             message: Optional status message
+            extra: Optional additional fields (e.g. latency summary)
+            
+        Returns:
+            True if the message was handed to the client or queued
         """
-        if not self.connected:
-            return
+        if not self.connected and self.queue is None:
+            return False
         
-        payload = json.dumps({
+        data = {
             'status': status,
             'message': message,
-            'timestamp': datetime.now().isoformat()
-        })
+            'timestamp': datetime.now().isoformat(),
+            **self.status_fields,
+        }
+        if extra:
+            data.update(extra)
         
         topic = "smartbin/system"
-        self.client.publish(topic, payload, qos=0)
+        sent = self._emit(topic, data, qos=0)
         
         logger.info(f"System status: {status} - {message}")
+        return sent
     
     def __del__(self):
         """Cleanup on deletion"""
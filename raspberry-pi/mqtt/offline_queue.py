@@ -0,0 +1,272 @@
+"""
+Offline Publish Queue
+Disk-backed store-and-forward buffer for MQTT messages published while
+the broker is unreachable
+"""
+
+import base64
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Per-topic behaviour when the queue is full (or, for 'latest', always):
+#   drop_oldest - evict the oldest queued message (any topic) to make room
+#   drop_newest - refuse the new message
+#   latest      - keep only the newest message of this topic
+DROP_POLICIES = ('drop_oldest', 'drop_newest', 'latest')
+
+
+class QueuedMessage:
+    """One outbound message"""
+    
+    __slots__ = ('seq', 'topic', 'payload', 'qos', 'queued_at')
+    
+    def __init__(self, seq: int, topic: str, payload: str, qos: int, queued_at: float):
+        self.seq = seq
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.queued_at = queued_at
+    
+    def to_line(self) -> str:
+        entry = {
+            'seq': self.seq, 'topic': self.topic, 'payload': self.payload,
+            'qos': self.qos, 'ts': self.queued_at,
+        }
+        if isinstance(self.payload, (bytes, bytearray)):
+            # Binary (batched) payloads are journaled as base64
+            entry['payload'] = base64.b64encode(self.payload).decode('ascii')
+            entry['b64'] = True
+        return json.dumps(entry) + '\n'
+
+
+class OfflineQueue:
+    """
+    Bounded, append-only, crash-safe outbound queue.
+    
+    Every message is appended to a journal file and fsynced before
+    ``put`` returns. Delivered messages are recorded by writing the last
+    acknowledged sequence number to a small marker file (atomic rename).
+    On start the journal is replayed through the same drop policies, so a
+    torn final line or a crash mid-replay never loses or reorders messages.
+    """
+    
+    def __init__(self, directory: str, max_messages: int = 1000,
+                 policies: Optional[Dict[str, str]] = None,
+                 default_policy: str = 'drop_oldest', sync: bool = True):
+        """
+        Initialize queue
+        
+        Args:
+            directory: Where the journal and ack marker are kept
+            max_messages: Maximum messages held (oldest/newest dropped beyond it)
+            policies: Topic -> drop policy (see DROP_POLICIES)
+            default_policy: Policy for topics not listed
+            sync: fsync every append (disable only on wear-sensitive storage)
+        """
+        self.directory = directory
+        self.max_messages = max(1, max_messages)
+        self.policies = dict(policies or {})
+        self.default_policy = default_policy
+        self.sync = sync
+        
+        for policy in list(self.policies.values()) + [default_policy]:
+            if policy not in DROP_POLICIES:
+                raise ValueError(f"Unknown drop policy: {policy}")
+        
+        os.makedirs(directory, exist_ok=True)
+        self._journal_path = os.path.join(directory, 'queue.jsonl')
+        self._ack_path = os.path.join(directory, 'queue.ack')
+        
+        self._lock = Lock()
+        self._pending = OrderedDict()  # seq -> QueuedMessage
+        self._next_seq = 1
+        self._acked = 0
+        self._journal_lines = 0
+        
+        # Metrics
+        self.enqueued = 0
+        self.delivered = 0
+        self.dropped = {}
+        self._delivery_times = deque(maxlen=50)
+        
+        self._recover()
+        self._journal = open(self._journal_path, 'a', encoding='utf-8')
+    
+    def _policy(self, topic: str) -> str:
+        return self.policies.get(topic, self.default_policy)
+    
+    def _recover(self):
+        """Rebuild the in-memory queue from the journal"""
+        try:
+            with open(self._ack_path, encoding='utf-8') as f:
+                self._acked = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            self._acked = 0
+        
+        if not os.path.exists(self._journal_path):
+            self._next_seq = self._acked + 1
+            return
+        
+        with open(self._journal_path, encoding='utf-8') as f:
+            for line in f:
+                self._journal_lines += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write from a crash; everything before it is intact
+                    logger.warning("Skipping corrupt line in offline queue journal")
+                    continue
+                seq = entry['seq']
+                self._next_seq = max(self._next_seq, seq + 1)
+                if seq <= self._acked:
+                    continue
+                payload = entry['payload']
+                if entry.get('b64'):
+                    payload = base64.b64decode(payload)
+                self._admit(QueuedMessage(seq, entry['topic'], payload,
+                                          entry['qos'], entry['ts']))
+        
+        self._next_seq = max(self._next_seq, self._acked + 1)
+        if self._pending:
+            logger.info(f"Recovered {len(self._pending)} queued MQTT message(s)")
+        self._compact()
+    
+    def _drop(self, message: QueuedMessage):
+        self._pending.pop(message.seq, None)
+        self.dropped[message.topic] = self.dropped.get(message.topic, 0) + 1
+    
+    def _admit(self, message: QueuedMessage) -> bool:
+        """Apply drop policies and add to the in-memory queue"""
+        policy = self._policy(message.topic)
+        
+        if policy == 'latest':
+            for queued in [m for m in self._pending.values() if m.topic == message.topic]:
+                self._drop(queued)
+        
+        if len(self._pending) >= self.max_messages:
+            if policy == 'drop_newest':
+                self.dropped[message.topic] = self.dropped.get(message.topic, 0) + 1
+                return False
+            self._drop(next(iter(self._pending.values())))
+        
+        self._pending[message.seq] = message
+        return True
+    
+    def _compact(self):
+        """Rewrite the journal with only the pending messages"""
+        tmp_path = self._journal_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for message in self._pending.values():
+                f.write(message.to_line())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._journal_path)
+        self._journal_lines = len(self._pending)
+    
+    def put(self, topic: str, payload, qos: int = 0) -> bool:
+        """
+        Queue a message for later delivery
+        
+        Args:
+            topic: MQTT topic
+            payload: Encoded payload (str or bytes)
+            qos: QoS to publish with
+        
+        Returns:
+            True if queued, False if refused by the topic's drop policy
+        """
+        with self._lock:
+            message = QueuedMessage(self._next_seq, topic, payload, qos, time.time())
+            if not self._admit(message):
+                return False
+            self._next_seq += 1
+            self.enqueued += 1
+            
+            self._journal.write(message.to_line())
+            self._journal.flush()
+            if self.sync:
+                os.fsync(self._journal.fileno())
+            self._journal_lines += 1
+            
+            # Keep the journal bounded even if the broker never comes back
+            if self._journal_lines > 2 * self.max_messages:
+                self._journal.close()
+                self._compact()
+                self._journal = open(self._journal_path, 'a', encoding='utf-8')
+            return True
+    
+    def peek(self) -> Optional[QueuedMessage]:
+        """Oldest undelivered message, or None if empty"""
+        with self._lock:
+            return next(iter(self._pending.values()), None)
+    
+    def ack(self, seq: int):
+        """
+        Mark a message (and everything queued before it) as delivered
+        
+        Args:
+            seq: Sequence number of the delivered message
+        """
+        with self._lock:
+            for queued_seq in [s for s in self._pending if s <= seq]:
+                self._pending.pop(queued_seq)
+            self._acked = max(self._acked, seq)
+            self.delivered += 1
+            self._delivery_times.append(time.monotonic())
+            
+            tmp_path = self._ack_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(str(self._acked))
+                if self.sync:
+                    # Otherwise a power cut can leave an empty marker and
+                    # re-send everything already delivered
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, self._ack_path)
+            
+            if not self._pending:
+                # Fully drained: start a fresh journal
+                self._journal.close()
+                self._compact()
+                self._journal = open(self._journal_path, 'a', encoding='utf-8')
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+    
+    def replay_rate(self) -> float:
+        """Recent delivery rate in messages per second"""
+        with self._lock:
+            times = list(self._delivery_times)
+        if len(times) < 2 or times[-1] - times[0] <= 0:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+    
+    def stats(self) -> dict:
+        """Queue metrics"""
+        with self._lock:
+            oldest = next(iter(self._pending.values()), None)
+            depth = len(self._pending)
+            stats = {
+                'depth': depth,
+                'enqueued': self.enqueued,
+                'delivered': self.delivered,
+                'dropped': dict(self.dropped),
+                'oldest_age': round(time.time() - oldest.queued_at, 1) if oldest else 0.0,
+            }
+        stats['replay_rate'] = round(self.replay_rate(), 1)
+        return stats
+    
+    def close(self):
+        """Flush and close the journal"""
+        with self._lock:
+            if not self._journal.closed:
+                self._journal.flush()
+                self._journal.close()
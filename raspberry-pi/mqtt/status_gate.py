@@ -0,0 +1,142 @@
+"""
+Bin Status Gate
+Decides when bin levels are worth publishing (deadband + heartbeat)
+and latches full-bin alerts until the bin is emptied
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StatusDecision:
+    """Outcome of one gate update"""
+    publish: bool
+    reason: str = ''
+    raised: List[str] = field(default_factory=list)
+    cleared: List[str] = field(default_factory=list)
+
+
+class BinStatusGate:
+    """
+    Change-driven publishing policy for bin fill levels.
+    
+    A status message is sent when any bin moves more than ``deadband``
+    percent from the last published value, crosses the full threshold,
+    changes validity, or when ``heartbeat`` seconds pass without a publish.
+    Full alerts are raised once and stay latched until the level falls
+    below ``full_threshold - hysteresis``.
+    """
+    
+    def __init__(self, deadband: float = 5.0, full_threshold: float = 80.0,
+                 hysteresis: float = 5.0, heartbeat: float = 300.0):
+        """
+        Initialize gate
+        
+        Args:
+            deadband: Minimum level change (percentage points) worth publishing
+            full_threshold: Fill percentage that raises a full alert
+            hysteresis: Margin below the threshold before an alert clears
+            heartbeat: Maximum seconds between publishes (0 disables)
+        """
+        self.deadband = deadband
+        self.full_threshold = full_threshold
+        self.hysteresis = hysteresis
+        self.heartbeat = heartbeat
+        
+        self.latched = set()
+        self._published: Optional[Dict[str, Optional[float]]] = None
+        self._last_publish = 0.0
+        
+        # Diagnostics
+        self.updates = 0
+        self.publishes = 0
+    
+    def _update_alerts(self, levels: Dict[str, Optional[float]]):
+        raised, cleared = [], []
+        for name, level in levels.items():
+            # No reading: keep whatever state the bin was in
+            if level is None:
+                continue
+            if name not in self.latched and level >= self.full_threshold:
+                self.latched.add(name)
+                raised.append(name)
+            elif name in self.latched and level < self.full_threshold - self.hysteresis:
+                self.latched.discard(name)
+                cleared.append(name)
+        return raised, cleared
+    
+    def _change_reason(self, levels: Dict[str, Optional[float]]) -> str:
+        if self._published is None:
+            return 'initial'
+        if levels.keys() != self._published.keys():
+            return 'bins'
+        for name, level in levels.items():
+            previous = self._published[name]
+            if (level is None) != (previous is None):
+                return 'validity'
+            if level is not None and abs(level - previous) > self.deadband:
+                return 'change'
+        return ''
+    
+    def update(self, levels: Dict[str, Optional[float]],
+               now: Optional[float] = None) -> StatusDecision:
+        """
+        Feed the latest levels
+        
+        Args:
+            levels: Bin names to fill percentages (None = no valid reading)
+            now: Monotonic timestamp (defaults to time.monotonic())
+        
+        Returns:
+            StatusDecision telling the caller whether to publish and which
+            alerts were raised or cleared by this update
+        """
+        now = time.monotonic() if now is None else now
+        self.updates += 1
+        
+        raised, cleared = self._update_alerts(levels)
+        
+        reason = self._change_reason(levels)
+        if not reason and (raised or cleared):
+            reason = 'threshold'
+        if not reason and self.heartbeat > 0 and now - self._last_publish >= self.heartbeat:
+            reason = 'heartbeat'
+        
+        if reason:
+            self._published = dict(levels)
+            self._last_publish = now
+            self.publishes += 1
+            logger.debug(f"Bin status publish ({reason})")
+        
+        return StatusDecision(bool(reason), reason, raised, cleared)
+    
+    def revert_alert(self, name: str):
+        """
+        Undo an alert transition that could not be delivered, so the next
+        update raises (or clears) it again
+        
+        Args:
+            name: Bin whose alert was raised or cleared by the last update
+        """
+        if name in self.latched:
+            self.latched.discard(name)
+        else:
+            self.latched.add(name)
+    
+    def invalidate(self):
+        """Force the next update to publish (e.g. the last send was dropped)"""
+        self._published = None
+    
+    def stats(self) -> dict:
+        """Publish ratio for tuning"""
+        return {
+            'updates': self.updates,
+            'publishes': self.publishes,
+            'suppressed': self.updates - self.publishes,
+            'latched': sorted(self.latched),
+        }
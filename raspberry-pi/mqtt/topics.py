@@ -16,8 +16,9 @@ class MQTTTopics:
     # System status
     SYSTEM = "smartbin/system"
     
-    # Commands (for future remote control)
+    # Remote commands and their acknowledgements
     COMMANDS = "smartbin/commands"
+    COMMAND_ACKS = "smartbin/commands/ack"
     
     # Alerts
     ALERTS = "smartbin/alerts"
@@ -30,5 +31,6 @@ class MQTTTopics:
             MQTTTopics.BIN_STATUS,
             MQTTTopics.SYSTEM,
             MQTTTopics.COMMANDS,
+            MQTTTopics.COMMAND_ACKS,
             MQTTTopics.ALERTS
         ]
@@ -0,0 +1,321 @@
+"""
+Session Recorder
+Captures what the bin saw during a session (classified frames, raw
+ultrasonic samples, triggers and routing decisions) into one compact
+chunked file that session.replay can feed back through the system
+
+File layout: an 8-byte magic followed by chunks of
+``tag (4 bytes) | payload length (uint32) | crc32 (uint32) | payload``.
+
+- META: JSON session header (bins, frame format, config snapshot)
+- FRAM: one frame (JPEG or raw pixels) with its trace ID
+- SENS: a block of sensor rows stored column by column
+  (t float64, sweep uint32, bin uint8, distance float32; NaN = no sample)
+- EVNT: a JSON list of trigger / decision / level events
+
+Timestamps are seconds since the session started (monotonic clock).
+A crash loses at most the unflushed sensor and event buffers; readers
+stop at the first torn chunk.
+"""
+
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SBSESS01'
+VERSION = 1
+CHUNK_HEADER = struct.Struct('<4sII')
+FRAME_HEADER = struct.Struct('<dBHHBB')  # t, encoding, height, width, channels, trace id length
+
+FRAME_FORMATS = ('jpeg', 'raw')
+_ENCODINGS = {'raw': 0, 'jpeg': 1}
+
+
+class SessionRecorder:
+    """
+    Appends session data to a chunked recording file.
+    
+    Thread-safe: frames and decisions come from the detection thread,
+    sensor sweeps from the bin monitor thread.
+    """
+    
+    def __init__(self, path: str, bins: Sequence[str], frame_format: str = 'jpeg',
+                 jpeg_quality: int = 90, metadata: Optional[dict] = None,
+                 flush_rows: int = 512, flush_interval: float = 5.0):
+        """
+        Initialize recorder
+        
+        Args:
+            path: Recording file (created, parent directories included)
+            bins: Bin names, in the order their index is stored in SENS rows
+            frame_format: 'jpeg' (compact) or 'raw' (bit-exact pixels)
+            jpeg_quality: JPEG quality 0-100
+            metadata: Extra header fields, e.g. a config snapshot
+            flush_rows: Write buffered sensor rows once this many are pending
+            flush_interval: ...or once the oldest buffered data is this old (s)
+        """
+        if frame_format not in FRAME_FORMATS:
+            raise ValueError(f"Unknown frame format '{frame_format}', expected one of {FRAME_FORMATS}")
+        
+        self.path = path
+        self.bins = list(bins)
+        self.frame_format = frame_format
+        self.jpeg_quality = int(jpeg_quality)
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        
+        self._bin_index = {name: i for i, name in enumerate(self.bins)}
+        self._start = time.monotonic()
+        self._rows: List[Tuple[float, int, int, float]] = []
+        self._events: List[dict] = []
+        self._sweeps = 0
+        self._last_flush = self._start
+        self._lock = Lock()
+        
+        # Counters for the log line at close()
+        self.frames = 0
+        self.bytes_written = 0
+        
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._write_chunk(b'META', json.dumps({
+            'version': VERSION,
+            'created': time.time(),
+            'bins': self.bins,
+            'frame_format': frame_format,
+            **(metadata or {}),
+        }).encode('utf-8'))
+        logger.info(f"Recording session to {path}")
+    
+    def _now(self) -> float:
+        return time.monotonic() - self._start
+    
+    def _write_chunk(self, tag: bytes, payload: bytes):
+        self._file.write(CHUNK_HEADER.pack(tag, len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self.bytes_written += CHUNK_HEADER.size + len(payload)
+    
+    def frame(self, frame: np.ndarray, trace_id: str = ''):
+        """
+        Record a frame that is about to be classified
+        
+        Args:
+            frame: BGR (or grayscale) uint8 image
+            trace_id: ID of the item the frame belongs to
+        """
+        t = self._now()
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        if self.frame_format == 'jpeg':
+            ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                logger.warning("JPEG encoding failed, frame not recorded")
+                return
+            data = encoded.tobytes()
+        else:
+            data = np.ascontiguousarray(frame, dtype=np.uint8).tobytes()
+        
+        trace = trace_id.encode('utf-8')[:255]
+        header = FRAME_HEADER.pack(t, _ENCODINGS[self.frame_format],
+                                   frame.shape[0], frame.shape[1], channels, len(trace))
+        with self._lock:
+            if self._file is None:
+                return
+            self._write_chunk(b'FRAM', header + trace + data)
+            self.frames += 1
+    
+    def sensors(self, samples: Dict[str, List[float]]):
+        """
+        Record the raw samples of one bin sweep
+        
+        Args:
+            samples: Bin name -> sample distances in cm (MultiBinMonitor.last_samples);
+                     an empty list records a sweep without a valid echo
+        """
+        t = self._now()
+        with self._lock:
+            if self._file is None:
+                return
+            self._sweeps += 1
+            for name, values in samples.items():
+                index = self._bin_index.get(name)
+                if index is None:
+                    continue
+                for value in values or [float('nan')]:
+                    self._rows.append((t, self._sweeps, index, value))
+            self._maybe_flush()
+    
+    def event(self, kind: str, **fields):
+        """
+        Record a trigger, routing decision or level update
+        
+        Args:
+            kind: Event type ('trigger', 'decision', 'levels', ...)
+            **fields: JSON-serialisable event fields
+        """
+        record = {'t': round(self._now(), 4), 'type': kind, **fields}
+        with self._lock:
+            if self._file is None:
+                return
+            self._events.append(record)
+            self._maybe_flush()
+    
+    def _maybe_flush(self):
+        if (len(self._rows) >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self._flush()
+    
+    def _flush(self):
+        """Write buffered sensor rows and events (lock held)"""
+        if self._rows:
+            t, sweep, index, distance = zip(*self._rows)
+            self._write_chunk(b'SENS', b''.join([
+                struct.pack('<I', len(self._rows)),
+                np.asarray(t, dtype='<f8').tobytes(),
+                np.asarray(sweep, dtype='<u4').tobytes(),
+                np.asarray(index, dtype='u1').tobytes(),
+                np.asarray(distance, dtype='<f4').tobytes(),
+            ]))
+            self._rows = []
+        if self._events:
+            self._write_chunk(b'EVNT', json.dumps(self._events, separators=(',', ':')).encode('utf-8'))
+            self._events = []
+        self._file.flush()
+        self._last_flush = time.monotonic()
+    
+    def close(self):
+        """Flush pending data and close the file"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._flush()
+            self._file.close()
+            self._file = None
+        logger.info(
+            f"Session recording closed: {self.frames} frames, {self._sweeps} sweeps, "
+            f"{self.bytes_written / 1e6:.1f} MB"
+        )
+
+
+@dataclass
+class RecordedFrame:
+    """A frame as stored in the recording (decoded on demand)"""
+    t: float
+    trace: str
+    encoding: int
+    shape: Tuple[int, int, int]
+    data: bytes
+    
+    def image(self) -> np.ndarray:
+        if self.encoding == _ENCODINGS['jpeg']:
+            flags = cv2.IMREAD_COLOR if self.shape[2] == 3 else cv2.IMREAD_UNCHANGED
+            return cv2.imdecode(np.frombuffer(self.data, dtype=np.uint8), flags)
+        height, width, channels = self.shape
+        image = np.frombuffer(self.data, dtype=np.uint8)
+        return image.reshape((height, width, channels) if channels > 1 else (height, width))
+
+
+class SessionReader:
+    """Loads a recording written by SessionRecorder"""
+    
+    def __init__(self, path: str):
+        """
+        Read a recording
+        
+        Args:
+            path: Recording file
+        """
+        self.path = path
+        self.meta: dict = {}
+        self.frames: List[RecordedFrame] = []
+        self.events: List[dict] = []
+        self.truncated = False
+        columns: Dict[str, list] = {'t': [], 'sweep': [], 'bin': [], 'distance': []}
+        
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a session recording")
+            for tag, payload in self._chunks(f):
+                if tag == b'META':
+                    self.meta = json.loads(payload)
+                elif tag == b'FRAM':
+                    self.frames.append(self._parse_frame(payload))
+                elif tag == b'SENS':
+                    for key, values in zip(columns, self._parse_sensors(payload)):
+                        columns[key].append(values)
+                elif tag == b'EVNT':
+                    self.events.extend(json.loads(payload))
+        
+        self.bins: List[str] = self.meta.get('bins', [])
+        self.sensor_columns = {
+            key: np.concatenate(parts) if parts else np.empty(0)
+            for key, parts in columns.items()
+        }
+        self.events.sort(key=lambda event: event['t'])
+    
+    def _chunks(self, f) -> Iterator[Tuple[bytes, bytes]]:
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if not header:
+                return
+            if len(header) < CHUNK_HEADER.size:
+                break
+            tag, length, crc = CHUNK_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            yield tag, payload
+        self.truncated = True
+        logger.warning(f"{self.path}: torn chunk, ignoring the rest of the recording")
+    
+    @staticmethod
+    def _parse_frame(payload: bytes) -> RecordedFrame:
+        t, encoding, height, width, channels, trace_len = FRAME_HEADER.unpack_from(payload)
+        offset = FRAME_HEADER.size
+        trace = payload[offset:offset + trace_len].decode('utf-8')
+        return RecordedFrame(t, trace, encoding, (height, width, channels), payload[offset + trace_len:])
+    
+    @staticmethod
+    def _parse_sensors(payload: bytes) -> Tuple[np.ndarray, ...]:
+        rows, = struct.unpack_from('<I', payload)
+        offset = 4
+        columns = []
+        for dtype in ('<f8', '<u4', 'u1', '<f4'):
+            column = np.frombuffer(payload, dtype=dtype, count=rows, offset=offset)
+            offset += column.nbytes
+            columns.append(column)
+        return tuple(columns)
+    
+    def sweeps(self) -> List[Tuple[float, Dict[str, List[float]]]]:
+        """Raw samples per sweep: [(t, {bin name: [cm, ...]}), ...]"""
+        columns = self.sensor_columns
+        result: Dict[int, Tuple[float, Dict[str, List[float]]]] = {}
+        for t, sweep, index, distance in zip(columns['t'], columns['sweep'],
+                                             columns['bin'], columns['distance']):
+            _, samples = result.setdefault(int(sweep), (float(t), {}))
+            values = samples.setdefault(self.bins[index], [])
+            if not np.isnan(distance):
+                values.append(float(distance))
+        return [result[sweep] for sweep in sorted(result)]
+    
+    def frames_by_trace(self) -> Dict[str, List[RecordedFrame]]:
+        """Recorded frames grouped by item, in capture order"""
+        grouped: Dict[str, List[RecordedFrame]] = {}
+        for frame in self.frames:
+            grouped.setdefault(frame.trace, []).append(frame)
+        return grouped
+    
+    def decisions(self) -> Dict[str, dict]:
+        """Recorded routing decision per trace ID"""
+        return {event['trace']: event for event in self.events if event['type'] == 'decision'}
@@ -0,0 +1,288 @@
+"""
+Session Replay
+Feeds a recording made by session.recorder through a SmartBinSystem on
+simulated hardware: the recorded frames go to the detector per trigger,
+the raw ultrasonic samples go through the bin filters and status gate.
+Compare detector versions, filter settings or scheduling changes against
+the exact same workload by replaying with different --set overrides.
+
+Usage (from the raspberry-pi directory):
+    
+    python -m session.replay data/sessions/session-20260301-091500.sbs
+    python -m session.replay rec.sbs --set DETECTOR_TYPE=heuristic --set BURST_FRAMES=1
+    python -m session.replay rec.sbs --set ULTRASONIC_FILTER_WINDOW=9 --json report.json
+    python -m session.replay rec.sbs --realtime    # keep the recorded timing
+
+The recording's config snapshot is the baseline, so a replay without
+--set runs the settings the session was recorded with. The replay runs
+offline: the system never connects to MQTT and nothing is published.
+Doors are simulated with no dwell unless overridden, so fast replays
+measure detection rather than servo time.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from detection.frame_source import FrameSource
+from session.recorder import SessionReader
+
+logger = logging.getLogger(__name__)
+
+# Applied before the system's config is imported and never taken from the
+# recording; --set wins over these
+REPLAY_ENV = {
+    'HARDWARE_BACKEND': 'sim',
+    'FRAME_SOURCE': 'synthetic:1',
+    'FRAME_PACING': 'fast',
+    'CAMERA_THREADED': 'false',
+    'TRIGGER_MODE': 'manual',
+    'USE_IR_TRIGGER': 'false',
+    'COMMANDS_ENABLED': 'false',
+    'METRICS_PORT': '0',
+    'METRICS_SUMMARY': 'false',
+    'MQTT_CONNECT_TIMEOUT': '0',
+    'MQTT_QUEUE_SIZE': '0',
+    'SESSION_RECORD_DIR': '',
+    'TRACE_DUMP': '',
+    'SERVO_DWELL': '0',
+    'SERVO_SPEED': '10',
+}
+
+
+class ReplayFrames(FrameSource):
+    """Hands out the recorded frames of the current item, then nothing"""
+    
+    name = 'session replay'
+    
+    def __init__(self):
+        super().__init__()
+        self._pending = deque()
+    
+    def load(self, frames: List):
+        """Queue the frames of the next item (drops any left from the last one)"""
+        self._pending.clear()
+        self._pending.extend(frames)
+    
+    def _next_frame(self):
+        return self._pending.popleft() if self._pending else None
+    
+    def read(self):
+        # Running out of frames ends a burst early; it must not close the source
+        frame = self._next_frame()
+        if frame is None:
+            return False, None
+        self.frames_read += 1
+        return True, frame
+
+
+def parse_overrides(values: List[str]) -> Dict[str, str]:
+    overrides = {}
+    for value in values:
+        key, sep, setting = value.partition('=')
+        if not sep or not key.strip():
+            raise ValueError(f"Expected KEY=VALUE, got '{value}'")
+        overrides[key.strip()] = setting.strip()
+    return overrides
+
+
+def apply_recorded_config(config, snapshot: dict, keep) -> List[str]:
+    """
+    Make the recorded config the baseline for a replay
+    
+    Args:
+        config: The system's config object (already loaded)
+        snapshot: META['config'] of the recording
+        keep: Keys that stay as loaded (replay settings and --set overrides)
+    
+    Returns:
+        Keys whose value was taken from the recording
+    """
+    applied = []
+    for key, value in snapshot.items():
+        if key in keep or not hasattr(config, key):
+            continue
+        current = getattr(config, key)
+        if isinstance(current, tuple) and isinstance(value, list):
+            value = tuple(value)
+        # Compare in JSON form: tuples come back from the recording as lists
+        if json.dumps(current) != json.dumps(value):
+            setattr(config, key, value)
+            applied.append(key)
+    return applied
+
+
+def build_timeline(reader: SessionReader) -> List[tuple]:
+    """Sweeps and triggers merged in recorded order"""
+    timeline = [(t, 'sweep', samples) for t, samples in reader.sweeps()]
+    timeline += [(event['t'], 'trigger', event) for event in reader.events if event['type'] == 'trigger']
+    timeline.sort(key=lambda item: item[0])
+    return timeline
+
+
+def replay(reader: SessionReader, system, realtime: bool = False) -> dict:
+    """
+    Run a recording through a constructed SmartBinSystem
+    
+    Args:
+        reader: Loaded recording
+        system: SmartBinSystem built with REPLAY_ENV
+        realtime: Wait between events as recorded instead of running flat out
+    
+    Returns:
+        Report with decision agreement, stage latencies and final levels
+    """
+    from detection.inference import InferencePipeline
+    
+    frames = ReplayFrames()
+    system.camera.release()
+    system.camera = InferencePipeline(resolution=system.camera.resolution, threaded=False, source=frames)
+    
+    recorded = reader.decisions()
+    frames_by_trace = reader.frames_by_trace()
+    replayed: Dict[str, Optional[str]] = {}
+    changes = []
+    alerts = 0
+    alerted = set()
+    
+    system.running = True
+    system.actuator.start()
+    started = time.monotonic()
+    
+    for t, kind, item in build_timeline(reader):
+        if realtime:
+            delay = started + t - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        
+        if kind == 'sweep':
+            levels = system.bin_monitor.replay_samples(item)
+            sampled = {name: levels[name] for name in item if name in levels}
+            decision = system.update_bin_levels(levels, sampled)
+            # Offline, undelivered alerts are re-raised every sweep: count
+            # each full episode once
+            gate = system.status_gate
+            alerts += len(set(decision.raised) - alerted)
+            alerted |= set(decision.raised)
+            alerted -= {name for name, level in levels.items()
+                        if level is not None and level < gate.full_threshold - gate.hysteresis}
+            continue
+        
+        trace_id = item['trace']
+        recorded_frames = frames_by_trace.get(trace_id)
+        if not recorded_frames:
+            continue
+        images = [frame.image() for frame in recorded_frames]
+        frames.load(images[1:])
+        summary = system.process_waste(images[0], trigger=item.get('trigger', ''))
+        destination = summary['destination'] if summary else None
+        replayed[trace_id] = destination
+        
+        before = recorded.get(trace_id, {}).get('destination')
+        if destination != before:
+            changes.append({'trace': trace_id, 'recorded': before, 'replayed': destination})
+    
+    system.actuator.wait_idle(timeout=30)
+    elapsed = time.monotonic() - started
+    
+    compared = [trace_id for trace_id in replayed if trace_id in recorded]
+    agreed = sum(1 for trace_id in compared if replayed[trace_id] == recorded[trace_id]['destination'])
+    recorded_levels = {}
+    for event in reader.events:
+        if event['type'] == 'levels':
+            recorded_levels.update(event['levels'])
+    
+    return {
+        'session': reader.path,
+        'truncated': reader.truncated,
+        'items': len(replayed),
+        'agreement': round(agreed / len(compared), 4) if compared else None,
+        'changed': changes,
+        'destinations': dict(Counter(replayed.values())),
+        'latency_ms': system.metrics.summary('stage_seconds', 'stage'),
+        'levels': dict(system.bin_monitor.levels),
+        'recorded_levels': recorded_levels,
+        'alerts': alerts,
+        'wall_seconds': round(elapsed, 2),
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['session']}: {report['items']} items replayed in {report['wall_seconds']} s"
+        + (" (recording truncated)" if report['truncated'] else ''),
+    ]
+    if report['agreement'] is not None:
+        lines.append(f"  decision agreement {report['agreement'] * 100:.1f}% "
+                     f"({len(report['changed'])} changed)")
+    for change in report['changed'][:10]:
+        lines.append(f"    {change['trace']}: {change['recorded']} -> {change['replayed']}")
+    lines.append(f"  destinations {report['destinations']}")
+    
+    lines.append(f"  {'stage':<16}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'max ms':>11}")
+    for stage, stats in sorted(report['latency_ms'].items()):
+        lines.append(f"  {stage:<16}{stats['count']:>7}{stats['p50']:>11.2f}{stats['p95']:>11.2f}{stats['max']:>11.2f}")
+    
+    def percent(level):
+        return 'n/a' if level is None else f"{level:.1f}%"
+    
+    for name, level in sorted(report['levels'].items()):
+        before = report['recorded_levels'].get(name)
+        lines.append(f"  bin {name:<12} replayed {percent(level):>7}  recorded {percent(before):>7}")
+    lines.append(f"  full alerts raised {report['alerts']}")
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded bin session")
+    parser.add_argument("path", help="Session recording (.sbs)")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="Config override for this replay (repeatable)")
+    parser.add_argument("--realtime", action="store_true", help="Keep the recorded timing")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+    
+    try:
+        overrides = parse_overrides(args.overrides)
+        reader = SessionReader(args.path)
+    except (OSError, ValueError) as e:
+        print(f"Cannot replay {args.path}: {e}", file=sys.stderr)
+        return 1
+    
+    os.environ.update({**REPLAY_ENV, **overrides})
+    
+    # The system reads its config at import time, so import it only now
+    import main as app
+    
+    applied = apply_recorded_config(app.config, reader.meta.get('config', {}),
+                                    keep=set(REPLAY_ENV) | set(overrides))
+    if applied:
+        logger.info(f"Using recorded settings for {', '.join(sorted(applied))}")
+    
+    # Offline: a replay must never reach the broker (or take over the live
+    # bin's client ID)
+    system = app.SmartBinSystem(offline=True)
+    
+    try:
+        report = replay(reader, system, realtime=args.realtime)
+    finally:
+        system.running = False
+        system.actuator.stop()
+        system.camera.release()
+        app.GPIOConfig.cleanup()
+    
+    report['overrides'] = overrides
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Latency Metrics
+Fixed-memory log-bucketed histograms for per-stage timings, plus a small
+registry that renders them in the Prometheus text format
+"""
+
+import math
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram (HDR-style) over a fixed value range.
+    
+    Buckets grow geometrically, so every recorded value lands in a bucket
+    whose bounds are within ``2 ** (1 / subbuckets)`` of each other
+    (about 9% with the default of 8 per doubling). Memory is fixed no
+    matter how many values are recorded; values outside the range are
+    clamped into the first/last bucket.
+    """
+    
+    def __init__(self, lowest: float = 1e-5, highest: float = 100.0, subbuckets: int = 8):
+        """
+        Initialize histogram
+        
+        Args:
+            lowest: Smallest distinguishable value (seconds)
+            highest: Largest tracked value (seconds)
+            subbuckets: Buckets per doubling of the value
+        """
+        self.lowest = lowest
+        self.growth = 2.0 ** (1.0 / subbuckets)
+        self._log_growth = math.log(self.growth)
+        size = int(math.ceil(math.log(highest / lowest) / self._log_growth)) + 1
+        self.counts = [0] * size
+        
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = Lock()
+    
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        index = int(math.ceil(math.log(value / self.lowest) / self._log_growth))
+        return min(index, len(self.counts) - 1)
+    
+    def _upper_bound(self, index: int) -> float:
+        return self.lowest * self.growth ** index
+    
+    def record(self, value: float):
+        """Record one value (seconds)"""
+        value = max(0.0, value)
+        with self._lock:
+            self.counts[self._index(value)] += 1
+            self.count += 1
+            self.total += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+    
+    def quantile(self, q: float) -> float:
+        """
+        Approximate quantile
+        
+        Args:
+            q: Quantile in [0, 1]
+        
+        Returns:
+            Upper bound of the bucket holding the quantile (capped to the
+            observed maximum), or 0.0 when empty
+        """
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = max(1, int(math.ceil(q * self.count)))
+            seen = 0
+            for index, bucket in enumerate(self.counts):
+                seen += bucket
+                if seen >= rank:
+                    return min(self._upper_bound(index), self.max)
+            return self.max
+    
+    def snapshot(self, quantiles: Sequence[float] = QUANTILES) -> Dict[str, float]:
+        """Count, sum, min/max and quantiles (seconds)"""
+        values = {f'p{int(q * 100)}': self.quantile(q) for q in quantiles}
+        with self._lock:
+            values.update(
+                count=self.count,
+                sum=self.total,
+                min=self.min if self.count else 0.0,
+                max=self.max,
+            )
+        return values
+    
+    def reset(self):
+        """Forget all recorded values"""
+        with self._lock:
+            self.counts = [0] * len(self.counts)
+            self.count = 0
+            self.total = 0.0
+            self.min = math.inf
+            self.max = 0.0
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], **extra) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+class MetricsRegistry:
+    """
+    Named histograms and callback gauges.
+    
+    Histograms are rendered as Prometheus summaries (quantiles, _sum,
+    _count); gauges are read from their callback at scrape time, so the
+    hot path only ever touches a histogram.
+    """
+    
+    def __init__(self, namespace: str = 'smartbin'):
+        self.namespace = namespace
+        self._histograms: Dict[str, Dict[Tuple, LatencyHistogram]] = {}
+        self._gauges: Dict[str, Callable[[], Optional[float]]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = Lock()
+    
+    def _full_name(self, name: str) -> str:
+        return f'{self.namespace}_{name}' if self.namespace else name
+    
+    def histogram(self, name: str, help_text: str = '', **labels) -> LatencyHistogram:
+        """
+        Get (or create) the histogram for a metric and label set
+        
+        Args:
+            name: Metric name without namespace, e.g. 'stage_seconds'
+            help_text: Description shown on the metrics page
+            **labels: Label values, e.g. stage='inference'
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if help_text:
+                self._help.setdefault(name, help_text)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = LatencyHistogram()
+            return histogram
+    
+    def observe(self, name: str, seconds: float, **labels):
+        """Record one duration"""
+        self.histogram(name, **labels).record(seconds)
+    
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Time the enclosed block into a histogram"""
+        histogram = self.histogram(name, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.record(time.perf_counter() - start)
+    
+    def gauge(self, name: str, callback: Callable[[], Optional[float]], help_text: str = ''):
+        """
+        Register a gauge read at scrape time
+        
+        Args:
+            name: Metric name without namespace
+            callback: Returns the current value (None = not available)
+            help_text: Description shown on the metrics page
+        """
+        with self._lock:
+            self._gauges[name] = callback
+            if help_text:
+                self._help[name] = help_text
+    
+    def summary(self, name: str, label: str) -> Dict[str, Dict[str, float]]:
+        """
+        Compact per-label quantiles in milliseconds, for MQTT reports
+        
+        Args:
+            name: Histogram metric name
+            label: Label whose values key the result, e.g. 'stage'
+        """
+        with self._lock:
+            series = dict(self._histograms.get(name, {}))
+        result = {}
+        for key, histogram in series.items():
+            snapshot = histogram.snapshot()
+            if not snapshot['count']:
+                continue
+            result[dict(key).get(label, '')] = {
+                'count': snapshot['count'],
+                **{q: round(snapshot[q] * 1000, 2) for q in ('p50', 'p95', 'p99')},
+                'max': round(snapshot['max'] * 1000, 2),
+            }
+        return result
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+            gauges = dict(self._gauges)
+            help_texts = dict(self._help)
+        
+        lines = []
+        for name, series in sorted(histograms.items()):
+            full_name = self._full_name(name)
+            if name in help_texts:
+                lines.append(f'# HELP {full_name} {help_texts[name]}')
+            lines.append(f'# TYPE {full_name} summary')
+            for key, histogram in sorted(series.items()):
+                snapshot = histogram.snapshot()
+                for q in QUANTILES:
+                    value = snapshot[f'p{int(q * 100)}']
+                    lines.append(f'{full_name}{_format_labels(key, quantile=q)} {value:.6g}')
+                lines.append(f'{full_name}_sum{_format_labels(key)} {snapshot["sum"]:.6g}')
+                lines.append(f'{full_name}_count{_format_labels(key)} {snapshot["count"]}')
+        
+        for name, callback in sorted(gauges.items()):
+            try:
+                value = callback()
+            except Exception:
+                value = None
+            if value is None:
+                continue
+            full_name = self._full_name(name)
+            if name in help_texts:
+                lines.append(f'# HELP {full_name} {help_texts[name]}')
+            lines.append(f'# TYPE {full_name} gauge')
+            lines.append(f'{full_name} {float(value):.6g}')
+        
+        return '\n'.join(lines) + '\n'
+
@@ -0,0 +1,85 @@
+"""
+Metrics Endpoint
+Serves the metrics registry over HTTP in the Prometheus text format
+"""
+
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from telemetry.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsServer:
+    """Tiny HTTP server exposing GET /metrics on a background thread"""
+    
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9108):
+        """
+        Initialize metrics server
+        
+        Args:
+            registry: Metrics to expose
+            host: Bind address (loopback by default; use 0.0.0.0 for remote scrapes)
+            port: TCP port (0 picks a free one)
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+    
+    def _handler(self):
+        registry = self.registry
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                # Scrapes every few seconds would flood the log
+                logger.debug(f"Metrics request: {format % args}")
+        
+        return Handler
+    
+    def start(self) -> bool:
+        """
+        Start serving
+        
+        Returns:
+            True if the server is listening
+        """
+        if self._server is not None:
+            return True
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        except OSError as e:
+            logger.error(f"Metrics endpoint unavailable on {self.host}:{self.port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics endpoint on http://{self.host}:{self.port}/metrics")
+        return True
+    
+    def stop(self):
+        """Stop serving"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=2.0)
+        self._server = None
+        self._thread = None
@@ -0,0 +1,162 @@
+"""
+Item Tracing
+Per-item trace IDs and span timings from trigger to door close, carried
+in the detection payload, in log lines and in a compact JSONL span dump
+"""
+
+import contextvars
+import itertools
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Trace of the item the current thread is working on (for log lines)
+CURRENT_TRACE: "contextvars.ContextVar[Optional[Trace]]" = contextvars.ContextVar('trace', default=None)
+
+
+class Trace:
+    """
+    Timeline of one item.
+    
+    Span times are milliseconds relative to the trace start (monotonic
+    clock); ``t0`` anchors the start to wall-clock time so traces can be
+    lined up with MQTT/dashboard timestamps.
+    """
+    
+    def __init__(self, tracer: "Tracer", trace_id: str, trigger: str = ''):
+        self.tracer = tracer
+        self.id = trace_id
+        self.trigger = trigger
+        self.t0 = time.time()
+        self.start = time.monotonic()
+        self.spans: List[list] = []  # [name, start_ms, duration_ms]
+        self.attributes: Dict[str, object] = {}
+        self.finished = False
+        self._lock = Lock()
+    
+    def _offset_ms(self, timestamp: float) -> float:
+        return round((timestamp - self.start) * 1000, 2)
+    
+    def add_span(self, name: str, start: float, end: float):
+        """
+        Record a span measured elsewhere
+        
+        Args:
+            name: Span name
+            start: time.monotonic() at span start (may precede the trace)
+            end: time.monotonic() at span end
+        """
+        with self._lock:
+            self.spans.append([name, self._offset_ms(start), round((end - start) * 1000, 2)])
+    
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as a span (and a stage histogram)"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            self.add_span(name, start, end)
+            if self.tracer.metrics is not None:
+                self.tracer.metrics.observe('stage_seconds', end - start, stage=name)
+    
+    @contextmanager
+    def activate(self) -> Iterator["Trace"]:
+        """Tag log lines from this thread with the trace ID"""
+        token = CURRENT_TRACE.set(self)
+        try:
+            yield self
+        finally:
+            CURRENT_TRACE.reset(token)
+    
+    def payload(self) -> dict:
+        """Compact form for MQTT payloads and the span dump"""
+        with self._lock:
+            data = {
+                'id': self.id,
+                't0': round(self.t0, 3),
+                'spans': [list(span) for span in self.spans],
+            }
+        if self.trigger:
+            data['trigger'] = self.trigger
+        if self.attributes:
+            data.update(self.attributes)
+        return data
+    
+    def end(self, **attributes):
+        """Close the trace and hand it to the tracer's dump (once)"""
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            self.attributes.update(attributes)
+            self.spans.append(['total', 0.0, self._offset_ms(time.monotonic())])
+        self.tracer._finish(self)
+
+
+class Tracer:
+    """
+    Hands out monotonically increasing trace IDs and appends finished
+    traces to a JSONL file, one line per item.
+    
+    IDs are ``<boot time, hex>-<counter>``: unique across restarts and
+    increasing within one run.
+    """
+    
+    def __init__(self, dump_path: Optional[str] = None, max_bytes: int = 5_000_000, metrics=None):
+        """
+        Initialize tracer
+        
+        Args:
+            dump_path: JSONL span dump (None disables it)
+            max_bytes: Rotate the dump to ``<path>.1`` beyond this size
+            metrics: Optional MetricsRegistry fed by Trace.span()
+        """
+        self.dump_path = dump_path
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+        self._prefix = f"{int(time.time()):x}"
+        self._counter = itertools.count(1)
+        self._lock = Lock()
+        
+        if dump_path:
+            os.makedirs(os.path.dirname(os.path.abspath(dump_path)), exist_ok=True)
+    
+    def start(self, trigger: str = '') -> Trace:
+        """
+        Begin a trace for a new item
+        
+        Args:
+            trigger: What started processing (ir, motion, manual, command)
+        """
+        trace = Trace(self, f"{self._prefix}-{next(self._counter)}", trigger)
+        return trace
+    
+    def _finish(self, trace: Trace):
+        if not self.dump_path:
+            return
+        line = json.dumps(trace.payload(), separators=(',', ':')) + '\n'
+        with self._lock:
+            try:
+                if os.path.exists(self.dump_path) and os.path.getsize(self.dump_path) > self.max_bytes:
+                    os.replace(self.dump_path, self.dump_path + '.1')
+                with open(self.dump_path, 'a') as f:
+                    f.write(line)
+            except OSError as e:
+                logger.warning(f"Could not write trace {trace.id}: {e}")
+
+
+class TraceLogFilter(logging.Filter):
+    """Adds ``%(trace)s`` to log records: "[<trace id>] " or empty"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace = CURRENT_TRACE.get()
+        record.trace = f"[{trace.id}] " if trace is not None else ''
+        return True
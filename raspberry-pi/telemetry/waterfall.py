@@ -0,0 +1,133 @@
+"""
+Trace Waterfall
+Renders the JSONL span dump written by telemetry.tracing as one
+waterfall per item, or as per-span statistics across items
+
+Usage (from the raspberry-pi directory):
+    
+    python -m telemetry.waterfall data/traces.jsonl              # last 5 items
+    python -m telemetry.waterfall data/traces.jsonl --slowest 3  # tail latency
+    python -m telemetry.waterfall data/traces.jsonl --id 67a1f3c2-17
+    python -m telemetry.waterfall data/traces.jsonl --stats
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+
+def load_traces(path: str) -> List[dict]:
+    """Read a span dump, skipping torn or invalid lines"""
+    traces = []
+    with open(path) as f:
+        for line in f:
+            try:
+                trace = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(trace, dict) and 'spans' in trace:
+                traces.append(trace)
+    return traces
+
+
+def total_ms(trace: dict) -> float:
+    for name, start, duration in trace['spans']:
+        if name == 'total':
+            return start + duration
+    return max((start + duration for _, start, duration in trace['spans']), default=0.0)
+
+
+def render(trace: dict, width: int = 50) -> str:
+    """One item as a text waterfall"""
+    spans = trace['spans']
+    begin = min([0.0] + [start for _, start, _ in spans])
+    end = max([total_ms(trace)] + [start + duration for _, start, duration in spans])
+    scale = width / max(end - begin, 1e-6)
+    
+    header = [f"trace {trace.get('id', '?')}"]
+    for key in ('trigger', 'destination', 'error'):
+        if trace.get(key):
+            header.append(f"{key}={trace[key]}")
+    header.append(f"total {total_ms(trace):.1f} ms")
+    
+    lines = ['  '.join(header)]
+    name_width = max(len(name) for name, _, _ in spans)
+    for name, start, duration in spans:
+        left = int(round((start - begin) * scale))
+        length = max(1, int(round(duration * scale)))
+        bar = ' ' * left + '█' * min(length, width - left)
+        lines.append(f"  {name:<{name_width}} |{bar:<{width}}| {start:9.1f} +{duration:9.1f} ms")
+    return '\n'.join(lines)
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def span_stats(traces: List[dict]) -> str:
+    """p50/p95/max per span name, plus each span's share of the slowest 5%"""
+    durations: Dict[str, List[float]] = defaultdict(list)
+    for trace in traces:
+        for name, _, duration in trace['spans']:
+            durations[name].append(duration)
+    
+    slow = sorted(traces, key=total_ms)[-max(1, len(traces) // 20):]
+    slow_total = sum(total_ms(trace) for trace in slow) or 1.0
+    slow_share: Dict[str, float] = defaultdict(float)
+    for trace in slow:
+        for name, _, duration in trace['spans']:
+            slow_share[name] += duration
+    
+    lines = [f"{len(traces)} traces, tail = slowest {len(slow)}",
+             f"  {'span':<16}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'max ms':>11}{'tail %':>9}"]
+    for name, values in sorted(durations.items(), key=lambda item: -percentile(item[1], 0.95)):
+        share = 100.0 * slow_share[name] / slow_total if name != 'total' else 100.0
+        lines.append(
+            f"  {name:<16}{len(values):>7}{percentile(values, 0.5):>11.1f}"
+            f"{percentile(values, 0.95):>11.1f}{max(values):>11.1f}{share:>8.0f}%"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Render item trace waterfalls")
+    parser.add_argument("path", nargs="?", default="data/traces.jsonl", help="Span dump (JSONL)")
+    parser.add_argument("--id", help="Show only this trace ID")
+    parser.add_argument("--last", type=int, default=5, help="Show the most recent N items")
+    parser.add_argument("--slowest", type=int, help="Show the N slowest items instead")
+    parser.add_argument("--stats", action="store_true", help="Per-span statistics across all items")
+    parser.add_argument("--width", type=int, default=50, help="Bar width in characters")
+    args = parser.parse_args(argv)
+    
+    try:
+        traces = load_traces(args.path)
+    except OSError as e:
+        print(f"Cannot read {args.path}: {e}", file=sys.stderr)
+        return 1
+    if not traces:
+        print(f"No traces in {args.path}", file=sys.stderr)
+        return 1
+    
+    if args.stats:
+        print(span_stats(traces))
+        return 0
+    
+    if args.id:
+        selected = [trace for trace in traces if trace.get('id') == args.id]
+    elif args.slowest:
+        selected = sorted(traces, key=total_ms, reverse=True)[:args.slowest]
+    else:
+        selected = traces[-args.last:]
+    
+    if not selected:
+        print("No matching traces", file=sys.stderr)
+        return 1
+    print('\n\n'.join(render(trace, args.width) for trace in selected))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Tests for the CBOR telemetry codec (mqtt/codec.py)
+
+Run from the raspberry-pi directory:
+
+    python -m pytest -q tests
+"""
+
+import math
+import struct
+from pathlib import Path
+
+import pytest
+
+from mqtt.codec import decode, decode_batch, encode, encode_batch
+
+
+# Encodings from RFC 8949 Appendix A
+RFC_VECTORS = [
+    (0, '00'),
+    (23, '17'),
+    (24, '1818'),
+    (100, '1864'),
+    (1000, '1903e8'),
+    (1000000, '1a000f4240'),
+    (1000000000000, '1b000000e8d4a51000'),
+    (18446744073709551615, '1bffffffffffffffff'),
+    (-1, '20'),
+    (-10, '29'),
+    (-100, '3863'),
+    (-1000, '3903e7'),
+    (-18446744073709551616, '3bffffffffffffffff'),
+    (False, 'f4'),
+    (True, 'f5'),
+    (None, 'f6'),
+    ('', '60'),
+    ('a', '6161'),
+    ('IETF', '6449455446'),
+    ('ü', '62c3bc'),
+    ('水', '63e6b0b4'),
+    (b'', '40'),
+    (b'\x01\x02\x03\x04', '4401020304'),
+    ([], '80'),
+    ([1, 2, 3], '83010203'),
+    ([1, [2, 3], [4, 5]], '8301820203820405'),
+    ({}, 'a0'),
+    ({1: 2, 3: 4}, 'a201020304'),
+    ({'a': 1, 'b': [2, 3]}, 'a26161016162820203'),
+]
+
+
+@pytest.mark.parametrize('value, expected', RFC_VECTORS)
+def test_matches_rfc_vectors(value, expected):
+    assert encode(value).hex() == expected
+    assert decode(bytes.fromhex(expected)) == value
+
+
+@pytest.mark.parametrize('value', [
+    23, 24, 255, 256, 65535, 65536, 2 ** 32 - 1, 2 ** 32, 2 ** 53 + 1, 2 ** 64 - 1,
+    -24, -25, -256, -257, -65536, -65537, -2 ** 32, -2 ** 32 - 1, -2 ** 63, -2 ** 64,
+])
+def test_int_width_boundaries(value):
+    assert decode(encode(value)) == value
+
+
+@pytest.mark.parametrize('value', [2 ** 64, -2 ** 64 - 1])
+def test_int_out_of_range(value):
+    with pytest.raises(ValueError):
+        encode(value)
+
+
+def test_bool_is_not_encoded_as_int():
+    assert decode(encode(True)) is True
+    assert decode(encode(False)) is False
+
+
+def test_floats_are_sent_as_float32():
+    payload = encode(0.1)
+    assert payload[0] == 0xfa and len(payload) == 5
+    assert decode(payload) == struct.unpack('>f', struct.pack('>f', 0.1))[0]
+
+
+def test_integral_floats_shrink_to_ints():
+    assert encode(42.0) == encode(42)
+    assert decode(encode(-3.0)) == -3
+    # Beyond 2**53 a float no longer holds an exact integer
+    assert encode(2.0 ** 60)[0] == 0xfa
+
+
+def test_special_floats():
+    assert decode(encode(float('inf'))) == float('inf')
+    assert decode(encode(float('-inf'))) == float('-inf')
+    assert math.isnan(decode(encode(float('nan'))))
+
+
+def test_decodes_half_and_double_floats():
+    assert decode(bytes.fromhex('f93c00')) == 1.0
+    assert decode(bytes.fromhex('f9c400')) == -4.0
+    assert decode(bytes.fromhex('f97c00')) == float('inf')
+    assert decode(bytes.fromhex('fb3ff199999999999a')) == 1.1
+
+
+def test_bytes_round_trip():
+    data = bytes(range(256)) * 300
+    assert decode(encode(data)) == data
+    assert decode(encode(bytearray(b'\x00\xff'))) == b'\x00\xff'
+
+
+def test_long_text_round_trip():
+    text = 'bin é水\U0001f5d1 ' * 5000
+    assert decode(encode(text)) == text
+
+
+def test_nested_maps_round_trip():
+    value = {
+        'levels': {'dry': 12.5, 'wet': None, 'electronic': 100},
+        'bins': [{'name': 'dry', 'full': False, 'raw': b'\x00\x01'}, {'name': 'wet', 'full': True}],
+        'deep': {'a': {'b': {'c': {'d': [-1, 2 ** 40, {'e': ''}]}}}},
+        7: 'int key',
+    }
+    assert decode(encode(value)) == value
+
+
+def test_tuples_decode_as_lists():
+    assert decode(encode((1, (2, 3)))) == [1, [2, 3]]
+
+
+def test_numpy_scalars_use_their_python_value():
+    np = pytest.importorskip('numpy')
+    assert decode(encode(np.int64(-7))) == -7
+    assert decode(encode(np.float32(0.5))) == 0.5
+    assert decode(encode({'n': np.uint8(200)})) == {'n': 200}
+
+
+def test_unknown_objects_are_stringified():
+    assert decode(encode(Path('a'))) == 'a'
+
+
+def test_trailing_bytes_rejected():
+    with pytest.raises(ValueError):
+        decode(encode(1) + b'\x00')
+
+
+def test_indefinite_length_rejected():
+    with pytest.raises(ValueError):
+        decode(bytes.fromhex('9f01ff'))
+
+
+def test_unsupported_simple_value_rejected():
+    with pytest.raises(ValueError):
+        decode(bytes.fromhex('f0'))
+
+
+def test_batch_round_trip():
+    records = [
+        (1700000000000, {'event': 'detection', 'confidence': 0.75}),
+        (1700000000250, {'event': 'level', 'levels': {'dry': 40}}),
+        (1700000060000, {'event': 'status', 'raw': b'\x01'}),
+    ]
+    decoded = decode_batch(encode_batch('smartbin/detection', records))
+    assert [record['ts'] for record in decoded] == [ts for ts, _ in records]
+    assert decoded[1]['levels'] == {'dry': 40}
+    assert decoded[2]['raw'] == b'\x01'
+
+
+def test_batch_offsets_are_relative():
+    batch = decode(encode_batch('t', [(5000, {}), (5001, {})]))
+    assert batch['t0'] == 5000
+    assert [dt for dt, _ in batch['r']] == [0, 1]
+
+
+def test_empty_batch():
+    assert decode_batch(encode_batch('t', [])) == []
+
+
+def test_batch_version_checked():
+    payload = encode({'v': 99, 'topic': 't', 't0': 0, 'r': []})
+    with pytest.raises(ValueError):
+        decode_batch(payload)
@@ -0,0 +1,76 @@
+"""
+Tests for the streaming ultrasonic distance filter (hardware/fill_filter.py)
+"""
+
+import pytest
+
+from hardware.fill_filter import StreamingDistanceFilter
+
+
+def test_first_sample_is_the_estimate():
+    distance_filter = StreamingDistanceFilter()
+    assert distance_filter.value is None and not distance_filter.valid
+    assert distance_filter.update(20.0) == 20.0
+    assert distance_filter.valid
+
+
+def test_estimate_is_smoothed():
+    distance_filter = StreamingDistanceFilter(window=1, alpha=0.5)
+    distance_filter.update(20.0)
+    assert distance_filter.update(22.0) == pytest.approx(21.0)
+
+
+def test_single_spike_is_rejected():
+    distance_filter = StreamingDistanceFilter(max_jump=10.0)
+    for _ in range(3):
+        distance_filter.update(20.0)
+    assert distance_filter.update(3.0) == pytest.approx(20.0)
+    assert distance_filter.update(20.5) == pytest.approx(20.0, abs=0.5)
+    assert distance_filter.rejected == 1
+
+
+def test_consistent_step_is_accepted():
+    distance_filter = StreamingDistanceFilter(max_jump=10.0, confirm_jumps=3)
+    for _ in range(3):
+        distance_filter.update(28.0)
+    # A large item dropped in: the level really changed
+    assert distance_filter.update(12.0) == pytest.approx(28.0)
+    assert distance_filter.update(12.5) == pytest.approx(28.0)
+    assert distance_filter.update(12.2) == pytest.approx(12.2, abs=0.5)
+
+
+def test_inconsistent_outliers_are_not_a_step():
+    distance_filter = StreamingDistanceFilter(max_jump=10.0, confirm_jumps=3)
+    for _ in range(3):
+        distance_filter.update(28.0)
+    for sample in (5.0, 60.0, 5.0, 60.0):
+        assert distance_filter.update(sample) == pytest.approx(28.0)
+
+
+def test_failed_reads_invalidate_then_recover():
+    distance_filter = StreamingDistanceFilter(invalid_after=3)
+    distance_filter.update(20.0)
+    assert distance_filter.update(None) == 20.0
+    assert distance_filter.update(-1) == 20.0
+    # Missing reads never become a fake empty/full level
+    assert distance_filter.update(None) is None
+    assert not distance_filter.valid
+    assert distance_filter.update(20.0) is not None
+    assert distance_filter.failed_reads == 3
+
+
+def test_spread_across_samples():
+    distance_filter = StreamingDistanceFilter(window=4)
+    distance_filter.update(20.0)
+    assert distance_filter.spread() is None
+    for sample in (22.0, 20.0, 22.0):
+        distance_filter.update(sample)
+    assert distance_filter.spread() == pytest.approx(1.0)
+
+
+def test_reset():
+    distance_filter = StreamingDistanceFilter()
+    distance_filter.update(20.0)
+    distance_filter.reset()
+    assert distance_filter.value is None
+    assert distance_filter.update(5.0) == 5.0
@@ -0,0 +1,89 @@
+"""
+Tests for the Holt fill-rate model and time-to-full forecast
+(hardware/fill_forecast.py)
+"""
+
+import pytest
+
+from hardware.fill_forecast import FillForecaster, HoltTrend
+
+
+def test_first_sample_sets_the_level():
+    model = HoltTrend()
+    model.update(10.0, 0)
+    assert model.level == 10.0 and model.trend == 0.0 and model.samples == 1
+
+
+def test_tracks_a_linear_fill():
+    model = HoltTrend(alpha=0.5, beta=0.2)
+    # 1 percentage point per minute, irregularly spaced
+    for t in (0, 30, 90, 100, 160, 300, 330, 420, 600, 660, 900):
+        model.update(t / 60.0, t)
+    assert model.trend == pytest.approx(1 / 60.0, rel=0.05)
+    assert model.level == pytest.approx(15.0, abs=0.5)
+
+
+def test_non_increasing_timestamps_are_ignored():
+    model = HoltTrend()
+    model.update(10.0, 100)
+    model.update(50.0, 100)
+    model.update(50.0, 90)
+    assert model.level == 10.0 and model.samples == 1
+
+
+def test_reset():
+    model = HoltTrend()
+    model.update(10.0, 0)
+    model.update(20.0, 10)
+    model.reset()
+    assert model.level is None and model.trend == 0.0 and model.samples == 0
+
+
+def feed(forecaster, values, step=60.0, name='dry'):
+    for i, value in enumerate(values):
+        forecaster.update({name: value}, now=i * step)
+
+
+def test_no_forecast_before_min_samples():
+    forecaster = FillForecaster(['dry'], min_samples=3)
+    feed(forecaster, [10.0, 11.0])
+    assert forecaster.fill_rates() == {'dry': None}
+    assert forecaster.time_to_full(now=120) == {'dry': None}
+
+
+def test_fill_rate_and_time_to_full():
+    forecaster = FillForecaster(['dry'], full_threshold=80.0)
+    feed(forecaster, [10.0 + i for i in range(20)])  # 1 point per minute
+    assert forecaster.fill_rates()['dry'] == pytest.approx(60.0, rel=0.05)
+    # 29 % now, 51 points to go at 1 point a minute
+    assert forecaster.time_to_full(now=19 * 60)['dry'] == pytest.approx(51 * 60, rel=0.05)
+
+
+def test_time_to_full_extrapolates_to_now():
+    forecaster = FillForecaster(['dry'], full_threshold=80.0)
+    feed(forecaster, [10.0 + i for i in range(20)])
+    later = forecaster.time_to_full(now=19 * 60 + 600)['dry']
+    assert later == pytest.approx(41 * 60, rel=0.05)
+    assert forecaster.time_to_full(now=1e6)['dry'] == 0.0
+
+
+def test_not_filling_has_no_time_to_full():
+    forecaster = FillForecaster(['dry'])
+    feed(forecaster, [30.0] * 5)
+    assert forecaster.time_to_full(now=300) == {'dry': None}
+
+
+def test_emptying_restarts_the_model():
+    forecaster = FillForecaster(['dry'], empty_drop=20.0)
+    feed(forecaster, [60.0, 65.0, 70.0, 75.0])
+    forecaster.update({'dry': 5.0}, now=300)
+    model = forecaster.models['dry']
+    assert model.level == 5.0 and model.samples == 1
+    assert forecaster.fill_rates() == {'dry': None}
+
+
+def test_missing_and_unknown_bins_are_skipped():
+    forecaster = FillForecaster(['dry'])
+    forecaster.update({'dry': None, 'compost': 50.0}, now=0)
+    assert forecaster.models['dry'].samples == 0
+    assert 'compost' not in forecaster.models
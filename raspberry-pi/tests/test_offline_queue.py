@@ -0,0 +1,201 @@
+"""
+Tests for the disk-backed MQTT offline queue (mqtt/offline_queue.py)
+"""
+
+import json
+import os
+
+import pytest
+
+from mqtt.offline_queue import OfflineQueue
+
+
+def journal_lines(directory):
+    with open(os.path.join(directory, 'queue.jsonl'), encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def drain(queue):
+    messages = []
+    while True:
+        message = queue.peek()
+        if message is None:
+            return messages
+        messages.append((message.topic, message.payload))
+        queue.ack(message.seq)
+
+
+def reopen(queue, directory, **kwargs):
+    queue.close()
+    return OfflineQueue(str(directory), **kwargs)
+
+
+def test_fifo_order_and_ack(tmp_path):
+    queue = OfflineQueue(str(tmp_path))
+    for i in range(3):
+        assert queue.put('smartbin/detection', f'm{i}')
+    assert len(queue) == 3
+    assert drain(queue) == [('smartbin/detection', f'm{i}') for i in range(3)]
+    assert len(queue) == 0
+
+
+def test_ack_covers_everything_before_it(tmp_path):
+    queue = OfflineQueue(str(tmp_path))
+    for i in range(4):
+        queue.put('t', f'm{i}')
+    queue.ack(3)
+    assert queue.peek().payload == 'm3'
+    assert len(queue) == 1
+
+
+def test_restart_recovers_unacked_messages(tmp_path):
+    queue = OfflineQueue(str(tmp_path))
+    for i in range(3):
+        queue.put('t', f'm{i}')
+    queue.ack(queue.peek().seq)
+
+    queue = reopen(queue, tmp_path)
+    assert len(queue) == 2
+    # Sequence numbers carry on after a restart
+    queue.put('t', 'm3')
+    assert drain(queue) == [('t', 'm1'), ('t', 'm2'), ('t', 'm3')]
+
+
+def test_restart_after_full_drain_starts_clean(tmp_path):
+    queue = OfflineQueue(str(tmp_path))
+    queue.put('t', 'm0')
+    drain(queue)
+    assert journal_lines(tmp_path) == []
+
+    queue = reopen(queue, tmp_path)
+    assert len(queue) == 0
+    queue.put('t', 'm1')
+    assert queue.peek().seq == 2
+
+
+def test_binary_payloads_survive_restart(tmp_path):
+    queue = OfflineQueue(str(tmp_path))
+    queue.put('smartbin/bin_status/batch', b'\x00\xa3\xff')
+    queue = reopen(queue, tmp_path)
+    assert queue.peek().payload == b'\x00\xa3\xff'
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    queue = OfflineQueue(str(tmp_path))
+    queue.put('t', 'm0')
+    queue.put('t', 'm1')
+    queue.close()
+    # Crash in the middle of appending the third message
+    with open(os.path.join(tmp_path, 'queue.jsonl'), 'a', encoding='utf-8') as f:
+        f.write('{"seq": 3, "topic": "t", "payl')
+
+    queue = OfflineQueue(str(tmp_path))
+    assert len(queue) == 2
+    # Recovery rewrote the journal without the torn line
+    assert all(json.loads(line) for line in journal_lines(tmp_path))
+    queue.put('t', 'm2')
+    queue = reopen(queue, tmp_path)
+    assert [payload for _, payload in drain(queue)] == ['m0', 'm1', 'm2']
+
+
+def test_ack_marker_is_replaced_atomically(tmp_path):
+    queue = OfflineQueue(str(tmp_path))
+    for i in range(3):
+        queue.put('t', f'm{i}')
+    queue.ack(2)
+    with open(os.path.join(tmp_path, 'queue.ack'), encoding='utf-8') as f:
+        assert f.read() == '2'
+    assert not os.path.exists(os.path.join(tmp_path, 'queue.ack.tmp'))
+
+
+def test_unrenamed_ack_marker_is_ignored(tmp_path):
+    queue = OfflineQueue(str(tmp_path))
+    for i in range(3):
+        queue.put('t', f'm{i}')
+    queue.ack(1)
+    queue.close()
+    # Crash after writing the temporary marker but before the rename
+    with open(os.path.join(tmp_path, 'queue.ack.tmp'), 'w', encoding='utf-8') as f:
+        f.write('3')
+
+    queue = OfflineQueue(str(tmp_path))
+    assert [payload for _, payload in drain(queue)] == ['m1', 'm2']
+
+
+def test_empty_ack_marker_replays_everything(tmp_path):
+    queue = OfflineQueue(str(tmp_path))
+    queue.put('t', 'm0')
+    queue.close()
+    open(os.path.join(tmp_path, 'queue.ack'), 'w').close()
+
+    queue = OfflineQueue(str(tmp_path))
+    assert [payload for _, payload in drain(queue)] == ['m0']
+
+
+def test_drop_oldest_when_full(tmp_path):
+    queue = OfflineQueue(str(tmp_path), max_messages=2)
+    for i in range(3):
+        assert queue.put('t', f'm{i}')
+    assert queue.stats()['dropped'] == {'t': 1}
+    assert [payload for _, payload in drain(queue)] == ['m1', 'm2']
+
+
+def test_drop_newest_when_full(tmp_path):
+    queue = OfflineQueue(str(tmp_path), max_messages=2, default_policy='drop_newest')
+    assert queue.put('t', 'm0')
+    assert queue.put('t', 'm1')
+    assert not queue.put('t', 'm2')
+    assert [payload for _, payload in drain(queue)] == ['m0', 'm1']
+
+
+def test_latest_keeps_one_message_per_topic(tmp_path):
+    queue = OfflineQueue(str(tmp_path), policies={'smartbin/bin_status': 'latest'})
+    queue.put('smartbin/bin_status', 'old')
+    queue.put('smartbin/detection', 'item')
+    queue.put('smartbin/bin_status', 'new')
+    assert drain(queue) == [('smartbin/detection', 'item'), ('smartbin/bin_status', 'new')]
+
+
+@pytest.mark.parametrize('policy, expected', [
+    ('drop_oldest', ['m3', 'm4']),
+    ('drop_newest', ['m0', 'm1']),
+])
+def test_drop_policies_apply_on_recovery(tmp_path, policy, expected):
+    queue = OfflineQueue(str(tmp_path), max_messages=10)
+    for i in range(5):
+        queue.put('t', f'm{i}')
+
+    queue = reopen(queue, tmp_path, max_messages=2, default_policy=policy)
+    assert [payload for _, payload in drain(queue)] == expected
+
+
+def test_latest_policy_applies_on_recovery(tmp_path):
+    queue = OfflineQueue(str(tmp_path))
+    for i in range(3):
+        queue.put('smartbin/bin_status', f's{i}')
+
+    queue = reopen(queue, tmp_path, policies={'smartbin/bin_status': 'latest'})
+    assert drain(queue) == [('smartbin/bin_status', 's2')]
+
+
+def test_journal_is_compacted_at_twice_capacity(tmp_path):
+    queue = OfflineQueue(str(tmp_path), max_messages=3)
+    for i in range(6):
+        queue.put('t', f'm{i}')
+    # Dropped messages stay in the journal until it reaches 2x capacity...
+    assert len(journal_lines(tmp_path)) == 6
+
+    queue.put('t', 'm6')
+    # ...then it is rewritten with only the pending messages
+    lines = [json.loads(line) for line in journal_lines(tmp_path)]
+    assert [entry['payload'] for entry in lines] == ['m4', 'm5', 'm6']
+
+    queue = reopen(queue, tmp_path, max_messages=3)
+    assert [payload for _, payload in drain(queue)] == ['m4', 'm5', 'm6']
+
+
+def test_unknown_policy_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        OfflineQueue(str(tmp_path), default_policy='drop_random')
+    with pytest.raises(ValueError):
+        OfflineQueue(str(tmp_path), policies={'t': 'keep'})
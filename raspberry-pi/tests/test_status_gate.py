@@ -0,0 +1,117 @@
+"""
+Tests for the bin status publish gate and alert latch (mqtt/status_gate.py)
+"""
+
+from mqtt.status_gate import BinStatusGate
+
+
+def make_gate(**kwargs):
+    options = {'deadband': 5.0, 'full_threshold': 80.0, 'hysteresis': 5.0, 'heartbeat': 300.0}
+    options.update(kwargs)
+    return BinStatusGate(**options)
+
+
+def test_first_update_publishes():
+    decision = make_gate().update({'dry': 10.0}, now=0)
+    assert decision.publish and decision.reason == 'initial'
+
+
+def test_changes_within_deadband_are_suppressed():
+    gate = make_gate()
+    gate.update({'dry': 10.0}, now=0)
+    assert not gate.update({'dry': 14.0}, now=1).publish
+    # Measured against the last published value, not the last update
+    assert not gate.update({'dry': 15.0}, now=2).publish
+    decision = gate.update({'dry': 15.5}, now=3)
+    assert decision.publish and decision.reason == 'change'
+
+
+def test_validity_change_publishes():
+    gate = make_gate()
+    gate.update({'dry': 10.0}, now=0)
+    assert gate.update({'dry': None}, now=1).reason == 'validity'
+    assert gate.update({'dry': 10.0}, now=2).reason == 'validity'
+
+
+def test_new_bin_publishes():
+    gate = make_gate()
+    gate.update({'dry': 10.0}, now=0)
+    assert gate.update({'dry': 10.0, 'wet': 10.0}, now=1).reason == 'bins'
+
+
+def test_heartbeat():
+    gate = make_gate(heartbeat=60)
+    gate.update({'dry': 10.0}, now=0)
+    assert not gate.update({'dry': 10.0}, now=59).publish
+    assert gate.update({'dry': 10.0}, now=60).reason == 'heartbeat'
+    assert not gate.update({'dry': 10.0}, now=61).publish
+
+
+def test_zero_heartbeat_disables_it():
+    gate = make_gate(heartbeat=0)
+    gate.update({'dry': 10.0}, now=0)
+    assert not gate.update({'dry': 10.0}, now=1e6).publish
+
+
+def test_alert_raised_once_and_latched():
+    gate = make_gate()
+    gate.update({'dry': 70.0}, now=0)
+    decision = gate.update({'dry': 81.0}, now=1)
+    assert decision.raised == ['dry'] and decision.publish
+    assert gate.update({'dry': 90.0}, now=2).raised == []
+    assert gate.latched == {'dry'}
+
+
+def test_threshold_crossing_publishes_inside_deadband():
+    gate = make_gate()
+    gate.update({'dry': 78.0}, now=0)
+    decision = gate.update({'dry': 80.0}, now=1)
+    assert decision.publish and decision.reason == 'threshold'
+
+
+def test_alert_clears_only_below_hysteresis():
+    gate = make_gate()
+    gate.update({'dry': 85.0}, now=0)
+    # Noise around the threshold does not clear the alert
+    assert gate.update({'dry': 76.0}, now=1).cleared == []
+    assert gate.update({'dry': 81.0}, now=2).raised == []
+    decision = gate.update({'dry': 74.0}, now=3)
+    assert decision.cleared == ['dry']
+    assert gate.latched == set()
+
+
+def test_missing_reading_keeps_alert_state():
+    gate = make_gate()
+    gate.update({'dry': 85.0}, now=0)
+    decision = gate.update({'dry': None}, now=1)
+    assert decision.cleared == [] and gate.latched == {'dry'}
+
+
+def test_reverted_alert_is_raised_again():
+    gate = make_gate()
+    gate.update({'dry': 85.0}, now=0)
+    # The alert could not be sent
+    gate.revert_alert('dry')
+    assert gate.update({'dry': 85.0}, now=1).raised == ['dry']
+
+
+def test_reverted_clear_is_cleared_again():
+    gate = make_gate()
+    gate.update({'dry': 85.0}, now=0)
+    assert gate.update({'dry': 10.0}, now=1).cleared == ['dry']
+    gate.revert_alert('dry')
+    assert gate.update({'dry': 10.0}, now=2).cleared == ['dry']
+
+
+def test_invalidate_forces_publish():
+    gate = make_gate()
+    gate.update({'dry': 10.0}, now=0)
+    gate.invalidate()
+    assert gate.update({'dry': 10.0}, now=1).reason == 'initial'
+
+
+def test_stats():
+    gate = make_gate()
+    gate.update({'dry': 10.0}, now=0)
+    gate.update({'dry': 11.0}, now=1)
+    assert gate.stats() == {'updates': 2, 'publishes': 1, 'suppressed': 1, 'latched': []}
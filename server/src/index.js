@@ -55,7 +55,11 @@ socketService.initialize(server);
 // Setup MQTT message handlers
 mqttService.onMessage(mqttConfig.topics.detection, async (data) => {
   console.log('Detection received:', data);
-  
+  if (data.trace && data.trace.t0) {
+    // Trigger-to-server latency for the item (assumes NTP-synced clocks)
+    console.log(`Trace ${data.trace.id}: received ${Date.now() - data.trace.t0 * 1000} ms after trigger`);
+  }
+
   // Process detection
   const result = detectionController.processDetection(data);
   